@@ -0,0 +1,49 @@
+"""Per-series summary table
+
+Revision ID: 0c7d3f5a9e12
+Revises: f1b6d2e9c384
+Create Date: 2026-10-19 17:32:18.904417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c7d3f5a9e12'
+down_revision: Union[str, None] = 'f1b6d2e9c384'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('series_stats',
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('first_timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_timestamp', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('min_value', sa.Float(), nullable=True),
+    sa.Column('max_value', sa.Float(), nullable=True),
+    sa.Column('last_value', sa.Float(), nullable=True),
+    sa.Column('stale', sa.Boolean(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['series_id'], ['series.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('series_id')
+    )
+    # Backfill from the hot table; series with cold chunks or archives stay stale
+    # until `python scripts/rebuild_series_stats.py --stale-only` has run
+    op.execute("""
+        INSERT INTO series_stats (series_id, count, first_timestamp, last_timestamp, min_value, max_value, last_value, stale)
+        SELECT s.id, count(m.id), min(m.timestamp), max(m.timestamp), min(m.value), max(m.value),
+               (SELECT value FROM measurements l WHERE l.series_id = s.id ORDER BY l.timestamp DESC, l.id DESC LIMIT 1),
+               EXISTS (SELECT 1 FROM measurement_chunks c WHERE c.series_id = s.id)
+               OR EXISTS (SELECT 1 FROM measurement_archives a WHERE a.series_id = s.id)
+        FROM series s LEFT JOIN measurements m ON m.series_id = s.id
+        GROUP BY s.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('series_stats')
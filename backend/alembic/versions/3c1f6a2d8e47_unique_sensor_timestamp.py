@@ -0,0 +1,37 @@
+"""Unique sensor reading per timestamp
+
+Revision ID: 3c1f6a2d8e47
+Revises: 9bf469006d12
+Create Date: 2026-10-19 09:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f6a2d8e47'
+down_revision: Union[str, None] = '9bf469006d12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Drop retried duplicates, keeping the first stored copy of each reading
+    op.execute("""
+        DELETE FROM measurements a
+        USING measurements b
+        WHERE a.sensor_id = b.sensor_id
+          AND a.timestamp = b.timestamp
+          AND a.id > b.id
+    """)
+    op.create_unique_constraint('uq_measurements_sensor_timestamp', 'measurements', ['sensor_id', 'timestamp'])
+    # The unique index leads with sensor_id, so the single-column index is redundant
+    op.drop_index(op.f('ix_measurements_sensor_id'), table_name='measurements')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_measurements_sensor_id'), 'measurements', ['sensor_id'], unique=False)
+    op.drop_constraint('uq_measurements_sensor_timestamp', 'measurements', type_='unique')
@@ -0,0 +1,40 @@
+"""Scheduled job runs
+
+Revision ID: 4d8a2c6f0b17
+Revises: c92f5e1a7d34
+Create Date: 2026-10-19 20:03:11.274905
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d8a2c6f0b17'
+down_revision: Union[str, None] = 'c92f5e1a7d34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job_runs',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('job', sa.String(length=50), nullable=False),
+    sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('duration_ms', sa.Float(), nullable=True),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('detail', sa.Text(), nullable=True),
+    sa.Column('worker', sa.String(length=100), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job', 'scheduled_for', name='uq_job_runs_job_slot')
+    )
+    op.create_index('ix_job_runs_started_at', 'job_runs', ['started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_runs_started_at', table_name='job_runs')
+    op.drop_table('job_runs')
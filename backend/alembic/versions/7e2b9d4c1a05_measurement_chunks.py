@@ -0,0 +1,47 @@
+"""Cold storage chunks for old measurements
+
+Revision ID: 7e2b9d4c1a05
+Revises: 3c1f6a2d8e47
+Create Date: 2026-10-19 11:40:07.204113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7e2b9d4c1a05'
+down_revision: Union[str, None] = '3c1f6a2d8e47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('measurement_chunks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('start_ts', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_ts', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('min_id', sa.Integer(), nullable=False),
+    sa.Column('max_id', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('min_value', sa.Float(), nullable=False),
+    sa.Column('max_value', sa.Float(), nullable=False),
+    sa.Column('codec', sa.String(length=16), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['series_id'], ['series.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_measurement_chunks_series_range', 'measurement_chunks', ['series_id', 'start_ts', 'end_ts'], unique=False)
+    op.create_index('ix_measurement_chunks_id_range', 'measurement_chunks', ['min_id', 'max_id'], unique=False)
+    # Payloads are already compressed; skip TOAST's pglz pass
+    op.execute("ALTER TABLE measurement_chunks ALTER COLUMN data SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_measurement_chunks_id_range', table_name='measurement_chunks')
+    op.drop_index('ix_measurement_chunks_series_range', table_name='measurement_chunks')
+    op.drop_table('measurement_chunks')
@@ -0,0 +1,29 @@
+"""Composite index for per-series time range scans
+
+Revision ID: a41d0c7f92b3
+Revises: 7e2b9d4c1a05
+Create Date: 2026-10-19 13:05:52.730419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d0c7f92b3'
+down_revision: Union[str, None] = '7e2b9d4c1a05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_measurements_series_timestamp', 'measurements', ['series_id', 'timestamp'], unique=False)
+    # Superseded by the composite index, which leads with series_id
+    op.drop_index(op.f('ix_measurements_series_id'), table_name='measurements')
+
+
+def downgrade() -> None:
+    op.create_index(op.f('ix_measurements_series_id'), 'measurements', ['series_id'], unique=False)
+    op.drop_index('ix_measurements_series_timestamp', table_name='measurements')
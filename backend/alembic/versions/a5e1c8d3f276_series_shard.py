@@ -0,0 +1,27 @@
+"""Series shard placement
+
+Revision ID: a5e1c8d3f276
+Revises: 4d8a2c6f0b17
+Create Date: 2026-10-19 21:40:27.516032
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5e1c8d3f276'
+down_revision: Union[str, None] = '4d8a2c6f0b17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing series keep their readings on the primary (shard 0)
+    op.add_column('series', sa.Column('shard', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('series', 'shard')
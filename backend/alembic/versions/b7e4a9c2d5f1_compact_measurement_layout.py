@@ -0,0 +1,96 @@
+"""Compact measurement row layout: bigint identity, padding-free column order
+
+Revision ID: b7e4a9c2d5f1
+Revises: 0c7d3f5a9e12
+Create Date: 2026-10-19 18:05:27.118342
+
+Rebuilds `measurements` as (id bigint, timestamp, value, [created_at],
+series_id, sensor_id). Eight-byte columns come before four-byte ones, so
+PostgreSQL stores no alignment padding, and the 32-bit id can no longer
+overflow. The redundant ix_measurements_id index is not recreated, since the
+primary key already covers it. created_at is dropped unless
+MEASUREMENT_CREATED_AT is true (the default); the API refuses to start
+if the setting later disagrees with the table.
+
+Rows are copied in (series_id, timestamp) order, which also clusters each
+series' readings. The table is locked for the whole copy (minutes for
+hundreds of millions of rows), so stop ingest first.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4a9c2d5f1'
+down_revision: Union[str, None] = '0c7d3f5a9e12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _created_at_column():
+    return sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False)
+
+
+def _swap_in(new_columns: list, copied: str, legacy_id_index: bool):
+    """Copy measurements into a table with `new_columns` and put it in place"""
+    op.create_table('measurements_rebuild', *new_columns)
+    op.execute(f"INSERT INTO measurements_rebuild ({copied}) "
+               f"SELECT {copied} FROM measurements ORDER BY series_id, timestamp")
+    op.drop_table('measurements')
+    op.rename_table('measurements_rebuild', 'measurements')
+
+    # Constraints and indexes are built once, after the load
+    op.create_primary_key('measurements_pkey', 'measurements', ['id'])
+    op.create_foreign_key('measurements_series_id_fkey', 'measurements', 'series', ['series_id'], ['id'],
+                          ondelete='CASCADE')
+    op.create_foreign_key('measurements_sensor_id_fkey', 'measurements', 'sensors', ['sensor_id'], ['id'],
+                          ondelete='SET NULL')
+    op.create_unique_constraint('uq_measurements_sensor_timestamp', 'measurements', ['sensor_id', 'timestamp'])
+    op.create_index('ix_measurements_series_timestamp', 'measurements', ['series_id', 'timestamp'], unique=False)
+    op.create_index(op.f('ix_measurements_timestamp'), 'measurements', ['timestamp'], unique=False)
+    if legacy_id_index:
+        op.create_index(op.f('ix_measurements_id'), 'measurements', ['id'], unique=False)
+    op.execute("SELECT setval(pg_get_serial_sequence('measurements', 'id'), "
+               "COALESCE((SELECT max(id) FROM measurements), 0) + 1, false)")
+
+
+def upgrade() -> None:
+    keep_created_at = settings.MEASUREMENT_CREATED_AT
+    columns = [
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('value', sa.Float(), nullable=False),
+        *([_created_at_column()] if keep_created_at else []),
+        sa.Column('series_id', sa.Integer(), nullable=False),
+        sa.Column('sensor_id', sa.Integer(), nullable=True),
+    ]
+    copied = "id, timestamp, value, " + ("created_at, " if keep_created_at else "") + "series_id, sensor_id"
+    _swap_in(columns, copied, legacy_id_index=False)
+
+    # Cold chunks and archives record measurement id ranges
+    for table in ('measurement_chunks', 'measurement_archives'):
+        op.alter_column(table, 'min_id', type_=sa.BigInteger(), existing_nullable=False)
+        op.alter_column(table, 'max_id', type_=sa.BigInteger(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    for table in ('measurement_chunks', 'measurement_archives'):
+        op.alter_column(table, 'min_id', type_=sa.Integer(), existing_nullable=False)
+        op.alter_column(table, 'max_id', type_=sa.Integer(), existing_nullable=False)
+
+    # Fails if ids have already grown past the 32-bit range
+    has_created_at = any(c['name'] == 'created_at' for c in sa.inspect(op.get_bind()).get_columns('measurements'))
+    columns = [
+        sa.Column('id', sa.Integer(), sa.Identity(), nullable=False),
+        sa.Column('series_id', sa.Integer(), nullable=False),
+        sa.Column('sensor_id', sa.Integer(), nullable=True),
+        sa.Column('value', sa.Float(), nullable=False),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+        _created_at_column(),
+    ]
+    copied = "id, series_id, sensor_id, value, timestamp" + (", created_at" if has_created_at else "")
+    _swap_in(columns, copied, legacy_id_index=True)
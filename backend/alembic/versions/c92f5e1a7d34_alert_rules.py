@@ -0,0 +1,60 @@
+"""Alert rules and events
+
+Revision ID: c92f5e1a7d34
+Revises: b7e4a9c2d5f1
+Create Date: 2026-10-19 19:12:40.551806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c92f5e1a7d34'
+down_revision: Union[str, None] = 'b7e4a9c2d5f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('alert_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=True),
+    sa.Column('window_seconds', sa.Float(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['series_id'], ['series.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_alert_rules_series_id'), 'alert_rules', ['series_id'], unique=False)
+    op.create_table('alert_events',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('rule_id', sa.Integer(), nullable=False),
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('sensor_id', sa.Integer(), nullable=True),
+    sa.Column('state', sa.String(length=10), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('threshold', sa.Float(), nullable=True),
+    sa.Column('timestamp', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['rule_id'], ['alert_rules.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['series_id'], ['series.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['sensor_id'], ['sensors.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_alert_events_series_timestamp', 'alert_events', ['series_id', 'timestamp'], unique=False)
+    op.create_index('ix_alert_events_rule_timestamp', 'alert_events', ['rule_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_alert_events_rule_timestamp', table_name='alert_events')
+    op.drop_index('ix_alert_events_series_timestamp', table_name='alert_events')
+    op.drop_table('alert_events')
+    op.drop_index(op.f('ix_alert_rules_series_id'), table_name='alert_rules')
+    op.drop_table('alert_rules')
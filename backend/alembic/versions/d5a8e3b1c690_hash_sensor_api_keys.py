@@ -0,0 +1,66 @@
+"""Store sensor API keys as prefix + HMAC-SHA256
+
+Revision ID: d5a8e3b1c690
+Revises: a41d0c7f92b3
+Create Date: 2026-10-19 14:02:17.418255
+
+"""
+import hashlib
+import hmac
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a8e3b1c690'
+down_revision: Union[str, None] = 'a41d0c7f92b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Frozen copies of app.utils.security as of this revision
+API_KEY_PREFIX_LENGTH = 12
+
+
+def hash_api_key(api_key: str) -> str:
+    secret = (settings.API_KEY_SECRET or settings.SECRET_KEY).encode()
+    return hmac.new(secret, api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('sensors', sa.Column('api_key_prefix', sa.String(length=16), nullable=True))
+    op.add_column('sensors', sa.Column('api_key_hash', sa.String(length=64), nullable=True))
+
+    # Rehash existing keys with the current API_KEY_SECRET / SECRET_KEY
+    sensors = sa.table('sensors', sa.column('id', sa.Integer), sa.column('api_key', sa.String),
+                       sa.column('api_key_prefix', sa.String), sa.column('api_key_hash', sa.String))
+    conn = op.get_bind()
+    for sensor_id, api_key in conn.execute(sa.select(sensors.c.id, sensors.c.api_key)).all():
+        conn.execute(
+            sensors.update().where(sensors.c.id == sensor_id)
+            .values(api_key_prefix=api_key[:API_KEY_PREFIX_LENGTH], api_key_hash=hash_api_key(api_key))
+        )
+
+    with op.batch_alter_table('sensors') as batch_op:
+        batch_op.alter_column('api_key_prefix', existing_type=sa.String(length=16), nullable=False)
+        batch_op.alter_column('api_key_hash', existing_type=sa.String(length=64), nullable=False)
+        batch_op.drop_index('ix_sensors_api_key')
+        batch_op.drop_column('api_key')
+    op.create_index(op.f('ix_sensors_api_key_prefix'), 'sensors', ['api_key_prefix'], unique=False)
+    op.create_index(op.f('ix_sensors_api_key_hash'), 'sensors', ['api_key_hash'], unique=True)
+
+
+def downgrade() -> None:
+    # Plaintext keys cannot be recovered; sensors must be given new keys
+    op.add_column('sensors', sa.Column('api_key', sa.String(length=255), nullable=True))
+    op.execute("UPDATE sensors SET api_key = 'revoked_' || api_key_hash")
+    with op.batch_alter_table('sensors') as batch_op:
+        batch_op.alter_column('api_key', existing_type=sa.String(length=255), nullable=False)
+    op.create_index(op.f('ix_sensors_api_key'), 'sensors', ['api_key'], unique=True)
+    op.drop_index(op.f('ix_sensors_api_key_hash'), table_name='sensors')
+    op.drop_index(op.f('ix_sensors_api_key_prefix'), table_name='sensors')
+    op.drop_column('sensors', 'api_key_hash')
+    op.drop_column('sensors', 'api_key_prefix')
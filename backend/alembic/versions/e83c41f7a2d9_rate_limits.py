@@ -0,0 +1,28 @@
+"""Per-sensor and per-series ingest rate limits
+
+Revision ID: e83c41f7a2d9
+Revises: d5a8e3b1c690
+Create Date: 2026-10-19 15:11:40.262817
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e83c41f7a2d9'
+down_revision: Union[str, None] = 'd5a8e3b1c690'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('series', sa.Column('rate_limit', sa.Float(), nullable=True))
+    op.add_column('sensors', sa.Column('rate_limit', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('sensors', 'rate_limit')
+    op.drop_column('series', 'rate_limit')
@@ -0,0 +1,43 @@
+"""Manifest of Parquet archive partitions
+
+Revision ID: f1b6d2e9c384
+Revises: e83c41f7a2d9
+Create Date: 2026-10-19 16:48:03.551902
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b6d2e9c384'
+down_revision: Union[str, None] = 'e83c41f7a2d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('measurement_archives',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('series_id', sa.Integer(), nullable=False),
+    sa.Column('start_ts', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_ts', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('min_id', sa.Integer(), nullable=False),
+    sa.Column('max_id', sa.Integer(), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=255), nullable=False),
+    sa.Column('pruned', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['series_id'], ['series.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_measurement_archives_series_range', 'measurement_archives', ['series_id', 'start_ts'], unique=True)
+    op.create_index('ix_measurement_archives_id_range', 'measurement_archives', ['min_id', 'max_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_measurement_archives_id_range', table_name='measurement_archives')
+    op.drop_index('ix_measurement_archives_series_range', table_name='measurement_archives')
+    op.drop_table('measurement_archives')
@@ -6,6 +6,112 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # HMAC key for sensor API key hashes (defaults to SECRET_KEY)
+    API_KEY_SECRET: str | None = None
+
+    # Read replicas for public GET endpoints (comma-separated URLs, empty = primary only)
+    READ_DATABASE_URLS: str = ""
+    READ_REPLICA_STRATEGY: str = "round_robin"
+    READ_REPLICA_RETRY_SECONDS: float = 30
+    # Route a client's reads to the primary for this long after it writes (0 = off)
+    READ_YOUR_WRITES_SECONDS: float = 0
+    # Measurement shards (comma-separated URLs, shards 1..N; empty = all readings on the primary)
+    SHARD_DATABASE_URLS: str = ""
+    # Threads querying shards (or series, for per_series reads) in parallel for multi-series reads.
+    # Each holds a connection of its own, so every engine's pool overflow is raised by this many
+    SHARD_QUERY_WORKERS: int = 8
+    # Most series one per_series read of /api/measurements may ask for, most readings it may return
+    # (limit x series), and how many of its series are read at once
+    PER_SERIES_MAX_SERIES: int = 100
+    PER_SERIES_MAX_ROWS: int = 10000
+    PER_SERIES_WORKERS: int = 4
+    # Keep each series' readings of the last this many seconds in memory and answer reads inside
+    # that window from it (0 = off). Only writes made by this process are seen, so enable it only
+    # when one API process takes all writes. The total is capped at RECENT_BUFFER_MAX_READINGS (~40 bytes each)
+    RECENT_BUFFER_SECONDS: float = 0
+    RECENT_BUFFER_MAX_READINGS: int = 1_000_000
+    # Compiled statements kept per engine by SQLAlchemy
+    SQL_COMPILED_CACHE_SIZE: int = 1200
+    # With the psycopg 3 driver (postgresql+psycopg://), prepare a statement server-side after
+    # this many executions on a connection (0 = always, empty = never); psycopg2 cannot prepare
+    DB_PREPARE_THRESHOLD: int | None = 5
+
+    # Line-protocol ingest listener (disabled unless a port is set)
+    INGEST_HOST: str = "0.0.0.0"
+    INGEST_UDP_PORT: int | None = None
+    INGEST_TCP_PORT: int | None = None
+    INGEST_BATCH_SIZE: int = 500
+    INGEST_FLUSH_INTERVAL: float = 1.0
+    INGEST_QUEUE_SIZE: int = 10000
+    SENSOR_CACHE_TTL: int = 60
+    # Append every accepted sensor reading to this file for scripts/replay_traffic.py (unset = off)
+    CAPTURE_PATH: str | None = None
+
+    # Alert rules: no_data checks and event writes run every ALERT_CHECK_SECONDS, rules are reloaded every
+    # ALERT_REFRESH_SECONDS (edits through the API apply at once); events beyond the queue size are dropped
+    ALERT_CHECK_SECONDS: float = 1
+    ALERT_REFRESH_SECONDS: float = 30
+    ALERT_QUEUE_SIZE: int = 10000
+
+    # Sensor heartbeats: last_seen is flushed in batches; status thresholds in seconds
+    HEARTBEAT_FLUSH_SECONDS: float = 5
+    SENSOR_STALE_SECONDS: float = 60
+    SENSOR_OFFLINE_SECONDS: float = 300
+
+    # Token-bucket rate limits in requests/second (0 disables); buckets hold this many seconds of burst.
+    # Sensors and series can override SENSOR_RATE_LIMIT through their rate_limit column.
+    SENSOR_RATE_LIMIT: float = 5
+    READ_RATE_LIMIT: float = 20
+    RATE_LIMIT_BURST_SECONDS: float = 10
+    # Reverse proxies in front of the API that append to X-Forwarded-For (0 = use the peer address).
+    # Reads are limited per signed-in user, otherwise per client address taken from this many hops back
+    TRUSTED_PROXY_HOPS: int = 0
+
+    # Global cap on in-flight /api requests (0 disables); keep within the DB pool (5 + 10 overflow by default,
+    # plus SHARD_QUERY_WORKERS reserved for the parallel read threads)
+    MAX_CONCURRENT_REQUESTS: int = 15
+    REQUEST_QUEUE_TIMEOUT: float = 0.5
+
+    # Response compression (preference order; codecs missing at runtime are skipped)
+    COMPRESSION_ENCODINGS: str = "zstd,br,gzip"
+    COMPRESSION_MIN_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 4
+
+    # Parquet archive tier (disabled unless ARCHIVE_DIR is set): whole UTC months older than
+    # ARCHIVE_AFTER_DAYS are exported per series; ARCHIVE_PRUNE then removes them from the database
+    ARCHIVE_DIR: str | None = None
+    ARCHIVE_AFTER_DAYS: int = 90
+    ARCHIVE_PRUNE: bool = False
+
+    # Store each measurement's insert time. Set to false before running the compact-layout migration to
+    # drop the column; responses then report the reading timestamp as created_at
+    MEASUREMENT_CREATED_AT: bool = True
+
+    # Series holding more hot rows than this are deleted in the background, this many rows per transaction
+    SERIES_DELETE_CHUNK_SIZE: int = 10000
+    # Rows per statement for bulk range deletes and corrections of measurements
+    BULK_EDIT_CHUNK_SIZE: int = 10000
+    # Rows parsed, validated and loaded per transaction by CSV/Parquet imports
+    IMPORT_CHUNK_ROWS: int = 50000
+
+    # In-process maintenance scheduler. Schedules are 5-field cron expressions (UTC) or intervals like
+    # "every 10m" (s/m/h/d); an empty schedule leaves a job to manual runs (POST /api/jobs/{name}/run).
+    # With several workers, a PostgreSQL advisory lock runs each job on one of them at a time
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_MAX_CONCURRENT: int = 2
+    # Compaction and archiving rewrite or export readings, so they only run on a schedule when one is set
+    # (e.g. "15 3 * * *" and "15 4 * * *")
+    JOB_COMPACT_SCHEDULE: str = ""
+    JOB_ARCHIVE_SCHEDULE: str = ""
+    JOB_STATS_REBUILD_SCHEDULE: str = "every 10m"
+    # Only registered with SHARD_DATABASE_URLS set
+    JOB_SHARDED_STATS_REBUILD_SCHEDULE: str = "30 5 * * *"
+    JOB_PURGE_RUNS_SCHEDULE: str = "45 4 * * *"
+    JOB_RUN_RETENTION_DAYS: int = 30
+
+    # Cold tier: readings older than this are packed into compressed chunks
+    COLD_STORAGE_AFTER_DAYS: int = 30
+    COLD_CHUNK_HOURS: int = 24
 
     class Config:
         env_file = ".env"
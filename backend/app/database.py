@@ -1,14 +1,100 @@
-from sqlalchemy import create_engine
+import itertools
+import sqlite3
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+
+@event.listens_for(Engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores ON DELETE CASCADE / SET NULL unless foreign keys are switched on"""
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+def engine_options(url: str) -> dict:
+    """Statement-cache options shared by the primary and replica engines"""
+    options = {"query_cache_size": settings.SQL_COMPILED_CACHE_SIZE}
+    if make_url(url).get_backend_name() != "sqlite":
+        # Room for the parallel read threads on top of the connections MAX_CONCURRENT_REQUESTS allows
+        options["max_overflow"] = 10 + settings.SHARD_QUERY_WORKERS
+    if make_url(url).get_driver_name() == "psycopg":
+        # psycopg 3 prepares statements executed this often on a connection server-side
+        options["connect_args"] = {"prepare_threshold": settings.DB_PREPARE_THRESHOLD}
+    return options
+
+
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+READ_YOUR_WRITES_COOKIE = "last_write"
+READ_CONSISTENCY_HEADER = "x-read-consistency"
+
+
+class ReplicaSet:
+    """Read replicas with round-robin or least-connections selection.
+
+    A replica that fails to hand out a connection is skipped for
+    `retry_after` seconds; when none is usable reads go to the primary.
+    """
+
+    def __init__(self, urls: list[str], strategy: str, retry_after: float):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica strategy '{strategy}'")
+        self.engines = [create_engine(url, pool_pre_ping=True, **engine_options(url)) for url in urls]
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self.engines]
+        self._strategy = strategy
+        self._retry_after = retry_after
+        self._down_until = [0.0] * len(urls)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return bool(self.engines)
+
+    def candidates(self) -> list[int]:
+        now = time.monotonic()
+        healthy = [i for i, until in enumerate(self._down_until) if until <= now]
+        if not healthy:
+            return []
+        if self._strategy == "least_connections":
+            return sorted(healthy, key=lambda i: self.engines[i].pool.checkedout())
+        with self._lock:
+            offset = next(self._counter) % len(healthy)
+        return healthy[offset:] + healthy[:offset]
+
+    def mark_down(self, index: int):
+        self._down_until[index] = time.monotonic() + self._retry_after
+
+    def open_session(self):
+        """Session bound to a healthy replica with a connection checked out, or None"""
+        for index in self.candidates():
+            db = self._sessions[index]()
+            try:
+                db.connection()
+                return db
+            except OperationalError:
+                db.close()
+                self.mark_down(index)
+        return None
+
+
+read_replicas = ReplicaSet(
+    [url.strip() for url in settings.READ_DATABASE_URLS.split(",") if url.strip()],
+    settings.READ_REPLICA_STRATEGY,
+    settings.READ_REPLICA_RETRY_SECONDS,
+)
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +102,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def wants_primary(request: Request) -> bool:
+    """Client asked for primary reads, or wrote recently (read-your-writes)"""
+    if request.headers.get(READ_CONSISTENCY_HEADER, "").lower() == "primary":
+        return True
+    if settings.READ_YOUR_WRITES_SECONDS > 0:
+        try:
+            last_write = float(request.cookies.get(READ_YOUR_WRITES_COOKIE, "0"))
+        except ValueError:
+            return False
+        return time.time() - last_write < settings.READ_YOUR_WRITES_SECONDS
+    return False
+
+
+def open_read_session(request: Request):
+    """A replica session when configured and the request allows it, else a primary session"""
+    db = None
+    if read_replicas and not wants_primary(request):
+        db = read_replicas.open_session()
+    return db if db is not None else SessionLocal()
+
+
+def get_read_db(request: Request):
+    """Session for read-only endpoints: a replica when configured, else the primary"""
+    db = open_read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,11 +1,98 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, users, series, measurements, sensors
+from fastapi.responses import ORJSONResponse
+from app.config import settings
+from app.database import READ_YOUR_WRITES_COOKIE
+from app.models.measurement import check_layout
+from app.routers import auth, users, series, measurements, sensors, ingest, alerts, jobs
+from app.services.alerts import alert_engine
+from app.services.heartbeat import heartbeats
+from app.services.ingest_writer import batch_writer
+from app.services.line_ingest import LineIngestServer, line_ingestor
+from app.services.maintenance import register_maintenance_jobs
+from app.services.recent_buffer import recent_buffer
+from app.services.scheduler import scheduler
+from app.services.sharding import shards
+from app.services.traffic_capture import traffic_recorder
+from app.utils.compression import CompressionMiddleware
+from app.utils.rate_limit import ConcurrencyLimitMiddleware
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    for shard_engine in shards.engines:
+        check_layout(shard_engine)
+    heartbeats.start()
+    alert_engine.start()
+    # Loads the recent windows in the background; reads fall back to the database meanwhile
+    recent_buffer.start()
+    if settings.SCHEDULER_ENABLED:
+        register_maintenance_jobs(scheduler)
+        scheduler.start()
+    if settings.CAPTURE_PATH:
+        traffic_recorder.start(settings.CAPTURE_PATH)
+
+    # Optional UDP/TCP line-protocol listener sharing the event loop with the API
+    line_server = None
+    if settings.INGEST_UDP_PORT is not None or settings.INGEST_TCP_PORT is not None:
+        batch_writer.start()
+        line_server = LineIngestServer(line_ingestor)
+        await line_server.start(settings.INGEST_HOST, settings.INGEST_UDP_PORT, settings.INGEST_TCP_PORT)
+
+    yield
+
+    if line_server is not None:
+        await line_server.stop()
+    scheduler.stop()
+    batch_writer.stop()
+    heartbeats.stop()
+    alert_engine.stop()
+    recent_buffer.stop()
+    traffic_recorder.stop()
+
 
 app = FastAPI(
     title="IoT Measurement Platform API",
     description="REST API for collecting and managing IoT sensor measurements",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
+)
+
+
+async def mark_recent_writes(request: Request, call_next):
+    """Remember successful writes so this client's next reads skip the replicas"""
+    response = await call_next(request)
+    if request.method in ("POST", "PUT", "PATCH", "DELETE") and response.status_code < 400:
+        response.set_cookie(
+            READ_YOUR_WRITES_COOKIE,
+            f"{time.time():.3f}",
+            max_age=int(settings.READ_YOUR_WRITES_SECONDS) + 1,
+            httponly=True,
+            samesite="lax",
+        )
+    return response
+
+
+if settings.READ_YOUR_WRITES_SECONDS > 0:
+    app.middleware("http")(mark_recent_writes)
+
+# Shed load with 503 before requests pile up waiting for a DB connection
+if settings.MAX_CONCURRENT_REQUESTS > 0:
+    app.add_middleware(
+        ConcurrencyLimitMiddleware,
+        max_concurrent=settings.MAX_CONCURRENT_REQUESTS,
+        queue_timeout=settings.REQUEST_QUEUE_TIMEOUT,
+    )
+
+# Compress responses above the size threshold for clients that accept it
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    level=settings.COMPRESSION_LEVEL,
+    encodings=[e.strip() for e in settings.COMPRESSION_ENCODINGS.split(",") if e.strip()],
 )
 
 # CORS configuration
@@ -28,6 +115,9 @@ app.include_router(users.router)
 app.include_router(series.router)
 app.include_router(measurements.router)
 app.include_router(sensors.router)
+app.include_router(ingest.router)
+app.include_router(alerts.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -2,5 +2,14 @@ from app.models.user import User
 from app.models.series import Series
 from app.models.measurement import Measurement
 from app.models.sensor import Sensor
+from app.models.measurement_chunk import MeasurementChunk
+from app.models.measurement_archive import MeasurementArchive
+from app.models.series_stats import SeriesStats
+from app.models.alert_rule import AlertRule
+from app.models.alert_event import AlertEvent
+from app.models.job_run import JobRun
 
-__all__ = ["User", "Series", "Measurement", "Sensor"]
+__all__ = [
+    "User", "Series", "Measurement", "Sensor", "MeasurementChunk", "MeasurementArchive", "SeriesStats",
+    "AlertRule", "AlertEvent", "JobRun",
+]
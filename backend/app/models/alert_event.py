@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AlertEvent(Base):
+    """A rule starting (triggered) or stopping (resolved) to match"""
+    __tablename__ = "alert_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    rule_id = Column(Integer, ForeignKey("alert_rules.id", ondelete="CASCADE"), nullable=False)
+    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False)
+    sensor_id = Column(Integer, ForeignKey("sensors.id", ondelete="SET NULL"))
+    state = Column(String(10), nullable=False)
+    # The reading, rate, window average or silence in seconds that crossed the threshold
+    value = Column(Float, nullable=False)
+    threshold = Column(Float)
+    # Reading timestamp, or detection time for no_data rules
+    timestamp = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_alert_events_series_timestamp', 'series_id', 'timestamp'),
+        Index('ix_alert_events_rule_timestamp', 'rule_id', 'timestamp'),
+    )
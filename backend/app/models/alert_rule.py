@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class AlertRule(Base):
+    """Condition on a series' readings, evaluated in memory as readings arrive"""
+    __tablename__ = "alert_rules"
+
+    id = Column(Integer, primary_key=True)
+    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False, index=True)
+    name = Column(String(100), nullable=False)
+    # above, below, rate_of_change, average_above, average_below or no_data (see services/alerts.py)
+    kind = Column(String(20), nullable=False)
+    threshold = Column(Float)
+    window_seconds = Column(Float)
+    is_active = Column(Boolean, default=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Float, Text, DateTime, Index, UniqueConstraint
+from app.database import Base
+
+
+class JobRun(Base):
+    """One execution of a scheduled maintenance job"""
+    __tablename__ = "job_runs"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    job = Column(String(50), nullable=False)
+    # The schedule slot this run serves; unique per job so several workers cannot run the same slot
+    scheduled_for = Column(DateTime(timezone=True), nullable=False)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True))
+    duration_ms = Column(Float)
+    # running, ok or failed
+    status = Column(String(10), nullable=False)
+    # Job result summary (JSON) or the error
+    detail = Column(Text)
+    worker = Column(String(100), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('job', 'scheduled_for', name='uq_job_runs_job_slot'),
+        Index('ix_job_runs_started_at', 'started_at'),
+    )
@@ -1,18 +1,51 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, BigInteger, Float, DateTime, ForeignKey, UniqueConstraint, Index, Identity, inspect
+from sqlalchemy.orm import relationship, synonym
 from sqlalchemy.sql import func
+from app.config import settings
 from app.database import Base
 
 
 class Measurement(Base):
     __tablename__ = "measurements"
 
-    id = Column(Integer, primary_key=True, index=True)
-    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False, index=True)
-    sensor_id = Column(Integer, ForeignKey("sensors.id", ondelete="SET NULL"), nullable=True, index=True)
-    value = Column(Float, nullable=False)
+    # Columns are declared widest first (8-byte, then 4-byte) so PostgreSQL
+    # packs each row without alignment padding. SQLite only auto-assigns
+    # ids for an INTEGER PRIMARY KEY, which is 64-bit there anyway.
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
     timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    value = Column(Float, nullable=False)
+    if settings.MEASUREMENT_CREATED_AT:
+        created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    else:
+        # Not stored: the reading's own timestamp stands in for the insert time
+        created_at = synonym("timestamp")
+    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False)
+    sensor_id = Column(Integer, ForeignKey("sensors.id", ondelete="SET NULL"), nullable=True)
 
     series = relationship("Series", back_populates="measurements")
     sensor = relationship("Sensor", back_populates="measurements")
+
+    __table_args__ = (
+        # Natural key for sensor readings; also serves lookups by sensor_id
+        UniqueConstraint('sensor_id', 'timestamp', name='uq_measurements_sensor_timestamp'),
+        # Range scans of one series; also serves lookups by series_id
+        Index('ix_measurements_series_timestamp', 'series_id', 'timestamp'),
+    )
+
+
+def check_layout(bind):
+    """Fail fast if the live table disagrees with MEASUREMENT_CREATED_AT.
+
+    Migration b7e4a9c2d5f1 keeps or drops created_at by the setting at
+    upgrade time, so a process started with the other value would break on
+    every read or insert of readings.
+    """
+    inspector = inspect(bind)
+    if not inspector.has_table(Measurement.__tablename__):
+        return
+    stored = any(column["name"] == "created_at" for column in inspector.get_columns(Measurement.__tablename__))
+    if stored != settings.MEASUREMENT_CREATED_AT:
+        raise RuntimeError(
+            f"measurements on {bind.url!r} {'has' if stored else 'has no'} created_at column but "
+            f"MEASUREMENT_CREATED_AT={settings.MEASUREMENT_CREATED_AT}; set it to match the migrated table"
+        )
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class MeasurementArchive(Base):
+    """One Parquet file holding a series' readings for [start_ts, end_ts)"""
+    __tablename__ = "measurement_archives"
+
+    id = Column(Integer, primary_key=True)
+    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False)
+    start_ts = Column(DateTime(timezone=True), nullable=False)
+    end_ts = Column(DateTime(timezone=True), nullable=False)
+    # Rows in the range with a larger id arrived after export and are still read from the database
+    min_id = Column(BigInteger, nullable=False)
+    max_id = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    path = Column(String(255), nullable=False)
+    pruned = Column(Boolean, default=False, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_measurement_archives_series_range', 'series_id', 'start_ts', unique=True),
+        Index('ix_measurement_archives_id_range', 'min_id', 'max_id'),
+    )
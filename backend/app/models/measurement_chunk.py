@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, String, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class MeasurementChunk(Base):
+    __tablename__ = "measurement_chunks"
+
+    id = Column(Integer, primary_key=True)
+    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False)
+    start_ts = Column(DateTime(timezone=True), nullable=False)
+    end_ts = Column(DateTime(timezone=True), nullable=False)
+    min_id = Column(BigInteger, nullable=False)
+    max_id = Column(BigInteger, nullable=False)
+    row_count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    codec = Column(String(16), nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index('ix_measurement_chunks_series_range', 'series_id', 'start_ts', 'end_ts'),
+        Index('ix_measurement_chunks_id_range', 'min_id', 'max_id'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -10,11 +10,14 @@ class Sensor(Base):
     id = Column(Integer, primary_key=True, index=True)
     series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String(100), nullable=False)
-    api_key = Column(String(255), unique=True, nullable=False, index=True)
+    api_key_prefix = Column(String(16), nullable=False, index=True)
+    api_key_hash = Column(String(64), unique=True, nullable=False, index=True)
     is_active = Column(Boolean, default=True, nullable=False, index=True)
+    rate_limit = Column(Float)  # readings/second; falls back to the series, then SENSOR_RATE_LIMIT
     last_seen = Column(DateTime(timezone=True))
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     series = relationship("Series", back_populates="sensors")
-    measurements = relationship("Measurement", back_populates="sensor")
+    # Readings outlive their sensor; the database nulls sensor_id (ON DELETE SET NULL)
+    measurements = relationship("Measurement", back_populates="sensor", passive_deletes=True)
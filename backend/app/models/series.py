@@ -15,11 +15,18 @@ class Series(Base):
     max_value = Column(Float, nullable=False)
     color = Column(String(7), nullable=False)
     icon = Column(String(50))
+    rate_limit = Column(Float)  # default readings/second for this series' sensors
+    # Measurement database holding the readings (0 = primary, see services/sharding.py)
+    shard = Column(Integer, nullable=False, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
-    measurements = relationship("Measurement", back_populates="series", cascade="all, delete-orphan")
-    sensors = relationship("Sensor", back_populates="series", cascade="all, delete-orphan")
+    # Child rows are removed by the database (ON DELETE CASCADE) rather than loaded and deleted one by one
+    measurements = relationship("Measurement", back_populates="series", cascade="all, delete-orphan", passive_deletes=True)
+    sensors = relationship("Sensor", back_populates="series", cascade="all, delete-orphan", passive_deletes=True)
+    # Only loaded on request (joinedload), so plain series listings never touch series_stats
+    stats = relationship("SeriesStats", back_populates="series", uselist=False, lazy="noload",
+                         cascade="all, delete-orphan", passive_deletes=True)
 
     __table_args__ = (
         CheckConstraint('min_value < max_value', name='check_min_max'),
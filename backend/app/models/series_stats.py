@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, BigInteger, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class SeriesStats(Base):
+    """Running summary of a series' readings across all storage tiers"""
+    __tablename__ = "series_stats"
+
+    series_id = Column(Integer, ForeignKey("series.id", ondelete="CASCADE"), primary_key=True)
+    count = Column(BigInteger, default=0, nullable=False)
+    first_timestamp = Column(DateTime(timezone=True))
+    last_timestamp = Column(DateTime(timezone=True))
+    min_value = Column(Float)
+    max_value = Column(Float)
+    last_value = Column(Float)
+    # Set when a delete or edit may have removed an extreme; cleared by a rebuild
+    stale = Column(Boolean, default=False, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    series = relationship("Series", back_populates="stats")
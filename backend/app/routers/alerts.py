@@ -0,0 +1,140 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from datetime import datetime
+from app.database import get_db
+from app.models.alert_event import AlertEvent
+from app.models.alert_rule import AlertRule
+from app.models.series import Series
+from app.models.user import User
+from app.schemas.alert import AlertRuleCreate, AlertRuleUpdate, AlertRuleResponse, AlertEventResponse
+from app.services.alerts import alert_engine, rule_problem
+from app.utils.dependencies import get_current_user, get_current_admin
+
+router = APIRouter(prefix="/api/alerts", tags=["Alerts"])
+
+
+def _rule_response(rule: AlertRule) -> AlertRuleResponse:
+    return AlertRuleResponse.model_validate(rule).model_copy(update={"firing": alert_engine.is_firing(rule.id)})
+
+
+def _check_rule(kind: str, threshold: float | None, window_seconds: float | None):
+    problem = rule_problem(kind, threshold, window_seconds)
+    if problem:
+        raise HTTPException(status_code=400, detail=problem)
+
+
+@router.get("/rules", response_model=List[AlertRuleResponse])
+def get_alert_rules(
+    series_id: Optional[int] = Query(None, description="Only rules on this series"),
+    firing: Optional[bool] = Query(None, description="Only rules that are (or are not) currently firing"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """List alert rules with their current state"""
+    query = db.query(AlertRule)
+    if series_id is not None:
+        query = query.filter(AlertRule.series_id == series_id)
+    rules = [_rule_response(rule) for rule in query.order_by(AlertRule.id).all()]
+    if firing is not None:
+        rules = [rule for rule in rules if rule.firing == firing]
+    return rules
+
+
+@router.get("/rules/{rule_id}", response_model=AlertRuleResponse)
+def get_alert_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get an alert rule with its current state"""
+    rule = db.get(AlertRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+    return _rule_response(rule)
+
+
+@router.post("/rules", response_model=AlertRuleResponse, status_code=status.HTTP_201_CREATED)
+def create_alert_rule(
+    rule_data: AlertRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Create an alert rule; it applies to readings accepted from now on (admin only)"""
+    if not db.query(Series.id).filter(Series.id == rule_data.series_id).first():
+        raise HTTPException(status_code=404, detail="Series not found")
+    _check_rule(rule_data.kind, rule_data.threshold, rule_data.window_seconds)
+
+    rule = AlertRule(**rule_data.model_dump())
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    alert_engine.refresh()
+    return _rule_response(rule)
+
+
+@router.patch("/rules/{rule_id}", response_model=AlertRuleResponse)
+def update_alert_rule(
+    rule_id: int,
+    rule_data: AlertRuleUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Update an alert rule; changing its condition resets its state (admin only)"""
+    rule = db.get(AlertRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+
+    update_data = rule_data.model_dump(exclude_unset=True)
+    merged = {key: update_data.get(key, getattr(rule, key)) for key in ("kind", "threshold", "window_seconds")}
+    _check_rule(**merged)
+    for key, value in update_data.items():
+        setattr(rule, key, value)
+
+    db.commit()
+    db.refresh(rule)
+    alert_engine.refresh()
+    return _rule_response(rule)
+
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_alert_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Delete an alert rule and its events (admin only)"""
+    rule = db.get(AlertRule, rule_id)
+    if not rule:
+        raise HTTPException(status_code=404, detail="Alert rule not found")
+
+    db.delete(rule)
+    db.commit()
+    alert_engine.refresh()
+    return None
+
+
+@router.get("/events", response_model=List[AlertEventResponse])
+def get_alert_events(
+    series_id: Optional[int] = Query(None, description="Only events of this series"),
+    rule_id: Optional[int] = Query(None, description="Only events of this rule"),
+    state: Optional[str] = Query(None, description="triggered or resolved"),
+    start_date: Optional[datetime] = Query(None, description="Start date filter"),
+    end_date: Optional[datetime] = Query(None, description="End date filter"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Alert events, newest first"""
+    query = db.query(AlertEvent)
+    if series_id is not None:
+        query = query.filter(AlertEvent.series_id == series_id)
+    if rule_id is not None:
+        query = query.filter(AlertEvent.rule_id == rule_id)
+    if state is not None:
+        query = query.filter(AlertEvent.state == state)
+    if start_date:
+        query = query.filter(AlertEvent.timestamp >= start_date)
+    if end_date:
+        query = query.filter(AlertEvent.timestamp <= end_date)
+    return query.order_by(AlertEvent.timestamp.desc(), AlertEvent.id.desc()).limit(limit).all()
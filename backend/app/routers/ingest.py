@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from app.models.user import User
+from app.services.alerts import alert_engine
+from app.services.ingest_writer import batch_writer
+from app.services.line_ingest import line_ingestor
+from app.services.recent_buffer import recent_buffer
+from app.services.traffic_capture import traffic_recorder
+from app.utils.dependencies import get_current_admin
+from app.utils.rate_limit import sensor_limiter, read_limiter
+
+router = APIRouter(prefix="/api/ingest", tags=["Ingest"])
+
+
+@router.get("/stats")
+def get_ingest_stats(current_user: User = Depends(get_current_admin)):
+    """Line-protocol listener, batch writer, rate limiter, capture, alert and recent-buffer counters (admin only)"""
+    return {
+        "listener": dict(line_ingestor.counters),
+        "writer": batch_writer.snapshot(),
+        "rate_limits": {"sensors": sensor_limiter.snapshot(), "reads": read_limiter.snapshot()},
+        "capture": traffic_recorder.snapshot(),
+        "alerts": alert_engine.snapshot(),
+        "recent_buffer": recent_buffer.snapshot(),
+    }
@@ -0,0 +1,73 @@
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.models.job_run import JobRun
+from app.models.user import User
+from app.schemas.job import JobResponse, JobRunResponse, JobMetrics
+from app.services.scheduler import scheduler
+from app.utils.dependencies import get_current_admin
+
+router = APIRouter(prefix="/api/jobs", tags=["Jobs"])
+
+
+@router.get("", response_model=List[JobResponse])
+def get_jobs(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Scheduled maintenance jobs with their next and last runs (admin only)"""
+    latest = db.query(JobRun.job, func.max(JobRun.id).label("id")).group_by(JobRun.job).subquery()
+    last_runs = {run.job: run for run in db.query(JobRun).join(latest, JobRun.id == latest.c.id).all()}
+
+    jobs = []
+    for job in scheduler.jobs:
+        metrics = job.metrics
+        jobs.append(JobResponse(
+            name=job.name,
+            description=job.description,
+            schedule=str(job.schedule) if job.schedule is not None else None,
+            next_run=job.next_run,
+            running=job.running,
+            metrics=JobMetrics(
+                runs=metrics["runs"],
+                failures=metrics["failures"],
+                skipped=metrics["skipped"],
+                last_duration_ms=metrics["last_duration_ms"],
+                max_duration_ms=metrics["max_duration_ms"],
+                avg_duration_ms=metrics["total_duration_ms"] / metrics["runs"] if metrics["runs"] else None,
+            ),
+            last_run=last_runs.get(job.name),
+        ))
+    return jobs
+
+
+@router.get("/runs", response_model=List[JobRunResponse])
+def get_job_runs(
+    job: Optional[str] = Query(None, description="Only runs of this job"),
+    status_filter: Optional[str] = Query(None, alias="status", description="running, ok or failed"),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Job runs from every worker, newest first (admin only)"""
+    query = db.query(JobRun)
+    if job is not None:
+        query = query.filter(JobRun.job == job)
+    if status_filter is not None:
+        query = query.filter(JobRun.status == status_filter)
+    return query.order_by(JobRun.started_at.desc(), JobRun.id.desc()).limit(limit).all()
+
+
+@router.post("/{name}/run", status_code=status.HTTP_202_ACCEPTED)
+def run_job(
+    name: str,
+    current_user: User = Depends(get_current_admin)
+):
+    """Run a job now, outside its schedule (admin only)"""
+    if scheduler.get(name) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not scheduler.run_now(name):
+        raise HTTPException(status_code=409, detail="Job is already running or the scheduler is stopped")
+    return {"job": name, "queued": True}
@@ -1,48 +1,154 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from pydantic import TypeAdapter
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
-from app.database import get_db
+import numpy as np
+from app.config import settings
+from app.database import get_db, get_read_db, open_read_session
 from app.models.measurement import Measurement
 from app.models.series import Series
 from app.models.user import User
-from app.schemas.measurement import MeasurementCreate, MeasurementUpdate, MeasurementResponse
+from app.schemas.measurement import (
+    MeasurementCreate, MeasurementUpdate, MeasurementResponse, ResampledResponse,
+    MeasurementBulkUpdate, BulkEditResponse, ImportReportResponse
+)
+from app.services import archive, series_stats
+from app.services.bulk_edit import RangeFilter, value_bounds, delete_range, correct_range
+from app.services.bulk_import import import_file, ImportFormatError
+from app.services.chunk_codec import to_us, from_us
+from app.services.cold_storage import thaw_measurement
+from app.services.recent_buffer import recent_buffer
+from app.services.resample import BucketAccumulator, FILL_POLICIES, fill as fill_gaps
+from app.services.sharding import shards, get_series_db, get_measurement_db, get_measurement_read_db
+from app.services.timeseries import iter_measurements, iter_column_blocks, find_cold_measurement, merge_streams
 from app.utils.dependencies import get_current_user, get_current_admin
+from app.utils.rate_limit import limit_reads
 
 router = APIRouter(prefix="/api/measurements", tags=["Measurements"])
 
+# Serialises straight to JSON bytes in pydantic-core, skipping the dict round trip
+measurement_list_adapter = TypeAdapter(List[MeasurementResponse])
 
-@router.get("", response_model=List[MeasurementResponse])
+ARCHIVED_DETAIL = "Measurements in archived months are read-only"
+DUPLICATE_DETAIL = "The sensor already has a measurement at this timestamp"
+
+
+@router.get("", response_model=List[MeasurementResponse], dependencies=[Depends(limit_reads)])
 def get_measurements(
+    request: Request,
     series_ids: Optional[str] = Query(None, description="Comma-separated series IDs"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
     end_date: Optional[datetime] = Query(None, description="End date filter"),
     limit: int = Query(1000, le=10000),
-    db: Session = Depends(get_db)
+    per_series: bool = Query(False, description="Apply limit to each series, reading the series in parallel"),
+    db: Session = Depends(get_read_db)
 ):
-    """Get measurements with optional filters (public endpoint)"""
-    query = db.query(Measurement)
+    """Get measurements with optional filters (public endpoint).
 
+    By default `limit` caps the whole result, so a busy series can crowd out
+    the others. With `per_series=true` each listed series is read on its own
+    (up to `limit` readings, `limit` x series at most PER_SERIES_MAX_ROWS)
+    and the results are merged by timestamp.
+    Reads starting inside the recent window are answered from memory when
+    RECENT_BUFFER_SECONDS is set.
+    """
     # Filter by series IDs
+    series_id_list = None
     if series_ids:
-        series_id_list = [int(sid) for sid in series_ids.split(',')]
-        query = query.filter(Measurement.series_id.in_(series_id_list))
+        series_id_list = list(dict.fromkeys(int(sid) for sid in series_ids.split(',')))
+
+    if per_series:
+        if series_id_list is None:
+            raise HTTPException(status_code=400, detail="per_series requires series_ids")
+        if len(series_id_list) > settings.PER_SERIES_MAX_SERIES:
+            raise HTTPException(status_code=400,
+                                detail=f"per_series reads at most {settings.PER_SERIES_MAX_SERIES} series")
+        if limit * len(series_id_list) > settings.PER_SERIES_MAX_ROWS:
+            raise HTTPException(status_code=400,
+                                detail=f"per_series returns at most {settings.PER_SERIES_MAX_ROWS} readings; "
+                                       f"lower limit to {settings.PER_SERIES_MAX_ROWS // len(series_id_list)}")
+
+    # Recent readings held in memory answer dashboard reads without a query
+    measurements = None
+    if series_id_list:
+        measurements = recent_buffer.read(series_id_list, start_date, end_date, limit, per_series)
+    if measurements is None and per_series and len(series_id_list) > 1:
+        # One bounded (series_id, timestamp) index scan per series, merged lazily
+        parts = shards.fan_out(
+            lambda series_db, series_id: list(iter_measurements(series_db, [series_id], start_date, end_date, limit)),
+            series_id_list, lambda: open_read_session(request), settings.PER_SERIES_WORKERS,
+        )
+        measurements = list(merge_streams(parts))
+    elif measurements is None:
+        # Hot rows and cold chunks, ordered by timestamp and limited. Each shard returns its
+        # first `limit` rows, so merging those yields the overall first `limit`.
+        parts = shards.scatter(
+            lambda shard_db, ids: list(iter_measurements(shard_db, ids, start_date, end_date, limit)),
+            shards.group(series_id_list), db,
+        )
+        measurements = parts[0] if len(parts) == 1 else list(merge_streams(parts, limit))
+    validated = measurement_list_adapter.validate_python(measurements, from_attributes=True)
+    return Response(content=measurement_list_adapter.dump_json(validated), media_type="application/json")
+
+
+@router.get("/resample", response_model=ResampledResponse, dependencies=[Depends(limit_reads)])
+def resample_measurements(
+    series_ids: str = Query(..., description="Comma-separated series IDs"),
+    start_date: datetime = Query(..., description="Grid start"),
+    end_date: datetime = Query(..., description="Grid end"),
+    step: float = Query(60, gt=0, description="Grid step in seconds"),
+    fill: str = Query("none", description="Empty bucket policy: none, previous or linear"),
+    db: Session = Depends(get_read_db)
+):
+    """Resample several series onto a common time grid (public endpoint)"""
+    if fill not in FILL_POLICIES:
+        raise HTTPException(status_code=400, detail=f"fill must be one of: {', '.join(FILL_POLICIES)}")
+
+    series_id_list = [int(sid) for sid in series_ids.split(',')]
+    found = {sid for (sid,) in db.query(Series.id).filter(Series.id.in_(series_id_list)).all()}
+    missing = [sid for sid in series_id_list if sid not in found]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Series not found: {missing}")
+
+    start_us = to_us(start_date)
+    step_us = int(step * 1_000_000)
+    size = -(-(to_us(end_date) - start_us) // step_us)
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="end_date must be after start_date")
+    if size > 10000:
+        raise HTTPException(status_code=400, detail=f"Grid has {size} points; increase step (max 10000 points)")
 
-    # Filter by date range
-    if start_date:
-        query = query.filter(Measurement.timestamp >= start_date)
-    if end_date:
-        query = query.filter(Measurement.timestamp <= end_date)
+    def resample(shard_db: Session, ids: list[int]) -> dict[int, np.ndarray]:
+        columns = {}
+        for series_id in ids:
+            buckets = BucketAccumulator(start_us, step_us, size)
+            for timestamps, values in iter_column_blocks(shard_db, series_id, start_date, end_date):
+                buckets.update(timestamps, values)
+            columns[series_id] = fill_gaps(buckets.means(), fill)
+        return columns
 
-    # Order by timestamp and limit
-    measurements = query.order_by(Measurement.timestamp.asc()).limit(limit).all()
-    return measurements
+    columns = {}
+    for part in shards.scatter(resample, shards.group(series_id_list), db):
+        columns.update(part)
+    matrix = np.column_stack([columns[series_id] for series_id in series_id_list])
+    values = np.where(np.isnan(matrix), None, matrix).tolist()
+    return ResampledResponse(
+        step_seconds=step,
+        fill=fill,
+        series_ids=series_id_list,
+        timestamps=[from_us(start_us + k * step_us) for k in range(size)],
+        values=values,
+    )
 
 
-@router.get("/{measurement_id}", response_model=MeasurementResponse)
-def get_measurement(measurement_id: int, db: Session = Depends(get_db)):
+@router.get("/{measurement_id}", response_model=MeasurementResponse, dependencies=[Depends(limit_reads)])
+def get_measurement(measurement_id: int, db: Session = Depends(get_measurement_read_db)):
     """Get a specific measurement by ID (public endpoint)"""
-    measurement = db.query(Measurement).filter(Measurement.id == measurement_id).first()
+    measurement = db.get(Measurement, measurement_id)
+    if not measurement:
+        measurement = find_cold_measurement(db, measurement_id)
     if not measurement:
         raise HTTPException(status_code=404, detail="Measurement not found")
     return measurement
@@ -56,7 +162,7 @@ def create_measurement(
 ):
     """Create a new measurement (admin only)"""
     # Check if series exists
-    series = db.query(Series).filter(Series.id == measurement_data.series_id).first()
+    series = db.get(Series, measurement_data.series_id)
     if not series:
         raise HTTPException(status_code=404, detail="Series not found")
 
@@ -67,54 +173,175 @@ def create_measurement(
             detail=f"Value {measurement_data.value} is outside the acceptable range [{series.min_value}, {series.max_value}] for series '{series.name}'"
         )
 
-    new_measurement = Measurement(**measurement_data.model_dump())
-    db.add(new_measurement)
-    db.commit()
-    db.refresh(new_measurement)
+    with shards.series_session(series.id, db) as series_db:
+        new_measurement = Measurement(**measurement_data.model_dump())
+        series_db.add(new_measurement)
+        series_stats.apply(series_db, series_stats.collect([
+            (measurement_data.series_id, measurement_data.value, measurement_data.timestamp)
+        ]))
+        try:
+            series_db.commit()
+        except IntegrityError:
+            series_db.rollback()
+            raise HTTPException(status_code=409, detail=DUPLICATE_DETAIL)
+        series_db.refresh(new_measurement)
+    recent_buffer.record([new_measurement])
     return new_measurement
 
 
+@router.post("/import", response_model=ImportReportResponse)
+def import_measurements(
+    file: UploadFile = File(..., description="CSV (optionally .csv.gz) or Parquet file"),
+    format: Optional[str] = Query(None, description="csv or parquet (default: from the file name)"),
+    series_id: Optional[int] = Query(None, description="Series for files without a series_id column"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Bulk-load historical measurements from a file (admin only).
+
+    Rows are validated against their series range; invalid rows are skipped
+    and listed in the report, and readings already stored are counted as
+    duplicates.
+    """
+    try:
+        report = import_file(db, file.file, file.filename, format, series_id, settings.IMPORT_CHUNK_ROWS)
+    except ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return report
+
+
+@router.delete("", response_model=BulkEditResponse)
+def delete_measurements_range(
+    series_id: int = Query(..., description="Series to delete from"),
+    start_date: datetime = Query(..., description="Start of the range (inclusive)"),
+    end_date: datetime = Query(..., description="End of the range (inclusive)"),
+    min_value: Optional[float] = Query(None, description="Only readings with value >= min_value"),
+    max_value: Optional[float] = Query(None, description="Only readings with value <= max_value"),
+    db: Session = Depends(get_series_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Delete all readings of a series in a time range, optionally within a value band (admin only)"""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date must not be before start_date")
+    if not db.query(Series.id).filter(Series.id == series_id).first():
+        raise HTTPException(status_code=404, detail="Series not found")
+
+    if archive.partitions_for(db, [series_id], start_date, end_date):
+        raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
+
+    flt = RangeFilter(series_id, start_date, end_date, min_value, max_value)
+    affected = delete_range(db, flt, settings.BULK_EDIT_CHUNK_SIZE)
+    recent_buffer.invalidate(series_id)
+    return BulkEditResponse(affected=affected)
+
+
+@router.patch("", response_model=BulkEditResponse)
+def correct_measurements_range(
+    correction: MeasurementBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Set or rescale the value of all readings of a series in a time range (admin only)"""
+    series = db.get(Series, correction.series_id)
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+    with shards.series_session(series.id, db) as series_db:
+        if archive.partitions_for(series_db, [series.id], correction.start_date, correction.end_date):
+            raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
+
+        flt = RangeFilter(series.id, correction.start_date, correction.end_date,
+                          correction.min_value, correction.max_value)
+        if correction.value is not None:
+            scale, offset = 0.0, correction.value
+        else:
+            scale, offset = correction.scale, correction.offset
+
+        # The correction is linear, so checking the extremes covers every row
+        low, high = value_bounds(series_db, flt)
+        if low is None:
+            return BulkEditResponse(affected=0)
+        new_low, new_high = sorted((low * scale + offset, high * scale + offset))
+        if new_low < series.min_value or new_high > series.max_value:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Corrected values [{new_low}, {new_high}] fall outside the acceptable range [{series.min_value}, {series.max_value}]"
+            )
+
+        affected = correct_range(series_db, flt, scale, offset, settings.BULK_EDIT_CHUNK_SIZE, (low, high))
+    recent_buffer.invalidate(series.id)
+    return BulkEditResponse(affected=affected)
+
+
 @router.put("/{measurement_id}", response_model=MeasurementResponse)
 def update_measurement(
     measurement_id: int,
     measurement_data: MeasurementUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_measurement_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Update a measurement (admin only)"""
-    measurement = db.query(Measurement).filter(Measurement.id == measurement_id).first()
+    measurement = db.get(Measurement, measurement_id)
+    # Rows in the cold tier are moved back to the hot table before editing
+    if not measurement and thaw_measurement(db, measurement_id):
+        measurement = db.get(Measurement, measurement_id)
     if not measurement:
+        if archive.find_measurement(db, measurement_id) is not None:
+            raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
         raise HTTPException(status_code=404, detail="Measurement not found")
+    if archive.is_archived(db, measurement.series_id, measurement.timestamp, measurement.id):
+        raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
 
     # If updating value, validate against series range
     if measurement_data.value is not None:
-        series = db.query(Series).filter(Series.id == measurement.series_id).first()
+        series = db.get(Series, measurement.series_id)
         if measurement_data.value < series.min_value or measurement_data.value > series.max_value:
             raise HTTPException(
                 status_code=400,
                 detail=f"Value {measurement_data.value} is outside the acceptable range [{series.min_value}, {series.max_value}]"
             )
 
+    old_value, old_timestamp = measurement.value, measurement.timestamp
     update_data = measurement_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(measurement, key, value)
 
-    db.commit()
+    # An edit is the old reading leaving the summary and the new one entering it
+    if update_data:
+        series_stats.note_removed(db, measurement.series_id, 1, old_value, old_value, old_timestamp, old_timestamp)
+        series_stats.apply(db, series_stats.collect([(measurement.series_id, measurement.value, measurement.timestamp)]))
+    # Moving a sensor's reading onto a timestamp it already has breaks (sensor_id, timestamp)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=DUPLICATE_DETAIL)
     db.refresh(measurement)
+    recent_buffer.replace(measurement)
     return measurement
 
 
 @router.delete("/{measurement_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_measurement(
     measurement_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_measurement_db),
     current_user: User = Depends(get_current_admin)
 ):
     """Delete a measurement (admin only)"""
-    measurement = db.query(Measurement).filter(Measurement.id == measurement_id).first()
+    measurement = db.get(Measurement, measurement_id)
+    # Rows in the cold tier are moved back to the hot table before editing
+    if not measurement and thaw_measurement(db, measurement_id):
+        measurement = db.get(Measurement, measurement_id)
     if not measurement:
+        if archive.find_measurement(db, measurement_id) is not None:
+            raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
         raise HTTPException(status_code=404, detail="Measurement not found")
+    if archive.is_archived(db, measurement.series_id, measurement.timestamp, measurement.id):
+        raise HTTPException(status_code=409, detail=ARCHIVED_DETAIL)
 
+    series_id = measurement.series_id
     db.delete(measurement)
+    series_stats.note_removed(db, series_id, 1, measurement.value, measurement.value,
+                              measurement.timestamp, measurement.timestamp)
     db.commit()
+    recent_buffer.remove(series_id, measurement_id)
     return None
@@ -1,19 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from sqlalchemy import select, update, bindparam
 from sqlalchemy.orm import Session
 from typing import List
-from datetime import datetime
+from datetime import datetime, timezone
 import secrets
 from app.database import get_db
 from app.models.sensor import Sensor
 from app.models.series import Series
 from app.models.measurement import Measurement
 from app.models.user import User
-from app.schemas.sensor import SensorCreate, SensorUpdate, SensorResponse, SensorWithKey
-from app.schemas.measurement import MeasurementCreate, MeasurementResponse
+from app.schemas.sensor import SensorCreate, SensorUpdate, SensorResponse, SensorWithKey, SensorStatusResponse
+from app.schemas.measurement import MeasurementCreate, SensorMeasurementResponse
+from app.services import archive, series_stats
+from app.services.alerts import alert_engine
+from app.services.chunk_codec import from_us, to_us
+from app.services.cold_storage import may_be_packed, packed_readings
+from app.services.heartbeat import heartbeats, sensor_status
+from app.services.recent_buffer import recent_buffer
+from app.services.sensor_cache import sensor_cache
+from app.services.sharding import shards
+from app.services.traffic_capture import traffic_recorder
 from app.utils.dependencies import get_current_admin
+from app.utils.rate_limit import sensor_limiter, too_many_requests
+from app.utils.security import api_key_prefix, hash_api_key
+from app.utils.sql import dialect_insert, per_dialect, precompiled
 
 router = APIRouter(prefix="/api/sensors", tags=["Sensors"])
 
+# Ingest statements are built once and reused, so each reading only binds parameters
+_EXISTING_READING = select(Measurement).where(
+    Measurement.sensor_id == bindparam("sensor_id"),
+    Measurement.timestamp == bindparam("timestamp"),
+)
+
+
+@per_dialect
+def _insert_reading(bind):
+    stmt = dialect_insert(bind, Measurement).on_conflict_do_nothing(
+        index_elements=["sensor_id", "timestamp"]
+    ).returning(Measurement)
+    return select(Measurement).from_statement(
+        precompiled(bind, stmt, ["series_id", "sensor_id", "value", "timestamp"])
+    )
+
 
 @router.get("", response_model=List[SensorResponse])
 def get_all_sensors(
@@ -25,6 +54,34 @@ def get_all_sensors(
     return sensors
 
 
+@router.get("/status", response_model=List[SensorStatusResponse])
+def get_sensors_status(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Online/stale/offline status of every sensor from heartbeats (admin only)"""
+    now = datetime.now(timezone.utc)
+    rows = db.query(Sensor.id, Sensor.name, Sensor.series_id, Sensor.is_active, Sensor.last_seen).all()
+
+    statuses = []
+    for sensor_id, name, series_id, is_active, stored in rows:
+        # Heartbeats seen by this worker may be newer than the last flush
+        candidates = [t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+                      for t in (heartbeats.last_seen(sensor_id), stored) if t is not None]
+        last_seen = max(candidates) if candidates else None
+        status_name, age = sensor_status(last_seen, now)
+        statuses.append(SensorStatusResponse(
+            id=sensor_id,
+            name=name,
+            series_id=series_id,
+            is_active=is_active,
+            status=status_name,
+            last_seen=last_seen,
+            seconds_since_seen=age,
+        ))
+    return statuses
+
+
 @router.get("/{sensor_id}", response_model=SensorResponse)
 def get_sensor(
     sensor_id: int,
@@ -32,7 +89,7 @@ def get_sensor(
     current_user: User = Depends(get_current_admin)
 ):
     """Get a specific sensor (admin only)"""
-    sensor = db.query(Sensor).filter(Sensor.id == sensor_id).first()
+    sensor = db.get(Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
     return sensor
@@ -46,7 +103,7 @@ def create_sensor(
 ):
     """Create a new sensor and return API key (admin only)"""
     # Check if series exists
-    series = db.query(Series).filter(Series.id == sensor_data.series_id).first()
+    series = db.get(Series, sensor_data.series_id)
     if not series:
         raise HTTPException(status_code=404, detail="Series not found")
 
@@ -56,19 +113,24 @@ def create_sensor(
     new_sensor = Sensor(
         name=sensor_data.name,
         series_id=sensor_data.series_id,
-        api_key=api_key,
+        api_key_prefix=api_key_prefix(api_key),
+        api_key_hash=hash_api_key(api_key),
         is_active=True
     )
     db.add(new_sensor)
     db.commit()
     db.refresh(new_sensor)
+    # Drop a cached "unknown sensor" entry for this id
+    sensor_cache.invalidate(new_sensor.id)
 
     # Return sensor with API key (only shown once!)
     return SensorWithKey(
         id=new_sensor.id,
         name=new_sensor.name,
         series_id=new_sensor.series_id,
+        api_key_prefix=new_sensor.api_key_prefix,
         is_active=new_sensor.is_active,
+        rate_limit=new_sensor.rate_limit,
         last_seen=new_sensor.last_seen,
         created_at=new_sensor.created_at,
         api_key=api_key
@@ -83,7 +145,7 @@ def update_sensor(
     current_user: User = Depends(get_current_admin)
 ):
     """Update sensor (admin only)"""
-    sensor = db.query(Sensor).filter(Sensor.id == sensor_id).first()
+    sensor = db.get(Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
 
@@ -93,6 +155,7 @@ def update_sensor(
 
     db.commit()
     db.refresh(sensor)
+    sensor_cache.invalidate(sensor_id)
     return sensor
 
 
@@ -103,31 +166,54 @@ def delete_sensor(
     current_user: User = Depends(get_current_admin)
 ):
     """Delete a sensor (admin only)"""
-    sensor = db.query(Sensor).filter(Sensor.id == sensor_id).first()
+    sensor = db.get(Sensor, sensor_id)
     if not sensor:
         raise HTTPException(status_code=404, detail="Sensor not found")
 
+    series_id = sensor.series_id
     db.delete(sensor)
     db.commit()
+    if shards.shard_of(series_id):
+        # No foreign key on the shard sets its readings' sensor to NULL
+        with shards.series_session(series_id) as shard_db:
+            shard_db.execute(update(Measurement).where(Measurement.sensor_id == sensor_id).values(sensor_id=None))
+            shard_db.commit()
+    # Buffered readings still name the sensor
+    recent_buffer.invalidate(series_id)
+    sensor_cache.invalidate(sensor_id)
+    sensor_limiter.reset(sensor_id)
+    heartbeats.forget(sensor_id)
     return None
 
 
+def _sensor_shard_db(sensor_id: int):
+    """Session on the shard of the sensor's series (the primary for unknown sensors)"""
+    sensor = sensor_cache.get(sensor_id)
+    db = shards.session(shards.shard_of(sensor.series_id) if sensor else 0)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
 # Sensor data submission endpoint (authenticated via API key)
-@router.post("/{sensor_id}/measurements", response_model=MeasurementResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/{sensor_id}/measurements", response_model=SensorMeasurementResponse, status_code=status.HTTP_201_CREATED)
 def submit_sensor_data(
     sensor_id: int,
     measurement_data: MeasurementCreate,
+    response: Response,
     x_api_key: str = Header(..., alias="X-API-Key"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(_sensor_shard_db)
 ):
-    """Submit measurement data from a sensor (authenticated via API key)"""
-    # Verify sensor exists and API key matches
-    sensor = db.query(Sensor).filter(
-        Sensor.id == sensor_id,
-        Sensor.api_key == x_api_key
-    ).first()
+    """Submit measurement data from a sensor (authenticated via API key).
 
-    if not sensor:
+    Idempotent per (sensor, timestamp): a retried reading returns the stored
+    row with `duplicate: true` and status 200 instead of creating a new one.
+    """
+    # Verify sensor exists and API key matches (cached, so no per-reading queries)
+    sensor = sensor_cache.get(sensor_id)
+
+    if not sensor or not sensor_cache.verify_key(sensor, x_api_key):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid sensor ID or API key"
@@ -137,6 +223,11 @@ def submit_sensor_data(
     if not sensor.is_active:
         raise HTTPException(status_code=403, detail="Sensor is disabled")
 
+    # Per-sensor token bucket, checked before any database work
+    retry_after = sensor_limiter.acquire(sensor_id, sensor.rate_limit)
+    if retry_after:
+        raise too_many_requests(retry_after, "Sensor rate limit exceeded")
+
     # Verify series_id matches sensor's series
     if measurement_data.series_id != sensor.series_id:
         raise HTTPException(
@@ -144,26 +235,51 @@ def submit_sensor_data(
             detail=f"Sensor is registered for series {sensor.series_id}, cannot submit to series {measurement_data.series_id}"
         )
 
-    # Get series and validate value range
-    series = db.query(Series).filter(Series.id == sensor.series_id).first()
-    if measurement_data.value < series.min_value or measurement_data.value > series.max_value:
+    # Validate value range against the series limits
+    if measurement_data.value < sensor.min_value or measurement_data.value > sensor.max_value:
         raise HTTPException(
             status_code=400,
-            detail=f"Value {measurement_data.value} is outside the acceptable range [{series.min_value}, {series.max_value}]"
+            detail=f"Value {measurement_data.value} is outside the acceptable range [{sensor.min_value}, {sensor.max_value}]"
         )
 
-    # Create measurement with sensor_id
-    new_measurement = Measurement(
-        series_id=measurement_data.series_id,
-        sensor_id=sensor_id,
-        value=measurement_data.value,
-        timestamp=measurement_data.timestamp
-    )
-    db.add(new_measurement)
+    # Insert unless this sensor already reported this timestamp
+    reading = {
+        "series_id": measurement_data.series_id,
+        "sensor_id": sensor_id,
+        "value": measurement_data.value,
+        "timestamp": measurement_data.timestamp,
+    }
+    # Packed and archived readings are outside the unique constraint, so old retries are checked
+    # against the chunks and the archive files
+    timestamp, key = measurement_data.timestamp, (sensor_id, to_us(measurement_data.timestamp))
+    packed = None
+    if may_be_packed(timestamp):
+        packed = packed_readings(db, sensor.series_id, timestamp, timestamp).get(key)
+    if packed is None and archive.may_be_archived(timestamp):
+        packed = archive.archived_readings(db, sensor.series_id, timestamp, timestamp).get(key)
+    row = None
+    if packed is None:
+        row = db.scalars(_insert_reading(db.get_bind()), reading).first()
+        if row is not None:
+            series_stats.apply(db, series_stats.collect([(row.series_id, row.value, row.timestamp)]))
+        db.commit()
+        if row is not None:
+            recent_buffer.record([row])
 
-    # Update sensor's last_seen timestamp
-    sensor.last_seen = datetime.utcnow()
+    # last_seen is written back in batches by the heartbeat tracker
+    heartbeats.beat(sensor_id)
+    traffic_recorder.record(sensor_id, sensor.series_id, measurement_data.value, measurement_data.timestamp, "http")
 
-    db.commit()
-    db.refresh(new_measurement)
-    return new_measurement
+    if row is not None:
+        alert_engine.observe(sensor.series_id, sensor_id, measurement_data.value, measurement_data.timestamp)
+        return SensorMeasurementResponse.model_validate(row)
+
+    response.status_code = status.HTTP_200_OK
+    if packed is not None:
+        packed_id, packed_value, packed_created = packed
+        return SensorMeasurementResponse(
+            id=packed_id, series_id=sensor.series_id, sensor_id=sensor_id, value=packed_value,
+            timestamp=measurement_data.timestamp, created_at=from_us(packed_created), duplicate=True,
+        )
+    existing = db.scalars(_EXISTING_READING, reading).first()
+    return SensorMeasurementResponse.model_validate(existing).model_copy(update={"duplicate": True})
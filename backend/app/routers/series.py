@@ -1,31 +1,166 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from app.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session, joinedload
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from app.config import settings
+from app.database import get_db, get_read_db
 from app.models.series import Series
+from app.models.sensor import Sensor
+from app.models.series_stats import SeriesStats
 from app.models.user import User
-from app.schemas.series import SeriesCreate, SeriesUpdate, SeriesResponse
+from app.schemas.series import (
+    SeriesCreate, SeriesUpdate, SeriesResponse, SeriesStatsResponse, SeriesDeletionResponse,
+    UptimeResponse, Gap, DailyUptime,
+)
+from app.services import archive
+from app.services.alerts import alert_engine
+from app.services.chunk_codec import from_us
+from app.services.recent_buffer import recent_buffer
+from app.services.sensor_cache import sensor_cache
+from app.services.series_deletion import series_deletions
+from app.services.sharding import SHARDED_MODELS, shards, get_series_read_db
+from app.services.stats import StreamingStats
+from app.services.timeseries import iter_column_blocks
+from app.services.uptime import uptime_report
 from app.utils.dependencies import get_current_user, get_current_admin
+from app.utils.rate_limit import limit_reads
 
 router = APIRouter(prefix="/api/series", tags=["Series"])
 
+INCLUDE_OPTIONS = ("stats",)
 
-@router.get("", response_model=List[SeriesResponse])
-def get_all_series(db: Session = Depends(get_db)):
+
+def _series_query(db: Session, include: Optional[str]):
+    requested = {part.strip() for part in (include or "").split(",") if part.strip()}
+    unknown = requested - set(INCLUDE_OPTIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include option(s): {', '.join(sorted(unknown))}; expected {', '.join(INCLUDE_OPTIONS)}"
+        )
+    query = db.query(Series)
+    if "stats" in requested:
+        query = query.options(joinedload(Series.stats))
+    return query
+
+
+@router.get("", response_model=List[SeriesResponse], dependencies=[Depends(limit_reads)])
+def get_all_series(
+    include: Optional[str] = Query(None, description="Comma-separated extras: stats (counts, extents, last value)"),
+    db: Session = Depends(get_read_db)
+):
     """Get all series (public endpoint)"""
-    series = db.query(Series).all()
+    series = _series_query(db, include).all()
     return series
 
 
-@router.get("/{series_id}", response_model=SeriesResponse)
-def get_series(series_id: int, db: Session = Depends(get_db)):
+@router.get("/{series_id}", response_model=SeriesResponse, dependencies=[Depends(limit_reads)])
+def get_series(
+    series_id: int,
+    include: Optional[str] = Query(None, description="Comma-separated extras: stats (counts, extents, last value)"),
+    db: Session = Depends(get_read_db)
+):
     """Get a specific series by ID (public endpoint)"""
-    series = db.query(Series).filter(Series.id == series_id).first()
+    series = _series_query(db, include).filter(Series.id == series_id).first()
     if not series:
         raise HTTPException(status_code=404, detail="Series not found")
     return series
 
 
+@router.get("/{series_id}/stats", response_model=SeriesStatsResponse, dependencies=[Depends(limit_reads)])
+def get_series_stats(
+    series_id: int,
+    start_date: Optional[datetime] = Query(None, description="Start date filter"),
+    end_date: Optional[datetime] = Query(None, description="End date filter"),
+    percentiles: str = Query("5,25,50,75,95", description="Comma-separated percentiles (0-100)"),
+    bins: int = Query(20, ge=1, le=1000, description="Histogram bins over [min_value, max_value]"),
+    db: Session = Depends(get_series_read_db)
+):
+    """Descriptive statistics and histogram for a series (public endpoint).
+
+    Percentiles are exact (interpolated like percentile_cont) for up to
+    200,000 readings and estimated from a fine histogram beyond that.
+    """
+    series = db.get(Series, series_id)
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+
+    try:
+        requested = [float(p) for p in percentiles.split(',') if p.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Percentiles must be numbers")
+    if any(p < 0 or p > 100 for p in requested):
+        raise HTTPException(status_code=400, detail="Percentiles must be between 0 and 100")
+
+    # Values are folded in block by block, so memory does not grow with the range
+    stats = StreamingStats(series.min_value, series.max_value, bins)
+    for _, values in iter_column_blocks(db, series_id, start_date, end_date, with_timestamps=False):
+        stats.update(values)
+
+    empty = stats.count == 0
+    return SeriesStatsResponse(
+        series_id=series_id,
+        start_date=start_date,
+        end_date=end_date,
+        count=stats.count,
+        mean=None if empty else stats.mean,
+        stddev=stats.stddev,
+        min=None if empty else stats.min,
+        max=None if empty else stats.max,
+        percentiles={f"p{p:g}": stats.percentile(p) for p in requested},
+        histogram=stats.histogram(),
+        underflow=stats.underflow,
+        overflow=stats.overflow,
+    )
+
+
+@router.get("/{series_id}/uptime", response_model=UptimeResponse, dependencies=[Depends(limit_reads)])
+def get_series_uptime(
+    series_id: int,
+    sensor_id: Optional[int] = Query(None, description="Only this sensor's readings"),
+    start_date: Optional[datetime] = Query(None, description="Range start (default: 7 days before end_date)"),
+    end_date: Optional[datetime] = Query(None, description="Range end (default and cap: now)"),
+    threshold_seconds: Optional[float] = Query(None, gt=0, description="Shortest reported gap (default: SENSOR_OFFLINE_SECONDS)"),
+    limit: int = Query(1000, ge=0, le=10000, description="Maximum gaps listed"),
+    db: Session = Depends(get_series_read_db)
+):
+    """Gaps without readings and daily uptime of a series or one of its sensors (public endpoint)"""
+    if not db.query(Series.id).filter(Series.id == series_id).first():
+        raise HTTPException(status_code=404, detail="Series not found")
+    if sensor_id is not None and not db.query(Sensor.id).filter(Sensor.id == sensor_id, Sensor.series_id == series_id).first():
+        raise HTTPException(status_code=404, detail="Sensor not found in this series")
+
+    # Naive bounds are taken as UTC, like stored timestamps
+    end_date = end_date or datetime.now(timezone.utc)
+    end_date = end_date if end_date.tzinfo else end_date.replace(tzinfo=timezone.utc)
+    start_date = start_date or end_date - timedelta(days=7)
+    start_date = start_date if start_date.tzinfo else start_date.replace(tzinfo=timezone.utc)
+    if start_date >= end_date:
+        raise HTTPException(status_code=400, detail="start_date must be before end_date")
+    threshold = threshold_seconds or settings.SENSOR_OFFLINE_SECONDS
+
+    report = uptime_report(db, series_id, sensor_id, start_date, end_date, threshold)
+    span = report.end_us - report.start_us
+    return UptimeResponse(
+        series_id=series_id,
+        sensor_id=sensor_id,
+        start_date=from_us(report.start_us),
+        end_date=from_us(report.end_us),
+        threshold_seconds=threshold,
+        uptime_percent=100.0 * (1 - report.downtime_us / span) if span else 100.0,
+        downtime_seconds=report.downtime_us / 1_000_000,
+        gap_count=len(report.gaps),
+        gaps=[Gap(start=from_us(low), end=from_us(high), duration_seconds=(high - low) / 1_000_000)
+              for low, high in report.gaps[:limit]],
+        days=[DailyUptime(
+            date=from_us(day).date(),
+            covered_seconds=covered / 1_000_000,
+            downtime_seconds=down / 1_000_000,
+            uptime_percent=100.0 * (1 - down / covered),
+        ) for day, covered, down in report.days],
+    )
+
+
 @router.post("", response_model=SeriesResponse, status_code=status.HTTP_201_CREATED)
 def create_series(
     series_data: SeriesCreate,
@@ -33,7 +168,11 @@ def create_series(
     current_user: User = Depends(get_current_admin)
 ):
     """Create a new series (admin only)"""
-    new_series = Series(**series_data.model_dump())
+    if series_data.shard is not None and series_data.shard >= len(shards):
+        raise HTTPException(status_code=400, detail=f"Shard {series_data.shard} is not configured ({len(shards)} shards)")
+    new_series = Series(**series_data.model_dump(exclude={"shard"}))
+    new_series.shard = series_data.shard if series_data.shard is not None else shards.place(db)
+    new_series.stats = SeriesStats(count=0, stale=False)
     db.add(new_series)
     db.commit()
     db.refresh(new_series)
@@ -48,7 +187,7 @@ def update_series(
     current_user: User = Depends(get_current_admin)
 ):
     """Update a series (admin only)"""
-    series = db.query(Series).filter(Series.id == series_id).first()
+    series = db.get(Series, series_id)
     if not series:
         raise HTTPException(status_code=404, detail="Series not found")
 
@@ -58,20 +197,68 @@ def update_series(
 
     db.commit()
     db.refresh(series)
+    sensor_cache.invalidate_series(series_id)
     return series
 
 
-@router.delete("/{series_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete(
+    "/{series_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={202: {"model": SeriesDeletionResponse, "description": "Deletion continues in the background; progress is kept by the accepting worker process"}}
+)
 def delete_series(
     series_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_admin)
 ):
-    """Delete a series (admin only)"""
-    series = db.query(Series).filter(Series.id == series_id).first()
-    if not series:
+    """Delete a series (admin only).
+
+    Small series are deleted at once, with the database cascading to sensors,
+    measurements and chunks (rows on a shard are deleted explicitly). Larger
+    ones return 202 and are deleted in chunks by a background job; poll
+    `GET /api/series/{id}/deletion` for progress.
+    Job progress is kept by the worker process that accepted the delete, so
+    with several workers the poll may answer 404 from another one.
+    """
+    job = series_deletions.get(series_id)
+    if job is not None and job.status == "running":
+        return Response(SeriesDeletionResponse.model_validate(job).model_dump_json(),
+                        status_code=status.HTTP_202_ACCEPTED, media_type="application/json")
+
+    exists = db.query(Series.id).filter(Series.id == series_id).first()
+    if not exists:
         raise HTTPException(status_code=404, detail="Series not found")
 
-    db.delete(series)
-    db.commit()
+    with shards.series_session(series_id, db) as series_db:
+        if series_deletions.is_large(series_db, series_id):
+            series_db.rollback()
+            job = series_deletions.start(series_id)
+            sensor_cache.invalidate_series(series_id)
+            recent_buffer.invalidate(series_id)
+            return Response(SeriesDeletionResponse.model_validate(job).model_dump_json(),
+                            status_code=status.HTTP_202_ACCEPTED, media_type="application/json")
+
+        if series_db is not db:
+            # Nothing cascades to the rows on a shard
+            for model in SHARDED_MODELS:
+                series_db.query(model).filter(model.series_id == series_id).delete(synchronize_session=False)
+        series_db.query(Series).filter(Series.id == series_id).delete(synchronize_session=False)
+        series_db.commit()
+    shards.forget(series_id)
+    sensor_cache.invalidate_series(series_id)
+    recent_buffer.invalidate(series_id)
+    archive.remove_series_files(series_id)
+    alert_engine.refresh()
     return None
+
+
+@router.get("/{series_id}/deletion", response_model=SeriesDeletionResponse)
+def get_series_deletion(
+    series_id: int,
+    current_user: User = Depends(get_current_admin)
+):
+    """Progress of a background series deletion (admin only)"""
+    job = series_deletions.get(series_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="No deletion job for this series")
+    return job
@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class AlertRuleBase(BaseModel):
+    series_id: int
+    name: str = Field(..., max_length=100)
+    # above, below, rate_of_change (units/second), average_above, average_below or no_data
+    kind: str
+    threshold: float | None = None
+    # Averaging window, or the silence that triggers a no_data rule
+    window_seconds: float | None = Field(None, gt=0)
+    is_active: bool = True
+
+
+class AlertRuleCreate(AlertRuleBase):
+    pass
+
+
+class AlertRuleUpdate(BaseModel):
+    name: str | None = Field(None, max_length=100)
+    kind: str | None = None
+    threshold: float | None = None
+    window_seconds: float | None = Field(None, gt=0)
+    is_active: bool | None = None
+
+
+class AlertRuleResponse(AlertRuleBase):
+    id: int
+    # Whether the rule currently matches, from this process's in-memory state
+    firing: bool = False
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class AlertEventResponse(BaseModel):
+    id: int
+    rule_id: int
+    series_id: int
+    sensor_id: int | None
+    state: str
+    value: float
+    threshold: float | None
+    timestamp: datetime
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
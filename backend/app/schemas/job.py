@@ -0,0 +1,39 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class JobRunResponse(BaseModel):
+    id: int
+    job: str
+    scheduled_for: datetime
+    started_at: datetime
+    finished_at: datetime | None
+    duration_ms: float | None
+    status: str
+    detail: str | None
+    worker: str
+
+    class Config:
+        from_attributes = True
+
+
+class JobMetrics(BaseModel):
+    """Runs of the job in the process that answered the request"""
+    runs: int
+    failures: int
+    skipped: int
+    last_duration_ms: float | None
+    max_duration_ms: float | None
+    avg_duration_ms: float | None
+
+
+class JobResponse(BaseModel):
+    name: str
+    description: str
+    # Cron expression or "every <n><unit>"; null for manual-only jobs
+    schedule: str | None
+    next_run: datetime | None
+    running: bool
+    metrics: JobMetrics
+    # Most recent run on any worker
+    last_run: JobRunResponse | None = None
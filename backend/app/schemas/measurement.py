@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, model_validator
 from datetime import datetime
 
 
@@ -24,3 +24,61 @@ class MeasurementResponse(MeasurementBase):
 
     class Config:
         from_attributes = True
+
+
+class SensorMeasurementResponse(MeasurementResponse):
+    duplicate: bool = False
+
+
+class ResampledResponse(BaseModel):
+    step_seconds: float
+    fill: str
+    series_ids: list[int]
+    timestamps: list[datetime]
+    # values[i][j] is series_ids[j] at timestamps[i]
+    values: list[list[float | None]]
+
+
+class MeasurementBulkUpdate(BaseModel):
+    """Correct every reading of a series in [start_date, end_date] (optionally within a value band)"""
+    series_id: int
+    start_date: datetime
+    end_date: datetime
+    min_value: float | None = None
+    max_value: float | None = None
+    # Either set a fixed value, or apply value * scale + offset
+    value: float | None = None
+    scale: float = 1.0
+    offset: float = 0.0
+
+    @model_validator(mode='after')
+    def validate_correction(self):
+        if self.end_date < self.start_date:
+            raise ValueError('end_date must not be before start_date')
+        if self.value is not None and (self.scale != 1.0 or self.offset != 0.0):
+            raise ValueError('Use either value or scale/offset, not both')
+        if self.value is None and self.scale == 1.0 and self.offset == 0.0:
+            raise ValueError('Nothing to change: set value, scale or offset')
+        return self
+
+
+class BulkEditResponse(BaseModel):
+    affected: int
+
+
+class ImportRejectedRow(BaseModel):
+    line: int
+    reason: str
+
+
+class ImportReportResponse(BaseModel):
+    rows: int
+    inserted: int
+    duplicates: int
+    rejected: int
+    # First rejected rows only; `rejected` has the full count
+    rejected_rows: list[ImportRejectedRow]
+    seconds: float
+
+    class Config:
+        from_attributes = True
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 
 
@@ -14,11 +14,14 @@ class SensorCreate(SensorBase):
 class SensorUpdate(BaseModel):
     name: str | None = None
     is_active: bool | None = None
+    rate_limit: float | None = Field(None, ge=0)
 
 
 class SensorResponse(SensorBase):
     id: int
+    api_key_prefix: str
     is_active: bool
+    rate_limit: float | None = None
     last_seen: datetime | None
     created_at: datetime
 
@@ -28,3 +31,13 @@ class SensorResponse(SensorBase):
 
 class SensorWithKey(SensorResponse):
     api_key: str
+
+
+class SensorStatusResponse(BaseModel):
+    id: int
+    name: str
+    series_id: int
+    is_active: bool
+    status: str
+    last_seen: datetime | None
+    seconds_since_seen: float | None
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator
-from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from datetime import datetime, date
 import re
 
 
@@ -11,6 +11,7 @@ class SeriesBase(BaseModel):
     max_value: float
     color: str
     icon: str | None = None
+    rate_limit: float | None = Field(None, ge=0)
 
     @field_validator('color')
     @classmethod
@@ -28,7 +29,8 @@ class SeriesBase(BaseModel):
 
 
 class SeriesCreate(SeriesBase):
-    pass
+    # Measurement database for the readings (default: the shard holding the fewest series)
+    shard: int | None = Field(None, ge=0)
 
 
 class SeriesUpdate(BaseModel):
@@ -39,12 +41,95 @@ class SeriesUpdate(BaseModel):
     max_value: float | None = None
     color: str | None = None
     icon: str | None = None
+    rate_limit: float | None = Field(None, ge=0)
+
+
+class SeriesSummary(BaseModel):
+    count: int
+    first_timestamp: datetime | None
+    last_timestamp: datetime | None
+    min_value: float | None
+    max_value: float | None
+    last_value: float | None
+    # True while a delete or edit may have left min/max or first/last outdated
+    stale: bool
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
 
 
 class SeriesResponse(SeriesBase):
     id: int
+    shard: int
     created_at: datetime
     updated_at: datetime
+    # Only filled in with ?include=stats
+    stats: SeriesSummary | None = None
+
+    class Config:
+        from_attributes = True
+
+
+class HistogramBin(BaseModel):
+    start: float
+    end: float
+    count: int
+
+
+class SeriesStatsResponse(BaseModel):
+    series_id: int
+    start_date: datetime | None
+    end_date: datetime | None
+    count: int
+    mean: float | None
+    stddev: float | None
+    min: float | None
+    max: float | None
+    percentiles: dict[str, float | None]
+    histogram: list[HistogramBin]
+    underflow: int
+    overflow: int
+
+
+class Gap(BaseModel):
+    start: datetime
+    end: datetime
+    duration_seconds: float
+
+
+class DailyUptime(BaseModel):
+    date: date
+    # Part of the UTC day inside the requested range
+    covered_seconds: float
+    downtime_seconds: float
+    uptime_percent: float
+
+
+class UptimeResponse(BaseModel):
+    series_id: int
+    sensor_id: int | None
+    start_date: datetime
+    end_date: datetime
+    threshold_seconds: float
+    uptime_percent: float
+    downtime_seconds: float
+    gap_count: int
+    # Oldest first, at most `limit`
+    gaps: list[Gap]
+    days: list[DailyUptime]
+
+
+class SeriesDeletionResponse(BaseModel):
+    series_id: int
+    status: str
+    # None until the background job has counted the rows
+    total_measurements: int | None
+    deleted_measurements: int
+    deleted_chunks: int
+    started_at: datetime | None
+    finished_at: datetime | None
+    error: str | None
 
     class Config:
         from_attributes = True
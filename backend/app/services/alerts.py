@@ -0,0 +1,272 @@
+"""Alert rules evaluated in memory as sensor readings are accepted.
+
+Each active rule keeps a small rolling state, so a reading costs a dict
+lookup plus constant work per rule on its series:
+
+    above / below        the reading is above / below `threshold`
+    rate_of_change       |change| per second since the series' previous
+                         reading exceeds `threshold`
+    average_above/below  the mean of the readings of the last
+                         `window_seconds` is above / below `threshold`
+    no_data              nothing arrived for `window_seconds`
+
+Alerts are edge-triggered: a rule emits a `triggered` event when it starts
+to match and a `resolved` event when it stops, never one per reading.
+Readings older than the newest one a rule has seen are not evaluated.
+Events are written in batches by a background thread, which also checks
+no_data rules and reloads the rules so edits made elsewhere are picked up.
+State lives in this process only and starts empty after a restart.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.alert_event import AlertEvent
+from app.models.alert_rule import AlertRule
+from app.services.chunk_codec import to_us
+
+logger = logging.getLogger(__name__)
+
+KINDS = ("above", "below", "rate_of_change", "average_above", "average_below", "no_data")
+WINDOWED = ("average_above", "average_below", "no_data")
+
+
+def rule_problem(kind: str, threshold: float | None, window_seconds: float | None) -> str | None:
+    """Why a rule definition is unusable, or None"""
+    if kind not in KINDS:
+        return f"Unknown rule kind '{kind}'; expected one of {', '.join(KINDS)}"
+    if kind != "no_data" and threshold is None:
+        return f"{kind} rules need a threshold"
+    if kind in WINDOWED and (window_seconds is None or window_seconds <= 0):
+        return f"{kind} rules need a positive window_seconds"
+    return None
+
+
+@dataclass(frozen=True)
+class RuleSpec:
+    id: int
+    series_id: int
+    kind: str
+    threshold: float | None
+    window_seconds: float | None
+
+
+class RuleState:
+    """Rolling state of one rule; `observe` returns (matches, measured) or None to skip"""
+    __slots__ = ("spec", "firing", "last_ts", "last_value", "window", "window_sum", "last_arrival")
+
+    def __init__(self, spec: RuleSpec, now: float):
+        self.spec = spec
+        self.firing = False
+        self.last_ts: float | None = None
+        self.last_value: float | None = None
+        self.window: deque = deque()
+        self.window_sum = 0.0
+        self.last_arrival = now
+
+    def observe(self, value: float, ts: float, arrival: float) -> tuple[bool, float] | None:
+        spec = self.spec
+        if spec.kind == "no_data":
+            silence, self.last_arrival = arrival - self.last_arrival, arrival
+            return False, silence
+        if self.last_ts is not None and ts < self.last_ts:
+            return None
+        previous_ts, previous_value = self.last_ts, self.last_value
+        self.last_ts, self.last_value = ts, value
+
+        if spec.kind == "above":
+            return value > spec.threshold, value
+        if spec.kind == "below":
+            return value < spec.threshold, value
+        if spec.kind == "rate_of_change":
+            if previous_ts is None or ts == previous_ts:
+                return None
+            rate = abs(value - previous_value) / (ts - previous_ts)
+            return rate > spec.threshold, rate
+
+        # Rolling window average; every reading is appended and evicted once
+        window = self.window
+        window.append((ts, value))
+        self.window_sum += value
+        horizon = ts - spec.window_seconds
+        while window[0][0] <= horizon:
+            self.window_sum -= window.popleft()[1]
+        if len(window) == 1:
+            # Drop accumulated rounding error whenever the window drains
+            self.window_sum = value
+        average = self.window_sum / len(window)
+        if spec.kind == "average_above":
+            return average > spec.threshold, average
+        return average < spec.threshold, average
+
+
+class AlertEngine:
+    """Evaluates alert rules on ingest and persists their state changes"""
+
+    def __init__(self, session_factory, check_interval: float, refresh_interval: float, max_pending: int):
+        self._session_factory = session_factory
+        self._check_interval = check_interval
+        self._refresh_interval = refresh_interval
+        self._max_pending = max_pending
+        # Replaced wholesale on refresh, so `observe` can read it without the lock
+        self._by_series: dict[int, list[RuleState]] = {}
+        self._no_data: list[RuleState] = []
+        self._pending: list[dict] = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.counters = {"evaluated": 0, "triggered": 0, "resolved": 0, "written": 0, "dropped": 0, "failed": 0}
+
+    def observe(self, series_id: int, sensor_id: int | None, value: float, timestamp: datetime):
+        """Evaluate the series' rules against an accepted reading"""
+        states = self._by_series.get(series_id)
+        if not states:
+            return
+        ts = to_us(timestamp) / 1_000_000
+        arrival = time.monotonic()
+        with self._lock:
+            for state in states:
+                outcome = state.observe(value, ts, arrival)
+                self.counters["evaluated"] += 1
+                if outcome is not None and outcome[0] != state.firing:
+                    self._transition(state, outcome[0], outcome[1], timestamp, sensor_id)
+
+    def is_firing(self, rule_id: int) -> bool:
+        return any(state.firing for states in self._by_series.values() for state in states
+                   if state.spec.id == rule_id)
+
+    def check_no_data(self) -> int:
+        """Trigger no_data rules whose series has been silent too long"""
+        now = time.monotonic()
+        fired = 0
+        with self._lock:
+            for state in self._no_data:
+                silence = now - state.last_arrival
+                if not state.firing and silence > state.spec.window_seconds:
+                    self._transition(state, True, silence, datetime.now(timezone.utc), None)
+                    fired += 1
+        return fired
+
+    def refresh(self):
+        """Reload rules from the database"""
+        db = self._session_factory()
+        try:
+            rows = db.query(
+                AlertRule.id, AlertRule.series_id, AlertRule.kind, AlertRule.threshold, AlertRule.window_seconds,
+                AlertRule.is_active
+            ).all()
+        finally:
+            db.close()
+        self.load([RuleSpec(*fields) for *fields, is_active in rows if is_active], existing={row[0] for row in rows})
+
+    def load(self, specs: list[RuleSpec], existing: set[int] | None = None):
+        """Evaluate `specs` from now on, keeping the state of rules whose definition is unchanged.
+
+        Pending events of rules not in `existing` (default: `specs`) are discarded, since
+        they would fail the whole batch on the foreign key.
+        """
+        now = time.monotonic()
+        with self._lock:
+            current = {state.spec.id: state for states in self._by_series.values() for state in states}
+            by_series: dict[int, list[RuleState]] = {}
+            for spec in specs:
+                if rule_problem(spec.kind, spec.threshold, spec.window_seconds):
+                    logger.warning("Skipping invalid alert rule %s", spec.id)
+                    continue
+                state = current.get(spec.id)
+                if state is None or state.spec != spec:
+                    state = RuleState(spec, now)
+                by_series.setdefault(spec.series_id, []).append(state)
+            self._by_series = by_series
+            self._no_data = [s for states in by_series.values() for s in states if s.spec.kind == "no_data"]
+            existing = existing if existing is not None else {spec.id for spec in specs}
+            self._pending = [event for event in self._pending if event["rule_id"] in existing]
+
+    def flush(self) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+
+        db = self._session_factory()
+        try:
+            db.execute(insert(AlertEvent), pending)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.counters["failed"] += len(pending)
+            logger.exception("Failed to write %d alert events", len(pending))
+            return 0
+        finally:
+            db.close()
+        self.counters["written"] += len(pending)
+        return len(pending)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.counters,
+            "rules": sum(len(states) for states in self._by_series.values()),
+            "firing": sum(state.firing for states in self._by_series.values() for state in states),
+            "pending": len(self._pending),
+        }
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self.refresh()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(self._check_interval + 5)
+        self._thread = None
+        self.flush()
+
+    def _transition(self, state: RuleState, firing: bool, measured: float, timestamp: datetime,
+                    sensor_id: int | None):
+        # Called with the lock held
+        state.firing = firing
+        self.counters["triggered" if firing else "resolved"] += 1
+        if len(self._pending) >= self._max_pending:
+            self.counters["dropped"] += 1
+            return
+        self._pending.append({
+            "rule_id": state.spec.id,
+            "series_id": state.spec.series_id,
+            "sensor_id": sensor_id,
+            "state": "triggered" if firing else "resolved",
+            "value": measured,
+            "threshold": state.spec.threshold if state.spec.kind != "no_data" else state.spec.window_seconds,
+            "timestamp": timestamp,
+        })
+
+    def _run(self):
+        next_refresh = time.monotonic() + self._refresh_interval
+        while not self._stopping.wait(self._check_interval):
+            try:
+                self.check_no_data()
+                self.flush()
+                if time.monotonic() >= next_refresh:
+                    next_refresh = time.monotonic() + self._refresh_interval
+                    self.refresh()
+            except Exception:
+                logger.exception("Alert engine maintenance failed")
+
+
+alert_engine = AlertEngine(
+    SessionLocal,
+    check_interval=settings.ALERT_CHECK_SECONDS,
+    refresh_interval=settings.ALERT_REFRESH_SECONDS,
+    max_pending=settings.ALERT_QUEUE_SIZE,
+)
@@ -0,0 +1,347 @@
+"""Archive tier: closed months of each series as Parquet files on local disk.
+
+`archive_series` exports every whole UTC month older than the cutoff to
+``ARCHIVE_DIR/series_id=<id>/month=<YYYY-MM>/part-<max_id>.parquet`` and
+records it in `measurement_archives`. From then on reads of that month are
+answered from the file (through DuckDB, or PyArrow when DuckDB is missing),
+and only rows that arrived after the export (id > max_id) still come from
+the database. Pruning deletes the exported rows from the hot table and the
+cold chunks; late rows are folded into the file on the next run, except
+those whose (sensor, timestamp) the file already holds. Since pruned rows
+are outside the unique constraint, writers check closed months against the
+files as well (`archived_readings`, `archived_indexes`).
+
+Archived rows are read-only: bulk edits and per-id updates only reach rows
+still held by the database.
+"""
+import os
+import shutil
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import select, func, and_, not_, lambda_stmt
+from sqlalchemy.orm import Session
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover - optional dependency
+    duckdb = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = pq = None
+
+from app.config import settings
+from app.models.measurement import Measurement
+from app.models.measurement_archive import MeasurementArchive
+from app.models.measurement_chunk import MeasurementChunk
+from app.services import cold_storage
+from app.services.chunk_codec import ColumnBlock, to_us, from_us, NULL_SENSOR
+from app.utils.sql import delete_in_chunks
+
+ONE_US = timedelta(microseconds=1)
+
+
+def enabled() -> bool:
+    return bool(settings.ARCHIVE_DIR)
+
+
+def month_start(ts: datetime) -> datetime:
+    ts = from_us(to_us(ts))
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(ts: datetime) -> datetime:
+    return month_start(month_start(ts) + timedelta(days=32))
+
+
+def _full_path(relative: str) -> str:
+    return os.path.join(settings.ARCHIVE_DIR, relative)
+
+
+def partitions_for(db: Session, series_ids: list[int] | None, start: datetime | None,
+                   end: datetime | None) -> list[MeasurementArchive]:
+    if not enabled():
+        return []
+    stmt = lambda_stmt(lambda: select(MeasurementArchive))
+    if series_ids is not None:
+        stmt += lambda s: s.where(MeasurementArchive.series_id.in_(series_ids))
+    if start:
+        stmt += lambda s: s.where(MeasurementArchive.end_ts > start)
+    if end:
+        stmt += lambda s: s.where(MeasurementArchive.start_ts <= end)
+    stmt += lambda s: s.order_by(MeasurementArchive.series_id, MeasurementArchive.start_ts)
+    return db.scalars(stmt).all()
+
+
+def by_series(partitions: list[MeasurementArchive]) -> dict[int, list[MeasurementArchive]]:
+    grouped = defaultdict(list)
+    for part in partitions:
+        grouped[part.series_id].append(part)
+    return grouped
+
+
+def exclusion(partitions: list[MeasurementArchive]) -> list:
+    """WHERE clauses hiding database rows that the archive already serves"""
+    return [
+        not_(and_(
+            Measurement.series_id == part.series_id,
+            Measurement.timestamp >= part.start_ts,
+            Measurement.timestamp < part.end_ts,
+            Measurement.id <= part.max_id,
+        ))
+        for part in partitions
+    ]
+
+
+def mask_archived(block: ColumnBlock, partitions: list[MeasurementArchive]) -> ColumnBlock:
+    """Drop rows of a cold block that one of the (same-series) partitions serves"""
+    hidden = np.zeros(len(block), dtype=bool)
+    for part in partitions:
+        hidden |= ((block.timestamps >= to_us(part.start_ts)) & (block.timestamps < to_us(part.end_ts))
+                   & (block.ids <= part.max_id))
+    return block.mask(~hidden) if hidden.any() else block
+
+
+def read_partition(part: MeasurementArchive, start: datetime | None = None, end: datetime | None = None,
+                   sensor_id: int | None = None, measurement_id: int | None = None) -> ColumnBlock:
+    """Rows of one partition in (timestamp, id) order, filtered to [start, end]"""
+    path = _full_path(part.path)
+    if duckdb is not None:
+        where, params = ["TRUE"], [path]
+        if start:
+            where.append("epoch_us(timestamp) >= ?")
+            params.append(to_us(start))
+        if end:
+            where.append("epoch_us(timestamp) <= ?")
+            params.append(to_us(end))
+        if sensor_id is not None:
+            where.append("sensor_id = ?")
+            params.append(sensor_id)
+        if measurement_id is not None:
+            where.append("id = ?")
+            params.append(measurement_id)
+        con = duckdb.connect()
+        try:
+            columns = con.execute(
+                "SELECT id, epoch_us(timestamp) AS ts, value, coalesce(sensor_id, ?) AS sensor_id, "
+                "epoch_us(created_at) AS created FROM read_parquet(?) "
+                f"WHERE {' AND '.join(where)} ORDER BY timestamp, id",
+                [NULL_SENSOR] + params,
+            ).fetchnumpy()
+        finally:
+            con.close()
+        return ColumnBlock(
+            ids=np.asarray(columns["id"], dtype=np.int64),
+            timestamps=np.asarray(columns["ts"], dtype=np.int64),
+            values=np.asarray(columns["value"], dtype=np.float64),
+            sensor_ids=np.asarray(columns["sensor_id"], dtype=np.int64),
+            created_at=np.asarray(columns["created"], dtype=np.int64),
+        )
+
+    # Files are written sorted, so filtering keeps (timestamp, id) order
+    table = pq.read_table(path)
+    block = ColumnBlock(
+        ids=table["id"].to_numpy(),
+        timestamps=table["timestamp"].cast(pa.int64()).to_numpy(),
+        values=table["value"].to_numpy(),
+        sensor_ids=pc.fill_null(table["sensor_id"], NULL_SENSOR).to_numpy(),
+        created_at=table["created_at"].cast(pa.int64()).to_numpy(),
+    )
+    keep = np.ones(len(block), dtype=bool)
+    if start:
+        keep &= block.timestamps >= to_us(start)
+    if end:
+        keep &= block.timestamps <= to_us(end)
+    if sensor_id is not None:
+        keep &= block.sensor_ids == sensor_id
+    if measurement_id is not None:
+        keep &= block.ids == measurement_id
+    return block if keep.all() else block.mask(keep)
+
+
+def is_archived(db: Session, series_id: int, timestamp: datetime, measurement_id: int) -> bool:
+    """True if the archive serves this row, making it read-only"""
+    if not enabled():
+        return False
+    return db.query(MeasurementArchive.id).filter(
+        MeasurementArchive.series_id == series_id,
+        MeasurementArchive.start_ts <= timestamp,
+        MeasurementArchive.end_ts > timestamp,
+        MeasurementArchive.max_id >= measurement_id
+    ).first() is not None
+
+
+def may_be_archived(timestamp: datetime) -> bool:
+    """True if a partition could hold this reading: archiving is on and its month is closed"""
+    return enabled() and to_us(timestamp) < to_us(month_start(datetime.now(timezone.utc)))
+
+
+def archived_readings(db: Session, series_id: int, start: datetime,
+                      end: datetime) -> dict[tuple[int, int], tuple]:
+    """Archived readings of a series in [start, end], keyed like cold_storage.packed_readings"""
+    found = {}
+    for part in partitions_for(db, [series_id], start, end):
+        block = read_partition(part, start, end)
+        found.update(zip(
+            zip(block.sensor_ids.tolist(), block.timestamps.tolist()),
+            zip(block.ids.tolist(), block.values.tolist(), block.created_at.tolist()),
+        ))
+    return found
+
+
+def archived_indexes(db: Session, keys: list[tuple[int, int | None, datetime]]) -> set[int]:
+    """Positions in `keys` of (series_id, sensor_id, timestamp) readings already in a partition"""
+    closed = [index for index, key in enumerate(keys) if may_be_archived(key[2])]
+    if not closed:
+        return set()
+    found = cold_storage.stored_indexes(db, [keys[index] for index in closed], archived_readings)
+    return {closed[i] for i in found}
+
+
+def find_measurement(db: Session, measurement_id: int) -> tuple[int, ColumnBlock] | None:
+    """(series_id, one-row block) for an archived measurement id"""
+    if not enabled():
+        return None
+    candidates = db.query(MeasurementArchive).filter(
+        MeasurementArchive.min_id <= measurement_id,
+        MeasurementArchive.max_id >= measurement_id
+    ).all()
+    for part in candidates:
+        block = read_partition(part, measurement_id=measurement_id)
+        if len(block):
+            return part.series_id, block
+    return None
+
+
+def _write_partition(series_id: int, start: datetime, block: ColumnBlock, max_id: int) -> str:
+    relative = os.path.join(f"series_id={series_id}", f"month={start:%Y-%m}", f"part-{max_id}.parquet")
+    path = _full_path(relative)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.table({
+        "id": pa.array(block.ids, pa.int64()),
+        "series_id": pa.array(np.full(len(block), series_id, dtype=np.int32), pa.int32()),
+        "timestamp": pa.array(block.timestamps, pa.timestamp("us", tz="UTC")),
+        "value": pa.array(block.values, pa.float64()),
+        "sensor_id": pa.array(block.sensor_ids, pa.int64(), mask=block.sensor_ids == NULL_SENSOR),
+        "created_at": pa.array(block.created_at, pa.timestamp("us", tz="UTC")),
+    })
+    tmp = path + ".tmp"
+    pq.write_table(table, tmp, compression="zstd", row_group_size=131072)
+    os.replace(tmp, path)
+    return relative
+
+
+def _database_block(db: Session, series_id: int, start: datetime, end: datetime, after_id: int) -> ColumnBlock | None:
+    """Hot and cold rows of [start, end) with id > after_id"""
+    blocks = []
+    for block in cold_storage.iter_chunk_blocks(db, series_id, start, end - ONE_US):
+        block = block.mask(block.ids > after_id)
+        if len(block):
+            blocks.append(block)
+
+    stmt = select(Measurement.id, Measurement.timestamp, Measurement.value,
+                  Measurement.sensor_id, Measurement.created_at).where(
+        Measurement.series_id == series_id,
+        Measurement.timestamp >= start,
+        Measurement.timestamp < end,
+        Measurement.id > after_id,
+    )
+    for partition in db.execute(stmt.execution_options(yield_per=50000)).partitions():
+        blocks.append(cold_storage.rows_to_block(partition))
+    return cold_storage.concat_blocks(blocks) if blocks else None
+
+
+def _drop_stored(late: ColumnBlock, stored: ColumnBlock) -> ColumnBlock:
+    """Late rows whose (sensor, timestamp) the partition does not hold yet"""
+    candidates = np.isin(late.timestamps, stored.timestamps)
+    if not candidates.any():
+        return late
+    keys = set(zip(stored.sensor_ids.tolist(), stored.timestamps.tolist()))
+    keep = ~candidates
+    for index in np.nonzero(candidates)[0]:
+        keep[index] = (int(late.sensor_ids[index]), int(late.timestamps[index])) not in keys
+    return late if keep.all() else late.mask(keep)
+
+
+def _prune(db: Session, part: MeasurementArchive):
+    delete_in_chunks(
+        db, Measurement,
+        Measurement.series_id == part.series_id,
+        Measurement.timestamp >= part.start_ts,
+        Measurement.timestamp < part.end_ts,
+        Measurement.id <= part.max_id,
+        chunk_size=settings.BULK_EDIT_CHUNK_SIZE,
+    )
+
+    def drop_archived(block, in_range):
+        hit = in_range & (block.ids <= part.max_id)
+        return block.mask(~hit), int(hit.sum())
+
+    cold_storage.rewrite_chunks(db, part.series_id, part.start_ts, part.end_ts - ONE_US, drop_archived)
+    part.pruned = True
+    db.commit()
+
+
+def _first_unarchived_month(db: Session, series_id: int, cutoff: datetime) -> datetime | None:
+    hot = db.query(func.min(Measurement.timestamp)).filter(
+        Measurement.series_id == series_id, Measurement.timestamp < cutoff
+    ).scalar()
+    cold = db.query(func.min(MeasurementChunk.start_ts)).filter(
+        MeasurementChunk.series_id == series_id, MeasurementChunk.start_ts < cutoff
+    ).scalar()
+    candidates = [to_us(t) for t in (hot, cold) if t is not None]
+    return month_start(from_us(min(candidates))) if candidates else None
+
+
+def archive_series(db: Session, series_id: int, before: datetime, prune: bool) -> dict:
+    """Export (or refresh) every whole month of a series that ends before `before`"""
+    result = {"series_id": series_id, "partitions": 0, "rows": 0, "bytes": 0, "pruned": 0}
+    cutoff = month_start(before)
+    existing = {to_us(p.start_ts): p for p in
+                db.query(MeasurementArchive).filter(MeasurementArchive.series_id == series_id).all()}
+
+    month = _first_unarchived_month(db, series_id, cutoff)
+    while month is not None and month < cutoff:
+        end = next_month(month)
+        part = existing.get(to_us(month))
+        block = _database_block(db, series_id, month, end, part.max_id if part else 0)
+
+        if block is not None:
+            # Dropped duplicates stay below max_id, so reads hide them and pruning deletes them
+            max_id = int(block.ids.max())
+            if part is not None:
+                stored = read_partition(part)
+                block = cold_storage.concat_blocks([stored, _drop_stored(block, stored)])
+            old_path = part.path if part is not None else None
+            path = _write_partition(series_id, month, block, max_id)
+            if part is None:
+                part = MeasurementArchive(series_id=series_id, start_ts=month, end_ts=end, pruned=False)
+                db.add(part)
+            part.path = path
+            part.min_id = int(block.ids.min())
+            part.max_id = max_id
+            part.row_count = len(block)
+            part.pruned = False
+            db.commit()
+            if old_path is not None and old_path != path:
+                os.remove(_full_path(old_path))
+            result["partitions"] += 1
+            result["rows"] += len(block)
+            result["bytes"] += os.path.getsize(_full_path(path))
+
+        if prune and part is not None and not part.pruned:
+            _prune(db, part)
+            result["pruned"] += 1
+        month = end
+
+    return result
+
+
+def remove_series_files(series_id: int):
+    if enabled():
+        shutil.rmtree(_full_path(f"series_id={series_id}"), ignore_errors=True)
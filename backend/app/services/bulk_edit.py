@@ -0,0 +1,131 @@
+"""Set-based range delete and value correction across the hot and cold tiers.
+
+Hot rows are edited with one UPDATE/DELETE per chunk of `chunk_size` rows,
+walking the (series_id, timestamp) index with a (timestamp, id) keyset so
+every statement touches a bounded, index-contiguous slice and commits on
+its own. Matching rows in cold chunks are rewritten chunk by chunk, and
+`series_stats` is adjusted once the whole edit has gone through.
+"""
+from dataclasses import dataclass, replace
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import select, update, delete, func, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.measurement import Measurement
+from app.services import series_stats
+from app.services.cold_storage import rewrite_chunks, iter_chunk_blocks
+
+
+@dataclass(frozen=True)
+class RangeFilter:
+    series_id: int
+    start: datetime
+    end: datetime
+    min_value: float | None = None
+    max_value: float | None = None
+
+    def criteria(self) -> list:
+        criteria = [
+            Measurement.series_id == self.series_id,
+            Measurement.timestamp >= self.start,
+            Measurement.timestamp <= self.end,
+        ]
+        if self.min_value is not None:
+            criteria.append(Measurement.value >= self.min_value)
+        if self.max_value is not None:
+            criteria.append(Measurement.value <= self.max_value)
+        return criteria
+
+    def value_mask(self, values: np.ndarray) -> np.ndarray:
+        mask = np.ones(len(values), dtype=bool)
+        if self.min_value is not None:
+            mask &= values >= self.min_value
+        if self.max_value is not None:
+            mask &= values <= self.max_value
+        return mask
+
+
+def _hot_in_chunks(db: Session, flt: RangeFilter, make_stmt, chunk_size: int) -> int:
+    key = tuple_(Measurement.timestamp, Measurement.id)
+    affected = 0
+    cursor = None
+    while True:
+        criteria = flt.criteria()
+        if cursor is not None:
+            criteria.append(key > tuple_(*cursor))
+        upper = db.execute(
+            select(Measurement.timestamp, Measurement.id).where(*criteria)
+            .order_by(Measurement.timestamp, Measurement.id).offset(chunk_size - 1).limit(1)
+        ).first()
+        if upper is not None:
+            criteria.append(key <= tuple_(*upper))
+        affected += db.execute(make_stmt(criteria)).rowcount
+        db.commit()
+        if upper is None:
+            return affected
+        cursor = tuple(upper)
+
+
+def value_bounds(db: Session, flt: RangeFilter) -> tuple[float | None, float | None]:
+    """Smallest and largest value the filter matches, hot and cold"""
+    low, high = db.execute(
+        select(func.min(Measurement.value), func.max(Measurement.value)).where(*flt.criteria())
+    ).one()
+    for block in iter_chunk_blocks(db, flt.series_id, flt.start, flt.end):
+        values = block.values[flt.value_mask(block.values)]
+        if len(values):
+            low = float(values.min()) if low is None else min(low, float(values.min()))
+            high = float(values.max()) if high is None else max(high, float(values.max()))
+    return low, high
+
+
+def delete_range(db: Session, flt: RangeFilter, chunk_size: int) -> int:
+    low, high = value_bounds(db, flt)
+    if low is None:
+        return 0
+
+    def drop(block, in_range):
+        hit = in_range & flt.value_mask(block.values)
+        return block.mask(~hit), int(hit.sum())
+
+    cold = rewrite_chunks(db, flt.series_id, flt.start, flt.end, drop)
+    hot = _hot_in_chunks(db, flt, lambda criteria: delete(Measurement).where(*criteria), chunk_size)
+    series_stats.note_removed(db, flt.series_id, hot + cold, low, high, flt.start, flt.end)
+    db.commit()
+    return hot + cold
+
+
+def correct_range(db: Session, flt: RangeFilter, scale: float, offset: float, chunk_size: int,
+                  bounds: tuple[float | None, float | None] | None = None) -> int:
+    """Set value = value * scale + offset for every matching reading.
+
+    `bounds` are the matching rows' value_bounds, if the caller already has them.
+    """
+    low, high = bounds if bounds is not None else value_bounds(db, flt)
+    if low is None:
+        return 0
+
+    def adjust(block, in_range):
+        hit = in_range & flt.value_mask(block.values)
+        if not hit.any():
+            return block, 0
+        values = block.values.copy()
+        values[hit] = values[hit] * scale + offset
+        return replace(block, values=values), int(hit.sum())
+
+    cold = rewrite_chunks(db, flt.series_id, flt.start, flt.end, adjust)
+    hot = _hot_in_chunks(
+        db, flt,
+        lambda criteria: update(Measurement).where(*criteria)
+        .values(value=Measurement.value * scale + offset)
+        .execution_options(synchronize_session=False),
+        chunk_size,
+    )
+    # Old values leave the summary and the corrected extremes enter it; the count is unchanged
+    new_low, new_high = sorted((low * scale + offset, high * scale + offset))
+    series_stats.note_removed(db, flt.series_id, 0, low, high, flt.start, flt.end)
+    series_stats.apply(db, {flt.series_id: series_stats.StatsDelta(min_value=new_low, max_value=new_high)})
+    db.commit()
+    return hot + cold
@@ -0,0 +1,361 @@
+"""Streaming bulk import of historical measurements from CSV or Parquet.
+
+Files are read `chunk_rows` rows at a time, so memory stays bounded however
+large the upload is. Each chunk is validated against series ranges loaded
+once up front, then loaded in one round trip: on PostgreSQL via COPY into a
+temporary staging table merged with INSERT ... ON CONFLICT DO NOTHING, on
+other databases with a single executemany insert. Rows already stored for
+the same (sensor, timestamp) are counted as duplicates, not errors. The
+unique constraint does not cover rows without a sensor (NULL never equals
+NULL) or readings packed in cold chunks, so sensorless rows are matched on
+(series, timestamp) and every row is checked against the series' chunks. The
+rows each chunk inserted are folded into `series_stats` before it commits.
+
+Columns: ``series_id`` (optional when a default series is given),
+``timestamp`` (ISO 8601 or Unix seconds), ``value`` and optional ``sensor_id``.
+"""
+import csv
+import gzip
+import io
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Callable, Iterator
+
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pq = None
+
+from app.models.measurement import Measurement
+from app.models.sensor import Sensor
+from app.models.series import Series
+from app.services import archive, series_stats
+from app.services.chunk_codec import to_us
+from app.services.cold_storage import packed_indexes
+from app.services.line_ingest import parse_timestamp
+from app.services.recent_buffer import recent_buffer
+from app.services.sharding import shards
+from app.utils.sql import dialect_insert
+
+FORMATS = ("csv", "parquet")
+REQUIRED_COLUMNS = ("timestamp", "value")
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+# Rejected rows listed in the report; the rest are only counted
+MAX_REPORTED_REJECTS = 1000
+
+STAGING_DDL = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS measurement_import "
+    "(series_id integer, sensor_id integer, value double precision, timestamp timestamptz) "
+    "ON COMMIT DELETE ROWS"
+)
+STAGING_COPY = "COPY measurement_import (series_id, sensor_id, value, timestamp) FROM STDIN"
+# Merges the staged rows and returns a per-series summary of those actually inserted;
+# sensorless rows are skipped if the series already has a sensorless reading at that time
+STAGING_MERGE = (
+    "WITH inserted AS ("
+    "INSERT INTO measurements (series_id, sensor_id, value, timestamp) "
+    "SELECT series_id, sensor_id, value, timestamp FROM measurement_import i "
+    "WHERE i.sensor_id IS NOT NULL OR NOT EXISTS ("
+    "SELECT 1 FROM measurements m WHERE m.series_id = i.series_id "
+    "AND m.timestamp = i.timestamp AND m.sensor_id IS NULL) "
+    "ON CONFLICT (sensor_id, timestamp) DO NOTHING "
+    "RETURNING series_id, value, timestamp) "
+    "SELECT series_id, count(*), min(timestamp), max(timestamp), min(value), max(value), "
+    "(array_agg(value ORDER BY timestamp DESC))[1] FROM inserted GROUP BY series_id"
+)
+
+
+class ImportFormatError(ValueError):
+    """The file cannot be read at all (unknown format, missing columns)"""
+
+
+@dataclass
+class Rejected:
+    line: int
+    reason: str
+
+
+@dataclass
+class ImportReport:
+    rows: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    rejected: int = 0
+    rejected_rows: list[Rejected] = field(default_factory=list)
+    seconds: float = 0.0
+    # Optional callback receiving every rejected row, e.g. to write a full reject file
+    sink: Callable[[int, str], None] | None = field(default=None, repr=False)
+
+    def reject(self, line: int, reason: str):
+        self.rejected += 1
+        if len(self.rejected_rows) < MAX_REPORTED_REJECTS:
+            self.rejected_rows.append(Rejected(line, reason))
+        if self.sink is not None:
+            self.sink(line, reason)
+
+
+def detect_format(filename: str | None, explicit: str | None = None) -> str:
+    if explicit:
+        if explicit not in FORMATS:
+            raise ImportFormatError(f"Unknown format '{explicit}', expected one of {', '.join(FORMATS)}")
+        return explicit
+    name = (filename or "").lower()
+    if name.endswith(".parquet") or name.endswith(".pq"):
+        return "parquet"
+    return "csv"
+
+
+def _check_columns(columns, default_series: int | None):
+    missing = [c for c in REQUIRED_COLUMNS if c not in columns]
+    if "series_id" not in columns and default_series is None:
+        missing.append("series_id")
+    if missing:
+        raise ImportFormatError(f"Missing column(s): {', '.join(missing)}")
+
+
+def iter_csv_chunks(stream: BinaryIO, chunk_rows: int, default_series: int | None = None,
+                    compressed: bool = False) -> Iterator[list[tuple]]:
+    """Yield lists of (line, series_id, sensor_id, timestamp, value) raw tuples"""
+    if compressed:
+        stream = gzip.GzipFile(fileobj=stream)
+    reader = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    header = [h.strip().lower() for h in next(reader, [])]
+    _check_columns(header, default_series)
+    index = {name: i for i, name in enumerate(header)}
+    i_series, i_sensor = index.get("series_id"), index.get("sensor_id")
+    i_ts, i_value = index["timestamp"], index["value"]
+
+    chunk = []
+    for row in reader:
+        if not row:
+            continue
+        line = reader.line_num
+        try:
+            chunk.append((
+                line,
+                row[i_series] if i_series is not None else default_series,
+                row[i_sensor] if i_sensor is not None else None,
+                row[i_ts],
+                row[i_value],
+            ))
+        except IndexError:
+            chunk.append((line, None, None, None, None))
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_parquet_chunks(stream: BinaryIO, chunk_rows: int,
+                        default_series: int | None = None) -> Iterator[list[tuple]]:
+    if pq is None:
+        raise ImportFormatError("Parquet import requires pyarrow")
+    parquet = pq.ParquetFile(stream)
+    columns = [name.lower() for name in parquet.schema_arrow.names]
+    _check_columns(columns, default_series)
+    wanted = [name for name in parquet.schema_arrow.names
+              if name.lower() in ("series_id", "sensor_id", "timestamp", "value")]
+
+    line = 0
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=wanted):
+        data = {name.lower(): _column_to_list(batch.column(i)) for i, name in enumerate(batch.schema.names)}
+        n = batch.num_rows
+        series = data.get("series_id") or [default_series] * n
+        sensors = data.get("sensor_id") or [None] * n
+        yield list(zip(range(line + 1, line + n + 1), series, sensors, data["timestamp"], data["value"]))
+        line += n
+
+
+def _column_to_list(column) -> list:
+    if not pa.types.is_timestamp(column.type):
+        return column.to_pylist()
+    # Arrow's own conversion of zoned timestamps costs tens of microseconds per value
+    per_us = {"s": 1_000_000, "ms": 1_000, "us": 1, "ns": 0.001}[column.type.unit]
+    return [None if v is None else EPOCH + timedelta(microseconds=v * per_us)
+            for v in column.cast(pa.int64()).to_pylist()]
+
+
+def _to_timestamp(raw) -> datetime:
+    if isinstance(raw, datetime):
+        return raw if raw.tzinfo else raw.replace(tzinfo=timezone.utc)
+    if isinstance(raw, (int, float)):
+        return datetime.fromtimestamp(raw, timezone.utc)
+    if "-" in raw or ":" in raw:
+        # ISO 8601 fast path; parse_timestamp tries epoch seconds first, which raises for these
+        parsed = datetime.fromisoformat(raw.strip())
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    return parse_timestamp(raw.strip())
+
+
+class MeasurementImporter:
+    """Validates and loads chunks of raw rows into the measurements table"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.ranges = {sid: (lo, hi) for sid, lo, hi in
+                       db.query(Series.id, Series.min_value, Series.max_value).all()}
+        self.sensor_series = dict(db.query(Sensor.id, Sensor.series_id).all())
+        self.use_copy = db.get_bind().dialect.name == "postgresql"
+
+    def validate(self, chunk: list[tuple], report: ImportReport) -> list[tuple]:
+        """Return (series_id, sensor_id, value, timestamp) tuples for the valid rows"""
+        valid = []
+        ranges, sensor_series = self.ranges, self.sensor_series
+        for line, series_id, sensor_id, raw_ts, raw_value in chunk:
+            try:
+                series_id = int(series_id)
+                sensor_id = int(sensor_id) if sensor_id not in (None, "") else None
+                value = float(raw_value)
+                timestamp = _to_timestamp(raw_ts)
+            except (TypeError, ValueError, OverflowError, AttributeError):
+                report.reject(line, "malformed row")
+                continue
+
+            bounds = ranges.get(series_id)
+            if bounds is None:
+                report.reject(line, f"unknown series {series_id}")
+            elif not math.isfinite(value) or value < bounds[0] or value > bounds[1]:
+                report.reject(line, f"value {value} outside [{bounds[0]}, {bounds[1]}]")
+            elif sensor_id is not None and sensor_series.get(sensor_id) != series_id:
+                report.reject(line, f"sensor {sensor_id} does not write to series {series_id}")
+            else:
+                valid.append((series_id, sensor_id, value, timestamp))
+        return valid
+
+    def load(self, rows: list[tuple]) -> int:
+        """Insert one validated chunk, one transaction per shard it touches; returns rows inserted"""
+        if not rows:
+            return 0
+        by_shard: dict[int, list[tuple]] = {}
+        for row in rows:
+            by_shard.setdefault(shards.shard_of(row[0]), []).append(row)
+        inserted = 0
+        for shard, shard_rows in sorted(by_shard.items()):
+            if shard == 0:
+                inserted += self._load_into(self.db, shard_rows)
+                continue
+            db = shards.session(shard)
+            try:
+                inserted += self._load_into(db, shard_rows)
+            finally:
+                db.close()
+        # COPY does not report the inserted rows, so their series reload their recent windows
+        for series_id in {row[0] for row in rows}:
+            recent_buffer.invalidate(series_id)
+        return inserted
+
+    def _load_into(self, db: Session, rows: list[tuple]) -> int:
+        # The measurements connection; on a shard session plain db.connection() is the primary
+        conn = db.connection(bind_arguments={"mapper": Measurement})
+        rows = self._drop_known(db, rows)
+        if not rows:
+            deltas = {}
+        elif self.use_copy:
+            deltas = self._copy_and_merge(conn, rows)
+        else:
+            stmt = dialect_insert(conn, Measurement).on_conflict_do_nothing(
+                index_elements=["sensor_id", "timestamp"]
+            ).returning(Measurement.series_id, Measurement.value, Measurement.timestamp)
+            deltas = series_stats.collect(conn.execute(stmt, [
+                {"series_id": s, "sensor_id": sensor, "value": v, "timestamp": t}
+                for s, sensor, v, t in rows
+            ]).all())
+        series_stats.apply(db, deltas)
+        db.commit()
+        return sum(delta.count for delta in deltas.values())
+
+    def _drop_known(self, db: Session, rows: list[tuple]) -> list[tuple]:
+        """Rows not yet stored, for the keys the unique constraint cannot check.
+
+        Drops rows packed in cold chunks or archived, and sensorless rows
+        repeated within the chunk. Sensorless rows already in the hot table
+        are dropped here too, except on PostgreSQL where STAGING_MERGE skips
+        them.
+        """
+        keys = [(series_id, sensor_id, timestamp) for series_id, sensor_id, _, timestamp in rows]
+        packed = packed_indexes(db, keys) | archive.archived_indexes(db, keys)
+        seen = set()
+        if not self.use_copy:
+            seen = self._stored_sensorless(db, [row for row in rows if row[1] is None])
+        kept = []
+        for index, row in enumerate(rows):
+            if index in packed:
+                continue
+            if row[1] is None:
+                key = (row[0], to_us(row[3]))
+                if key in seen:
+                    continue
+                seen.add(key)
+            kept.append(row)
+        return kept
+
+    @staticmethod
+    def _stored_sensorless(db: Session, rows: list[tuple]) -> set[tuple[int, int]]:
+        """(series_id, timestamp_us) of hot sensorless readings within the time span of `rows`, per series"""
+        spans: dict[int, tuple[datetime, datetime]] = {}
+        for series_id, _, _, timestamp in rows:
+            low, high = spans.get(series_id, (timestamp, timestamp))
+            spans[series_id] = (min(low, timestamp), max(high, timestamp))
+        stored = set()
+        for series_id, (low, high) in spans.items():
+            stored.update((series_id, to_us(timestamp)) for timestamp in db.scalars(
+                select(Measurement.timestamp).where(
+                    Measurement.series_id == series_id,
+                    Measurement.timestamp.between(low, high),
+                    Measurement.sensor_id.is_(None),
+                )
+            ))
+        return stored
+
+    def _copy_and_merge(self, conn, rows: list[tuple]) -> dict[int, series_stats.StatsDelta]:
+        conn.execute(text(STAGING_DDL))
+        buffer = io.StringIO()
+        for series_id, sensor_id, value, timestamp in rows:
+            sensor = r"\N" if sensor_id is None else sensor_id
+            buffer.write(f"{series_id}\t{sensor}\t{value!r}\t{timestamp.isoformat()}\n")
+        buffer.seek(0)
+        cursor = conn.connection.cursor()
+        try:
+            if hasattr(cursor, "copy_expert"):
+                cursor.copy_expert(STAGING_COPY, buffer)
+            else:
+                # psycopg 3
+                with cursor.copy(STAGING_COPY) as copy:
+                    copy.write(buffer.getvalue())
+        finally:
+            cursor.close()
+        return {
+            series_id: series_stats.StatsDelta(count, first, last, low, high, last_value)
+            for series_id, count, first, last, low, high, last_value in conn.execute(text(STAGING_MERGE))
+        }
+
+    def run(self, chunks: Iterator[list[tuple]], report: ImportReport | None = None) -> ImportReport:
+        report = report or ImportReport()
+        started = time.perf_counter()
+        for chunk in chunks:
+            report.rows += len(chunk)
+            rows = self.validate(chunk, report)
+            inserted = self.load(rows)
+            report.inserted += inserted
+            report.duplicates += len(rows) - inserted
+        report.seconds = time.perf_counter() - started
+        return report
+
+
+def import_file(db: Session, stream: BinaryIO, filename: str | None = None, fmt: str | None = None,
+                default_series: int | None = None, chunk_rows: int = 50000,
+                report: ImportReport | None = None) -> ImportReport:
+    fmt = detect_format(filename, fmt)
+    if fmt == "parquet":
+        chunks = iter_parquet_chunks(stream, chunk_rows, default_series)
+    else:
+        compressed = (filename or "").lower().endswith(".gz")
+        chunks = iter_csv_chunks(stream, chunk_rows, default_series, compressed=compressed)
+    return MeasurementImporter(db).run(chunks, report)
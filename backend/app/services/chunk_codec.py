@@ -0,0 +1,127 @@
+"""Columnar codec for cold measurement chunks.
+
+Timestamps are stored as delta-of-delta microseconds and values as the XOR
+of consecutive IEEE-754 bit patterns (the Gorilla scheme), so regular
+cadences and slowly changing readings turn into long runs of zero bytes.
+Each column is byte-shuffled before compression with zstd (zlib when the
+zstandard package is unavailable).
+"""
+import struct
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zlib fallback
+    zstandard = None
+
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<BI")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NULL_SENSOR = -1
+
+
+def to_us(value: datetime) -> int:
+    """Microseconds since the epoch; naive datetimes are taken as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def from_us(value: int) -> datetime:
+    return datetime.fromtimestamp(value // 1_000_000, timezone.utc).replace(microsecond=value % 1_000_000)
+
+
+@dataclass
+class ColumnBlock:
+    ids: np.ndarray
+    timestamps: np.ndarray
+    values: np.ndarray
+    sensor_ids: np.ndarray
+    created_at: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, keep: np.ndarray) -> "ColumnBlock":
+        return ColumnBlock(
+            self.ids[keep], self.timestamps[keep], self.values[keep],
+            self.sensor_ids[keep], self.created_at[keep],
+        )
+
+
+def _delta(a: np.ndarray) -> np.ndarray:
+    return np.diff(a, prepend=np.int64(0))
+
+
+def _undelta(a: np.ndarray) -> np.ndarray:
+    return np.cumsum(a, dtype=np.int64)
+
+
+def _xor(values: np.ndarray) -> np.ndarray:
+    bits = values.view(np.uint64)
+    prev = np.concatenate([np.zeros(1, dtype=np.uint64), bits[:-1]])
+    return bits ^ prev
+
+
+def _unxor(bits: np.ndarray) -> np.ndarray:
+    return np.bitwise_xor.accumulate(bits).view(np.float64)
+
+
+def _shuffle(a: np.ndarray) -> bytes:
+    return a.view(np.uint8).reshape(-1, 8).T.tobytes()
+
+
+def _unshuffle(raw: bytes, n: int, dtype) -> np.ndarray:
+    return np.frombuffer(raw, dtype=np.uint8).reshape(8, n).T.copy().view(dtype).ravel()
+
+
+def _compress(raw: bytes) -> tuple[bytes, str]:
+    if zstandard is not None:
+        return zstandard.ZstdCompressor(level=9).compress(raw), "zstd"
+    return zlib.compress(raw, 6), "zlib"
+
+
+def _decompress(data: bytes, codec: str) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed chunks")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    raise ValueError(f"Unknown chunk codec '{codec}'")
+
+
+def encode(block: ColumnBlock) -> tuple[bytes, str]:
+    """Encode a block sorted by timestamp; returns (payload, codec)"""
+    n = len(block)
+    columns = (
+        _delta(block.ids.astype(np.int64)),
+        _delta(_delta(block.timestamps.astype(np.int64))),
+        _xor(block.values.astype(np.float64)),
+        _delta(block.sensor_ids.astype(np.int64)),
+        _delta(_delta(block.created_at.astype(np.int64))),
+    )
+    raw = _HEADER.pack(FORMAT_VERSION, n) + b"".join(_shuffle(c) for c in columns)
+    return _compress(raw)
+
+
+def decode(data: bytes, codec: str) -> ColumnBlock:
+    raw = _decompress(data, codec)
+    version, n = _HEADER.unpack_from(raw)
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported chunk format version {version}")
+
+    size = n * 8
+    parts = [raw[_HEADER.size + i * size:_HEADER.size + (i + 1) * size] for i in range(5)]
+    return ColumnBlock(
+        ids=_undelta(_unshuffle(parts[0], n, np.int64)),
+        timestamps=_undelta(_undelta(_unshuffle(parts[1], n, np.int64))),
+        values=_unxor(_unshuffle(parts[2], n, np.uint64)),
+        sensor_ids=_undelta(_unshuffle(parts[3], n, np.int64)),
+        created_at=_undelta(_undelta(_unshuffle(parts[4], n, np.int64))),
+    )
@@ -0,0 +1,293 @@
+"""Cold tier: packs old measurements into compressed per-series chunks.
+
+Readings older than COLD_STORAGE_AFTER_DAYS are grouped into windows of
+COLD_CHUNK_HOURS aligned to the epoch, encoded with `chunk_codec` and moved
+out of the `measurements` table. Late readings that land in an already
+compacted window are merged into the existing chunk on the next run.
+
+Packed readings are outside the (sensor_id, timestamp) unique constraint,
+so ingest checks readings older than COLD_STORAGE_AFTER_DAYS against the
+chunks (`packed_indexes`), and thawing skips rows that were inserted again
+in the meantime.
+"""
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import select, delete, func, lambda_stmt
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+from app.models.measurement import Measurement
+from app.models.measurement_chunk import MeasurementChunk
+from app.models.sensor import Sensor
+from app.services import chunk_codec
+from app.services.chunk_codec import ColumnBlock, to_us, from_us, NULL_SENSOR
+from app.utils.sql import dialect_insert
+
+logger = logging.getLogger(__name__)
+
+
+def rows_to_block(rows) -> ColumnBlock:
+    """Build a block from (id, timestamp, value, sensor_id, created_at) rows"""
+    ids, timestamps, values, sensor_ids, created_at = zip(*rows)
+    return ColumnBlock(
+        ids=np.array(ids, dtype=np.int64),
+        timestamps=np.array([to_us(t) for t in timestamps], dtype=np.int64),
+        values=np.array(values, dtype=np.float64),
+        sensor_ids=np.array([NULL_SENSOR if s is None else s for s in sensor_ids], dtype=np.int64),
+        created_at=np.array([to_us(c) for c in created_at], dtype=np.int64),
+    )
+
+
+def concat_blocks(blocks: list[ColumnBlock]) -> ColumnBlock:
+    """Concatenate blocks and sort the result by (timestamp, id)"""
+    merged = ColumnBlock(*(np.concatenate([getattr(b, f) for b in blocks]) for f in
+                           ("ids", "timestamps", "values", "sensor_ids", "created_at")))
+    return merged.mask(np.lexsort((merged.ids, merged.timestamps)))
+
+
+def _window_start(ts: datetime, span: timedelta) -> datetime:
+    span_us = int(span.total_seconds() * 1_000_000)
+    return from_us(to_us(ts) // span_us * span_us)
+
+
+def _write_chunk(db: Session, series_id: int, block: ColumnBlock):
+    data, codec = chunk_codec.encode(block)
+    db.add(MeasurementChunk(
+        series_id=series_id,
+        start_ts=from_us(int(block.timestamps[0])),
+        end_ts=from_us(int(block.timestamps[-1])),
+        min_id=int(block.ids.min()),
+        max_id=int(block.ids.max()),
+        row_count=len(block),
+        min_value=float(block.values.min()),
+        max_value=float(block.values.max()),
+        codec=codec,
+        data=data,
+    ))
+    return len(data)
+
+
+def compact_series(db: Session, series_id: int, before: datetime, span: timedelta) -> dict:
+    """Move hot rows of one series older than `before` into chunks, one window per commit"""
+    result = {"series_id": series_id, "rows": 0, "chunks": 0, "bytes": 0}
+    cursor = db.query(func.min(Measurement.timestamp)).filter(
+        Measurement.series_id == series_id,
+        Measurement.timestamp < before
+    ).scalar()
+
+    while cursor is not None:
+        window_start = _window_start(cursor, span)
+        window_end = window_start + span
+        if to_us(window_end) > to_us(before):
+            break
+
+        rows = db.execute(
+            select(Measurement.id, Measurement.timestamp, Measurement.value,
+                   Measurement.sensor_id, Measurement.created_at)
+            .where(Measurement.series_id == series_id,
+                   Measurement.timestamp >= window_start,
+                   Measurement.timestamp < window_end)
+        ).all()
+
+        blocks = [rows_to_block(rows)]
+        existing = db.query(MeasurementChunk).filter(
+            MeasurementChunk.series_id == series_id,
+            MeasurementChunk.start_ts < window_end,
+            MeasurementChunk.end_ts >= window_start
+        ).all()
+        for chunk in existing:
+            blocks.append(chunk_codec.decode(chunk.data, chunk.codec))
+            db.delete(chunk)
+
+        block = concat_blocks(blocks)
+        result["bytes"] += _write_chunk(db, series_id, block)
+        db.execute(delete(Measurement).where(Measurement.id.in_([r[0] for r in rows])))
+        db.commit()
+
+        result["rows"] += len(rows)
+        result["chunks"] += 1
+        cursor = db.query(func.min(Measurement.timestamp)).filter(
+            Measurement.series_id == series_id,
+            Measurement.timestamp >= window_end,
+            Measurement.timestamp < before
+        ).scalar()
+
+    return result
+
+
+def iter_chunk_blocks(db: Session, series_id: int, start: datetime | None, end: datetime | None,
+                      sensor_id: int | None = None) -> Iterator[ColumnBlock]:
+    """Decoded blocks of one series in time order, trimmed to [start, end]"""
+    query = db.query(MeasurementChunk.id).filter(MeasurementChunk.series_id == series_id)
+    if start:
+        query = query.filter(MeasurementChunk.end_ts >= start)
+    if end:
+        query = query.filter(MeasurementChunk.start_ts <= end)
+    chunk_ids = [cid for (cid,) in query.order_by(MeasurementChunk.start_ts).all()]
+
+    for chunk_id in chunk_ids:
+        data, codec = db.query(MeasurementChunk.data, MeasurementChunk.codec).filter(
+            MeasurementChunk.id == chunk_id
+        ).one()
+        block = chunk_codec.decode(data, codec)
+        keep = np.ones(len(block), dtype=bool)
+        if start:
+            keep &= block.timestamps >= to_us(start)
+        if end:
+            keep &= block.timestamps <= to_us(end)
+        if sensor_id is not None:
+            keep &= block.sensor_ids == sensor_id
+        if not keep.all():
+            block = block.mask(keep)
+        if len(block):
+            yield block
+
+
+def series_with_chunks(db: Session, series_ids: list[int] | None, start: datetime | None,
+                       end: datetime | None) -> list[int]:
+    stmt = lambda_stmt(lambda: select(MeasurementChunk.series_id).distinct())
+    if series_ids is not None:
+        stmt += lambda s: s.where(MeasurementChunk.series_id.in_(series_ids))
+    if start:
+        stmt += lambda s: s.where(MeasurementChunk.end_ts >= start)
+    if end:
+        stmt += lambda s: s.where(MeasurementChunk.start_ts <= end)
+    return list(db.scalars(stmt))
+
+
+def may_be_packed(timestamp: datetime) -> bool:
+    """True for readings old enough to be in a chunk (older than COLD_STORAGE_AFTER_DAYS).
+
+    Compacting with a shorter --older-than-days packs newer readings, which
+    this check does not cover.
+    """
+    horizon = datetime.now(timezone.utc) - timedelta(days=settings.COLD_STORAGE_AFTER_DAYS)
+    return to_us(timestamp) < to_us(horizon)
+
+
+def packed_readings(db: Session, series_id: int, start: datetime, end: datetime) -> dict[tuple[int, int], tuple]:
+    """Packed readings of a series in [start, end] as {(sensor_id, timestamp_us): (id, value, created_at_us)}.
+
+    Sensorless readings use NULL_SENSOR as their sensor id.
+    """
+    packed = {}
+    for block in iter_chunk_blocks(db, series_id, start, end):
+        packed.update(zip(
+            zip(block.sensor_ids.tolist(), block.timestamps.tolist()),
+            zip(block.ids.tolist(), block.values.tolist(), block.created_at.tolist()),
+        ))
+    return packed
+
+
+def packed_indexes(db: Session, keys: list[tuple[int, int | None, datetime]]) -> set[int]:
+    """Positions in `keys` of (series_id, sensor_id, timestamp) readings already packed in chunks"""
+    return stored_indexes(db, keys, packed_readings)
+
+
+def stored_indexes(db: Session, keys: list[tuple[int, int | None, datetime]], readings) -> set[int]:
+    """Positions in `keys` found by `readings(db, series_id, start, end)` (keyed like packed_readings)"""
+    by_series: dict[int, list[int]] = {}
+    for index, (series_id, _, _) in enumerate(keys):
+        by_series.setdefault(series_id, []).append(index)
+    found = set()
+    for series_id, indexes in by_series.items():
+        stamps = [keys[index][2] for index in indexes]
+        stored = readings(db, series_id, min(stamps), max(stamps))
+        if not stored:
+            continue
+        for index in indexes:
+            _, sensor_id, timestamp = keys[index]
+            if (NULL_SENSOR if sensor_id is None else sensor_id, to_us(timestamp)) in stored:
+                found.add(index)
+    return found
+
+
+def find_chunk(db: Session, measurement_id: int) -> tuple[MeasurementChunk, ColumnBlock, int] | None:
+    """Locate the chunk holding a measurement id; returns (chunk, block, index)"""
+    candidates = db.query(MeasurementChunk).filter(
+        MeasurementChunk.min_id <= measurement_id,
+        MeasurementChunk.max_id >= measurement_id
+    ).all()
+    for chunk in candidates:
+        block = chunk_codec.decode(chunk.data, chunk.codec)
+        hits = np.nonzero(block.ids == measurement_id)[0]
+        if len(hits):
+            return chunk, block, int(hits[0])
+    return None
+
+
+def thaw_chunk(db: Session, chunk: MeasurementChunk, block: ColumnBlock | None = None) -> int:
+    """Move a chunk's rows back into the hot table so they can be edited.
+
+    Rows whose (sensor_id, timestamp) was inserted again after packing are
+    dropped in favour of the hot copy; returns how many were dropped.
+    """
+    if block is None:
+        block = chunk_codec.decode(chunk.data, chunk.codec)
+    # Sensors deleted since packing lose their readings' attribution (ON DELETE SET NULL)
+    referenced = [int(sid) for sid in np.unique(block.sensor_ids) if sid != NULL_SENSOR]
+    live = {sid for (sid,) in db.query(Sensor.id).filter(Sensor.id.in_(referenced)).all()} if referenced else set()
+    stmt = dialect_insert(db.get_bind(Measurement), Measurement).on_conflict_do_nothing().returning(Measurement.id)
+    restored = db.execute(stmt, [
+        {
+            "id": mid,
+            "series_id": chunk.series_id,
+            "sensor_id": sid if sid in live else None,
+            "value": value,
+            "timestamp": from_us(ts),
+            "created_at": from_us(created),
+        }
+        for mid, ts, value, sid, created in zip(
+            block.ids.tolist(), block.timestamps.tolist(), block.values.tolist(),
+            block.sensor_ids.tolist(), block.created_at.tolist()
+        )
+    ]).all()
+    db.delete(chunk)
+    db.flush()
+    dropped = len(block) - len(restored)
+    if dropped:
+        logger.warning("Thawing chunk %s of series %s dropped %d readings already in the hot table",
+                       chunk.id, chunk.series_id, dropped)
+    return dropped
+
+
+def thaw_measurement(db: Session, measurement_id: int) -> bool:
+    found = find_chunk(db, measurement_id)
+    if found is None:
+        return False
+    chunk, block, _ = found
+    thaw_chunk(db, chunk, block)
+    return True
+
+
+def rewrite_chunks(db: Session, series_id: int, start: datetime, end: datetime, rewrite) -> int:
+    """Apply `rewrite(block, in_range) -> (block, affected)` to chunks overlapping [start, end].
+
+    Chunks the rewrite touches are re-encoded (or dropped when left empty),
+    one chunk per transaction. Returns the total number of affected rows.
+    """
+    chunk_ids = [cid for (cid,) in db.query(MeasurementChunk.id).filter(
+        MeasurementChunk.series_id == series_id,
+        MeasurementChunk.end_ts >= start,
+        MeasurementChunk.start_ts <= end
+    ).order_by(MeasurementChunk.start_ts).all()]
+
+    affected = 0
+    for chunk_id in chunk_ids:
+        chunk = db.get(MeasurementChunk, chunk_id)
+        block = chunk_codec.decode(chunk.data, chunk.codec)
+        in_range = (block.timestamps >= to_us(start)) & (block.timestamps <= to_us(end))
+        block, changed = rewrite(block, in_range)
+        if not changed:
+            db.expunge(chunk)
+            continue
+        db.delete(chunk)
+        if len(block):
+            _write_chunk(db, series_id, block)
+        db.commit()
+        affected += changed
+    return affected
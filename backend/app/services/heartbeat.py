@@ -0,0 +1,109 @@
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import update, bindparam, case
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.sensor import Sensor
+
+logger = logging.getLogger(__name__)
+
+
+class HeartbeatTracker:
+    """Keeps sensor last-seen times in memory and writes them back in batches.
+
+    Ingest only touches a dict; every `flush_interval` seconds the sensors
+    seen since the previous flush get one executemany UPDATE. The UPDATE
+    never moves `last_seen` backwards, so several workers can flush safely.
+    """
+
+    def __init__(self, session_factory, flush_interval: float):
+        self._session_factory = session_factory
+        self._flush_interval = flush_interval
+        self._seen: dict[int, datetime] = {}
+        self._dirty: dict[int, datetime] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def beat(self, sensor_id: int, at: datetime | None = None):
+        at = at or datetime.now(timezone.utc)
+        with self._lock:
+            self._seen[sensor_id] = at
+            self._dirty[sensor_id] = at
+
+    def last_seen(self, sensor_id: int) -> datetime | None:
+        return self._seen.get(sensor_id)
+
+    def forget(self, sensor_id: int):
+        with self._lock:
+            self._seen.pop(sensor_id, None)
+            self._dirty.pop(sensor_id, None)
+
+    def flush(self) -> int:
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+
+        table = Sensor.__table__
+        stmt = update(table).where(table.c.id == bindparam("b_id")).values(
+            last_seen=case(
+                (table.c.last_seen.is_(None), bindparam("b_seen")),
+                (table.c.last_seen < bindparam("b_seen"), bindparam("b_seen")),
+                else_=table.c.last_seen,
+            )
+        )
+        db = self._session_factory()
+        try:
+            db.execute(stmt, [{"b_id": sid, "b_seen": seen} for sid, seen in dirty.items()])
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Keep the newer of the failed and any fresh heartbeats for the next attempt
+            with self._lock:
+                for sid, seen in dirty.items():
+                    self._dirty.setdefault(sid, seen)
+            logger.exception("Failed to flush %d sensor heartbeats", len(dirty))
+            return 0
+        finally:
+            db.close()
+        return len(dirty)
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-heartbeat-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(self._flush_interval + 5)
+        self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.wait(self._flush_interval):
+            self.flush()
+
+
+def sensor_status(last_seen: datetime | None, now: datetime) -> tuple[str, float | None]:
+    """Classify a sensor as online, stale or offline from its last heartbeat"""
+    if last_seen is None:
+        return "offline", None
+    if last_seen.tzinfo is None:
+        last_seen = last_seen.replace(tzinfo=timezone.utc)
+    age = (now - last_seen).total_seconds()
+    if age <= settings.SENSOR_STALE_SECONDS:
+        return "online", age
+    if age <= settings.SENSOR_OFFLINE_SECONDS:
+        return "stale", age
+    return "offline", age
+
+
+heartbeats = HeartbeatTracker(SessionLocal, settings.HEARTBEAT_FLUSH_SECONDS)
@@ -0,0 +1,147 @@
+import logging
+import queue
+import threading
+import time
+
+from app.config import settings
+from app.models.measurement import Measurement
+from app.services import series_stats
+from app.services import archive
+from app.services.cold_storage import may_be_packed, packed_indexes
+from app.services.recent_buffer import recent_buffer
+from app.services.sharding import shards
+from app.utils.sql import dialect_insert, per_dialect
+
+logger = logging.getLogger(__name__)
+
+
+@per_dialect
+def _insert_batch(bind):
+    return dialect_insert(bind, Measurement).on_conflict_do_nothing(
+        index_elements=["sensor_id", "timestamp"]
+    ).returning(
+        Measurement.id, Measurement.series_id, Measurement.sensor_id, Measurement.value, Measurement.timestamp,
+        Measurement.created_at.label("created_at"),
+    )
+
+
+class BatchWriter:
+    """Collects measurement rows from any thread and inserts them in batches.
+
+    A single background thread drains the queue and issues one multi-row
+    INSERT per batch, flushing when the batch is full or `flush_interval`
+    seconds have passed since the first queued row. Readings a sensor has
+    already delivered are skipped by the (sensor_id, timestamp) constraint
+    (or, for readings old enough to be packed, by a check of the cold chunks),
+    and the rows actually inserted are folded into `series_stats` in the same
+    transaction. A batch spanning several shards is written as one
+    transaction per shard.
+    """
+
+    def __init__(self, shard_set, batch_size: int, flush_interval: float, max_queue: int):
+        self._shards = shard_set
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread: threading.Thread | None = None
+        self._stopping = threading.Event()
+        self.counters = {"queued": 0, "written": 0, "duplicates": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="measurement-batch-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Flush whatever is queued and stop the writer thread"""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def submit(self, row: dict) -> bool:
+        """Queue a row for insertion; returns False when the queue is full"""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["queued"] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {**self.counters, "pending": self._queue.qsize()}
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if batch:
+                self._flush(batch)
+
+    def _collect(self) -> list[dict]:
+        try:
+            batch = [self._queue.get(timeout=0.2)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (self._stopping.is_set() and self._queue.empty()):
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, rows: list[dict]):
+        by_shard: dict[int, list[dict]] = {}
+        try:
+            for row in rows:
+                by_shard.setdefault(self._shards.shard_of(row["series_id"]), []).append(row)
+        except LookupError:
+            self.counters["failed"] += len(rows)
+            logger.exception("Failed to route batch of %d measurements", len(rows))
+            return
+        for shard, shard_rows in sorted(by_shard.items()):
+            self._write(shard, shard_rows)
+
+    def _write(self, shard: int, rows: list[dict]):
+        db = self._shards.session(shard)
+        try:
+            # Old readings may already sit in cold chunks or archives, outside the unique constraint
+            keys = [(row["series_id"], row["sensor_id"], row["timestamp"]) for row in rows]
+            old = [index for index, key in enumerate(keys) if may_be_packed(key[2])]
+            packed = {old[i] for i in packed_indexes(db, [keys[index] for index in old])} if old else set()
+            packed |= archive.archived_indexes(db, keys)
+            fresh = [row for index, row in enumerate(rows) if index not in packed]
+            written = db.execute(_insert_batch(db.get_bind()), fresh).all() if fresh else []
+            series_stats.apply(db, series_stats.collect((row.series_id, row.value, row.timestamp) for row in written))
+            db.commit()
+            recent_buffer.record(written)
+            inserted = len(written)
+            self.counters["written"] += inserted
+            self.counters["duplicates"] += len(rows) - inserted
+            self.counters["batches"] += 1
+        except Exception:
+            db.rollback()
+            self.counters["failed"] += len(rows)
+            logger.exception("Failed to write batch of %d measurements", len(rows))
+        finally:
+            db.close()
+
+
+batch_writer = BatchWriter(
+    shards,
+    batch_size=settings.INGEST_BATCH_SIZE,
+    flush_interval=settings.INGEST_FLUSH_INTERVAL,
+    max_queue=settings.INGEST_QUEUE_SIZE,
+)
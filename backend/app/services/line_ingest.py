@@ -0,0 +1,243 @@
+"""Fire-and-forget line-protocol ingest over UDP and TCP.
+
+Each line has the form ``sensor_id,api_key,value[,timestamp]`` where the
+timestamp is ISO 8601 or Unix epoch seconds (defaults to the arrival time).
+A UDP datagram may carry several newline-separated lines. Nothing is sent
+back to the client; outcomes are only visible through the counters.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from app.services.alerts import AlertEngine, alert_engine
+from app.services.heartbeat import HeartbeatTracker, heartbeats
+from app.services.ingest_writer import BatchWriter, batch_writer
+from app.services.sensor_cache import SensorCache, SensorInfo, sensor_cache
+from app.services.traffic_capture import TrafficRecorder, traffic_recorder
+from app.utils.rate_limit import TokenBucketLimiter, sensor_limiter
+
+logger = logging.getLogger(__name__)
+
+MAX_LINE_LENGTH = 1024
+
+
+@dataclass(frozen=True)
+class Reading:
+    sensor_id: int
+    api_key: str
+    value: float
+    timestamp: datetime
+
+
+def parse_timestamp(raw: str) -> datetime:
+    if not raw:
+        return datetime.now(timezone.utc)
+    try:
+        epoch = float(raw)
+    except ValueError:
+        epoch = None
+    if epoch is not None:
+        try:
+            return datetime.fromtimestamp(epoch, timezone.utc)
+        except (ValueError, OverflowError, OSError) as exc:
+            # Huge, infinite or NaN epochs; callers only expect ValueError
+            raise ValueError(f"timestamp {raw!r} out of range") from exc
+    parsed = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def parse_line(line: str) -> Reading:
+    """Parse one ``sensor_id,api_key,value[,timestamp]`` line; raises ValueError"""
+    parts = line.strip().split(",")
+    if len(parts) not in (3, 4):
+        raise ValueError(f"expected 3 or 4 fields, got {len(parts)}")
+    value = float(parts[2])
+    if value != value or value in (float("inf"), float("-inf")):
+        raise ValueError("value must be finite")
+    return Reading(
+        sensor_id=int(parts[0]),
+        api_key=parts[1],
+        value=value,
+        timestamp=parse_timestamp(parts[3].strip() if len(parts) == 4 else ""),
+    )
+
+
+class LineIngestor:
+    """Authenticates, range-checks and queues parsed readings"""
+
+    def __init__(self, cache: SensorCache, writer: BatchWriter, tracker: HeartbeatTracker,
+                 limiter: TokenBucketLimiter, recorder: TrafficRecorder, alerts: AlertEngine):
+        self._cache = cache
+        self._writer = writer
+        self._tracker = tracker
+        self._limiter = limiter
+        self._recorder = recorder
+        self._alerts = alerts
+        # Readings waiting on an in-flight sensor lookup, by sensor id (event loop thread only)
+        self._pending: dict[int, list[Reading]] = {}
+        self.counters = {
+            "received": 0,
+            "accepted": 0,
+            "malformed": 0,
+            "unauthorized": 0,
+            "out_of_range": 0,
+            "rate_limited": 0,
+            "dropped": 0,
+        }
+
+    def handle_line(self, line: str, loop: asyncio.AbstractEventLoop | None = None):
+        """Process one line; cache misses are resolved off the event loop when one is given.
+
+        Misses for a sensor whose lookup is already running wait for that
+        lookup instead of starting another.
+        """
+        self.counters["received"] += 1
+        if len(line) > MAX_LINE_LENGTH:
+            self.counters["malformed"] += 1
+            return
+        try:
+            reading = parse_line(line)
+        except ValueError:
+            self.counters["malformed"] += 1
+            return
+
+        hit, info = self._cache.lookup(reading.sensor_id)
+        if hit:
+            self._accept(reading, info)
+        elif loop is None:
+            self._resolve_and_accept(reading)
+        elif reading.sensor_id in self._pending:
+            self._pending[reading.sensor_id].append(reading)
+        else:
+            self._pending[reading.sensor_id] = [reading]
+            lookup = loop.run_in_executor(None, self._cache.get, reading.sensor_id)
+            lookup.add_done_callback(lambda done, sensor_id=reading.sensor_id: self._resolved(sensor_id, done))
+
+    def _resolved(self, sensor_id: int, lookup: asyncio.Future):
+        # Runs on the event loop once the executor lookup finishes
+        readings = self._pending.pop(sensor_id, [])
+        if lookup.cancelled() or lookup.exception() is not None:
+            self.counters["dropped"] += len(readings)
+            if not lookup.cancelled():
+                logger.error("Sensor lookup failed for sensor %s", sensor_id, exc_info=lookup.exception())
+            return
+        info = lookup.result()
+        for reading in readings:
+            self._accept(reading, info)
+
+    def _resolve_and_accept(self, reading: Reading):
+        try:
+            info = self._cache.get(reading.sensor_id)
+        except Exception:
+            self.counters["dropped"] += 1
+            logger.exception("Sensor lookup failed for sensor %s", reading.sensor_id)
+            return
+        self._accept(reading, info)
+
+    def _accept(self, reading: Reading, info: SensorInfo | None):
+        if info is None or not info.is_active or not self._cache.verify_key(info, reading.api_key):
+            self.counters["unauthorized"] += 1
+            return
+        if reading.value < info.min_value or reading.value > info.max_value:
+            self.counters["out_of_range"] += 1
+            return
+        if self._limiter.acquire(info.id, info.rate_limit):
+            self.counters["rate_limited"] += 1
+            return
+
+        queued = self._writer.submit({
+            "series_id": info.series_id,
+            "sensor_id": info.id,
+            "value": reading.value,
+            "timestamp": reading.timestamp,
+        })
+        if queued:
+            self.counters["accepted"] += 1
+            self._tracker.beat(info.id)
+            self._recorder.record(info.id, info.series_id, reading.value, reading.timestamp, "line")
+            self._alerts.observe(info.series_id, info.id, reading.value, reading.timestamp)
+        else:
+            self.counters["dropped"] += 1
+
+    def handle_payload(self, payload: bytes, loop: asyncio.AbstractEventLoop | None = None):
+        try:
+            text = payload.decode("utf-8")
+        except UnicodeDecodeError:
+            self.counters["received"] += 1
+            self.counters["malformed"] += 1
+            return
+        for line in text.splitlines():
+            if line.strip():
+                self.handle_line(line, loop)
+
+
+class _DatagramProtocol(asyncio.DatagramProtocol):
+    def __init__(self, ingestor: LineIngestor):
+        self._ingestor = ingestor
+
+    def datagram_received(self, data: bytes, addr):
+        self._ingestor.handle_payload(data, asyncio.get_running_loop())
+
+
+class LineIngestServer:
+    """Runs the UDP and/or TCP listeners on the current event loop"""
+
+    def __init__(self, ingestor: LineIngestor):
+        self._ingestor = ingestor
+        self._udp_transport: asyncio.DatagramTransport | None = None
+        self._tcp_server: asyncio.AbstractServer | None = None
+
+    @property
+    def addresses(self) -> dict:
+        addresses = {}
+        if self._udp_transport is not None:
+            addresses["udp"] = self._udp_transport.get_extra_info("sockname")
+        if self._tcp_server is not None:
+            addresses["tcp"] = self._tcp_server.sockets[0].getsockname()
+        return addresses
+
+    async def start(self, host: str, udp_port: int | None = None, tcp_port: int | None = None):
+        """Bind the listeners; port 0 picks a free port (see `addresses`)"""
+        loop = asyncio.get_running_loop()
+        if udp_port is not None:
+            self._udp_transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DatagramProtocol(self._ingestor), local_addr=(host, udp_port)
+            )
+        if tcp_port is not None:
+            self._tcp_server = await asyncio.start_server(
+                self._handle_stream, host, tcp_port, limit=MAX_LINE_LENGTH * 4
+            )
+        logger.info("Line-protocol ingest listening on %s", self.addresses)
+
+    async def stop(self):
+        if self._udp_transport is not None:
+            self._udp_transport.close()
+            self._udp_transport = None
+        if self._tcp_server is not None:
+            self._tcp_server.close()
+            await self._tcp_server.wait_closed()
+            self._tcp_server = None
+
+    async def _handle_stream(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    self._ingestor.counters["received"] += 1
+                    self._ingestor.counters["malformed"] += 1
+                    break
+                if not line:
+                    break
+                self._ingestor.handle_payload(line, loop)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+line_ingestor = LineIngestor(sensor_cache, batch_writer, heartbeats, sensor_limiter, traffic_recorder, alert_engine)
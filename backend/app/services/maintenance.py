@@ -0,0 +1,70 @@
+"""Maintenance jobs run by the in-process scheduler (see services/scheduler.py)"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.job_run import JobRun
+from app.models.series import Series
+from app.services import archive, series_stats
+from app.services.cold_storage import compact_series
+from app.services.scheduler import Scheduler
+from app.services.sharding import shards
+
+
+def _series_ids(db: Session) -> list[int]:
+    return [sid for (sid,) in db.query(Series.id).order_by(Series.id).all()]
+
+
+def compact_cold_storage(db: Session) -> dict:
+    before = datetime.now(timezone.utc) - timedelta(days=settings.COLD_STORAGE_AFTER_DAYS)
+    span = timedelta(hours=settings.COLD_CHUNK_HOURS)
+    totals = {"rows": 0, "chunks": 0, "bytes": 0}
+    for series_id in _series_ids(db):
+        with shards.series_session(series_id, db) as series_db:
+            result = compact_series(series_db, series_id, before, span)
+        for key in totals:
+            totals[key] += result[key]
+    return totals
+
+
+def archive_closed_months(db: Session) -> dict:
+    before = datetime.now(timezone.utc) - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    totals = {"partitions": 0, "rows": 0, "bytes": 0, "pruned": 0}
+    for series_id in _series_ids(db):
+        with shards.series_session(series_id, db) as series_db:
+            result = archive.archive_series(series_db, series_id, before, settings.ARCHIVE_PRUNE)
+        for key in totals:
+            totals[key] += result[key]
+    return totals
+
+
+def rebuild_stale_stats(db: Session) -> dict:
+    return {"rebuilt": series_stats.rebuild_all(db, stale_only=True)}
+
+
+def rebuild_sharded_stats(db: Session) -> dict:
+    return {"rebuilt": series_stats.rebuild_all(db, sharded_only=True)}
+
+
+def purge_job_runs(db: Session) -> dict:
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.JOB_RUN_RETENTION_DAYS)
+    deleted = db.execute(delete(JobRun).where(JobRun.started_at < cutoff)).rowcount
+    db.commit()
+    return {"deleted": deleted}
+
+
+def register_maintenance_jobs(scheduler: Scheduler):
+    scheduler.register("compact_cold_storage", compact_cold_storage, settings.JOB_COMPACT_SCHEDULE,
+                       "Pack readings older than COLD_STORAGE_AFTER_DAYS into compressed chunks")
+    if archive.enabled():
+        scheduler.register("archive_closed_months", archive_closed_months, settings.JOB_ARCHIVE_SCHEDULE,
+                           "Export whole months older than ARCHIVE_AFTER_DAYS to Parquet")
+    scheduler.register("rebuild_stale_stats", rebuild_stale_stats, settings.JOB_STATS_REBUILD_SCHEDULE,
+                       "Rebuild series summaries flagged stale by deletes and edits")
+    if shards.enabled:
+        scheduler.register("rebuild_sharded_stats", rebuild_sharded_stats, settings.JOB_SHARDED_STATS_REBUILD_SCHEDULE,
+                           "Rebuild summaries of sharded series, whose readings and summary commit separately")
+    scheduler.register("purge_job_runs", purge_job_runs, settings.JOB_PURGE_RUNS_SCHEDULE,
+                       "Delete job run records older than JOB_RUN_RETENTION_DAYS")
@@ -0,0 +1,384 @@
+"""In-memory window of each series' most recent readings.
+
+Dashboards mostly ask for the last hour, which this process has just
+written. Each series keeps its readings from the last RECENT_BUFFER_SECONDS
+in preallocated column arrays (id, timestamp, value, sensor, created_at) in
+(timestamp, id) order: new readings append at the end, and readings that
+age out are dropped from the front. Arrays grow by doubling and are moved
+down when the end fills up.
+
+A series' window is loaded from the database when first read (and for all
+series at startup), then kept current by the write paths after they commit.
+Reads whose start is inside the window are answered from memory. Writes
+that are hard to replay (range edits, imports, sensor or series deletion)
+drop the series' window, and the next read loads it again. The buffer only
+sees writes made by this process.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.series import Series
+from app.services.chunk_codec import ColumnBlock, NULL_SENSOR, to_us, from_us
+from app.services.sharding import shards
+from app.services.timeseries import MeasurementRow, block_rows, iter_measurements
+
+logger = logging.getLogger(__name__)
+
+_DTYPES = (np.int64, np.int64, np.float64, np.int64, np.int64)
+# Bytes per buffered reading (five 8-byte columns)
+READING_BYTES = 40
+
+
+def _entry(row) -> tuple:
+    """(id, timestamp_us, value, sensor, created_at_us) of a measurement row or ORM object"""
+    return (
+        row.id, to_us(row.timestamp), row.value,
+        NULL_SENSOR if row.sensor_id is None else row.sensor_id, to_us(row.created_at),
+    )
+
+
+def _series_rows(series: np.ndarray, block: ColumnBlock) -> Iterator[MeasurementRow]:
+    """Rows of a block mixing series, with each row's series id in `series`"""
+    for series_id, mid, ts, value, sid, created in zip(
+        series.tolist(), block.ids.tolist(), block.timestamps.tolist(), block.values.tolist(),
+        block.sensor_ids.tolist(), block.created_at.tolist()
+    ):
+        yield MeasurementRow(
+            id=mid,
+            series_id=series_id,
+            sensor_id=None if sid == NULL_SENSOR else sid,
+            value=value,
+            timestamp=from_us(ts),
+            created_at=from_us(created),
+        )
+
+
+class SeriesWindow:
+    """Readings of one series with timestamp >= `since_us`, in (timestamp, id) order"""
+
+    def __init__(self, since_us: int, entries: list[tuple]):
+        self.since_us = since_us
+        capacity = max(64, 2 * len(entries))
+        self._cols = [np.empty(capacity, dtype=dtype) for dtype in _DTYPES]
+        self._head = 0
+        self._tail = len(entries)
+        if entries:
+            for col, values in zip(self._cols, zip(*entries)):
+                col[:len(entries)] = values
+
+    def __len__(self):
+        return self._tail - self._head
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._cols[0]) * READING_BYTES
+
+    def _live(self, index: int) -> np.ndarray:
+        return self._cols[index][self._head:self._tail]
+
+    def _reserve(self):
+        """Make room for one more reading at the end"""
+        if self._tail < len(self._cols[0]):
+            return
+        size = len(self)
+        capacity = max(64, 2 * (size + 1))
+        self._cols = [np.concatenate([col[self._head:self._tail], np.empty(capacity - size, dtype=col.dtype)])
+                      for col in self._cols]
+        self._head, self._tail = 0, size
+
+    def trim(self, since_us: int) -> int:
+        """Drop readings older than `since_us`; returns how many were dropped"""
+        if since_us <= self.since_us:
+            return 0
+        self.since_us = since_us
+        dropped = int(np.searchsorted(self._live(1), since_us, "left"))
+        self._head += dropped
+        return dropped
+
+    def insert(self, entry: tuple) -> int:
+        """Add one reading unless it is older than the window or already held; returns 1 if added"""
+        measurement_id, ts = entry[0], entry[1]
+        if ts < self.since_us:
+            return 0
+        timestamps, ids = self._live(1), self._live(0)
+        if len(self) == 0 or (ts, measurement_id) > (timestamps[-1], ids[-1]):
+            pos = len(self)
+        else:
+            lo = int(np.searchsorted(timestamps, ts, "left"))
+            hi = int(np.searchsorted(timestamps, ts, "right"))
+            if measurement_id in ids[lo:hi]:
+                return 0
+            pos = lo + int(np.searchsorted(ids[lo:hi], measurement_id))
+        self._reserve()
+        at = self._head + pos
+        for col, value in zip(self._cols, entry):
+            col[at + 1:self._tail + 1] = col[at:self._tail]
+            col[at] = value
+        self._tail += 1
+        return 1
+
+    def remove(self, measurement_id: int) -> int:
+        """Drop a reading by id; returns 1 if it was held"""
+        found = np.flatnonzero(self._live(0) == measurement_id)
+        if not len(found):
+            return 0
+        at = self._head + int(found[0])
+        for col in self._cols:
+            col[at:self._tail - 1] = col[at + 1:self._tail]
+        self._tail -= 1
+        return 1
+
+    def keep_last(self, count: int) -> int:
+        """Shrink to about the newest `count` readings, raising `since_us`; returns how many were dropped"""
+        if len(self) <= count:
+            return 0
+        return self.trim(int(self._live(1)[len(self) - count]))
+
+    def slice(self, start_us: int, end_us: int | None, limit: int | None) -> ColumnBlock:
+        timestamps = self._live(1)
+        lo = int(np.searchsorted(timestamps, start_us, "left"))
+        hi = len(self) if end_us is None else int(np.searchsorted(timestamps, end_us, "right"))
+        if limit is not None:
+            hi = min(hi, lo + limit)
+        return ColumnBlock(*(self._live(index)[lo:hi].copy() for index in range(len(_DTYPES))))
+
+
+class RecentBuffer:
+    """Recent-window buffers of the series this process reads, bounded by a total reading count.
+
+    Series are evicted least recently read first when the total exceeds
+    `max_readings`. Writes for a series whose window is being loaded are
+    queued and replayed on the loaded window, so none are lost in between.
+    """
+
+    def __init__(self, series_session, window_seconds: float, max_readings: int):
+        # Opens a session reaching the series' readings on the primary, given its id
+        self._series_session = series_session
+        self._window_us = int(window_seconds * 1_000_000)
+        self._max_readings = max_readings
+        self._windows: OrderedDict[int, SeriesWindow] = OrderedDict()
+        self._loading: dict[int, list | None] = {}
+        self._readings = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.counters = {"hits": 0, "misses": 0, "loads": 0, "load_failures": 0, "evictions": 0,
+                         "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self._window_us > 0
+
+    def _cutoff(self) -> int:
+        return int(time.time() * 1_000_000) - self._window_us
+
+    def covers(self, start: datetime | None) -> bool:
+        """True if a read from `start` onwards can fall inside the window"""
+        return self.enabled and start is not None and to_us(start) >= self._cutoff()
+
+    # Write paths (call after the commit)
+
+    def record(self, rows: Iterable):
+        """Add inserted readings (objects with id, series_id, sensor_id, value, timestamp, created_at)"""
+        if not self.enabled:
+            return
+        cutoff = self._cutoff()
+        with self._lock:
+            for row in rows:
+                self._apply(row.series_id, ("insert", _entry(row)), cutoff)
+            self._evict()
+
+    def replace(self, row):
+        """An edited reading: drop its old version and add the new one"""
+        if not self.enabled:
+            return
+        cutoff = self._cutoff()
+        with self._lock:
+            self._apply(row.series_id, ("remove", row.id), cutoff)
+            self._apply(row.series_id, ("insert", _entry(row)), cutoff)
+            self._evict()
+
+    def remove(self, series_id: int, measurement_id: int):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._apply(series_id, ("remove", measurement_id), self._cutoff())
+
+    def invalidate(self, series_id: int | None = None):
+        """Forget a series' window (or every window); the next read loads it again"""
+        if not self.enabled:
+            return
+        with self._lock:
+            targets = [*self._windows, *self._loading] if series_id is None else [series_id]
+            for target in targets:
+                window = self._windows.pop(target, None)
+                if window is not None:
+                    self._readings -= len(window)
+                if target in self._loading:
+                    # Discard the load in flight; it may predate this write
+                    self._loading[target] = None
+            self.counters["invalidations"] += 1
+
+    def _apply(self, series_id: int, op: tuple, cutoff: int):
+        # Called with the lock held
+        window = self._windows.get(series_id)
+        if window is None:
+            pending = self._loading.get(series_id)
+            if pending is not None:
+                pending.append(op)
+            return
+        self._readings -= window.trim(cutoff)
+        if op[0] == "insert":
+            self._readings += window.insert(op[1])
+        else:
+            self._readings -= window.remove(op[1])
+
+    def _evict(self):
+        # Called with the lock held; a single series over the budget keeps only its newest readings
+        while self._readings > self._max_readings and len(self._windows) > 1:
+            _, window = self._windows.popitem(last=False)
+            self._readings -= len(window)
+            self.counters["evictions"] += 1
+        if self._readings > self._max_readings and self._windows:
+            window = next(iter(self._windows.values()))
+            self._readings -= window.keep_last(self._max_readings)
+
+    # Read path
+
+    def read(self, series_ids: list[int], start: datetime | None, end: datetime | None,
+             limit: int | None = None, per_series: bool = False) -> list[MeasurementRow] | None:
+        """Readings of the series in [start, end] in (timestamp, id) order, or None if any is not buffered.
+
+        `limit` caps the result, or each series' share of it with `per_series`.
+        """
+        if not self.enabled:
+            return None
+        if not self.covers(start) or not series_ids:
+            self.counters["misses"] += 1
+            return None
+        for series_id in series_ids:
+            if series_id not in self._windows and not self._load(series_id):
+                self.counters["misses"] += 1
+                return None
+
+        start_us = to_us(start)
+        end_us = None if end is None else to_us(end)
+        cutoff = self._cutoff()
+        blocks = []
+        with self._lock:
+            for series_id in series_ids:
+                window = self._windows.get(series_id)
+                if window is not None:
+                    self._readings -= window.trim(cutoff)
+                if window is None or start_us < window.since_us:
+                    self.counters["misses"] += 1
+                    return None
+                self._windows.move_to_end(series_id)
+                blocks.append(window.slice(start_us, end_us, limit))
+            self.counters["hits"] += 1
+        if len(blocks) == 1:
+            return list(block_rows(series_ids[0], blocks[0]))
+
+        # Merge on the arrays, so rows are only built for what is returned
+        series = np.concatenate([np.full(len(block), series_id, dtype=np.int64)
+                                 for series_id, block in zip(series_ids, blocks)])
+        merged = ColumnBlock(*(np.concatenate(columns) for columns in zip(*(
+            (b.ids, b.timestamps, b.values, b.sensor_ids, b.created_at) for b in blocks))))
+        order = np.lexsort((merged.ids, merged.timestamps))
+        if limit is not None and not per_series:
+            order = order[:limit]
+        return list(_series_rows(series[order], merged.mask(order)))
+
+    def _load(self, series_id: int) -> bool:
+        """Fill a series' window from the database; False if it is already loading or failed"""
+        with self._lock:
+            if series_id in self._loading:
+                return False
+            self._loading[series_id] = []
+        since = self._cutoff()
+        try:
+            db = self._series_session(series_id)
+            try:
+                entries = [_entry(row) for row in iter_measurements(db, [series_id], from_us(since), None)]
+            finally:
+                db.close()
+        except Exception:
+            with self._lock:
+                self._loading.pop(series_id, None)
+                self.counters["load_failures"] += 1
+            logger.exception("Loading the recent window of series %s failed", series_id)
+            return False
+
+        window = SeriesWindow(since, entries)
+        with self._lock:
+            pending = self._loading.pop(series_id)
+            if pending is None:
+                # Invalidated while loading
+                return False
+            for op in pending:
+                if op[0] == "insert":
+                    window.insert(op[1])
+                else:
+                    window.remove(op[1])
+            self._windows[series_id] = window
+            self._readings += len(window)
+            self.counters["loads"] += 1
+            self._evict()
+        return True
+
+    # Startup warming
+
+    def start(self):
+        """Load every series' window in a background thread"""
+        if not self.enabled or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._warm, name="recent-buffer-warm", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(10)
+        self._thread = None
+
+    def _warm(self):
+        db = SessionLocal()
+        try:
+            series_ids = [series_id for (series_id,) in db.query(Series.id).order_by(Series.id).all()]
+        finally:
+            db.close()
+        for series_id in series_ids:
+            if self._stopping.is_set() or self._readings >= self._max_readings:
+                break
+            if series_id not in self._windows:
+                self._load(series_id)
+
+    def snapshot(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        with self._lock:
+            allocated = sum(window.nbytes for window in self._windows.values())
+        return {
+            **self.counters,
+            "hit_rate": self.counters["hits"] / lookups if lookups else None,
+            "series": len(self._windows),
+            "readings": self._readings,
+            "max_readings": self._max_readings,
+            "bytes": allocated,
+        }
+
+
+recent_buffer = RecentBuffer(
+    lambda series_id: shards.session(shards.shard_of(series_id)),
+    settings.RECENT_BUFFER_SECONDS,
+    settings.RECENT_BUFFER_MAX_READINGS,
+)
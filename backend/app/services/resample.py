@@ -0,0 +1,55 @@
+"""Vectorised resampling of series onto a shared time grid.
+
+Grid point k stands for the bucket [start + k*step, start + (k+1)*step)
+and takes the mean of the readings in it. Empty buckets are then filled
+according to the policy: `none` leaves them null, `previous` carries the
+last bucket value forward and `linear` interpolates between the nearest
+non-empty buckets (edges stay null).
+"""
+import numpy as np
+
+FILL_POLICIES = ("none", "previous", "linear")
+
+
+class BucketAccumulator:
+    def __init__(self, start_us: int, step_us: int, size: int):
+        self.start_us = start_us
+        self.step_us = step_us
+        self.size = size
+        self.sums = np.zeros(size, dtype=np.float64)
+        self.counts = np.zeros(size, dtype=np.int64)
+
+    def update(self, timestamps: np.ndarray, values: np.ndarray):
+        idx = (timestamps - self.start_us) // self.step_us
+        keep = (idx >= 0) & (idx < self.size)
+        idx = idx[keep]
+        self.sums += np.bincount(idx, weights=values[keep], minlength=self.size)
+        self.counts += np.bincount(idx, minlength=self.size)
+
+    def means(self) -> np.ndarray:
+        means = np.full(self.size, np.nan)
+        filled = self.counts > 0
+        means[filled] = self.sums[filled] / self.counts[filled]
+        return means
+
+
+def fill(values: np.ndarray, policy: str) -> np.ndarray:
+    valid = ~np.isnan(values)
+    if policy == "none" or valid.all() or not valid.any():
+        return values
+
+    positions = np.arange(len(values))
+    if policy == "previous":
+        last = np.maximum.accumulate(np.where(valid, positions, -1))
+        filled = values[np.maximum(last, 0)]
+        filled[last < 0] = np.nan
+        return filled
+
+    if policy == "linear":
+        filled = np.interp(positions, positions[valid], values[valid])
+        first, last = positions[valid][0], positions[valid][-1]
+        filled[:first] = np.nan
+        filled[last + 1:] = np.nan
+        return filled
+
+    raise ValueError(f"Unknown fill policy '{policy}'")
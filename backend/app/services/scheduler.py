@@ -0,0 +1,287 @@
+"""In-process scheduler for periodic maintenance jobs.
+
+A job is a function taking a database session and returning an optional
+summary dict. Its schedule is a 5-field cron expression (minute hour
+day-of-month month day-of-week, UTC) or an interval such as ``every 10m``.
+Intervals are aligned to the epoch, so every worker computes the same slots.
+
+Due jobs run on a bounded thread pool, and a job never overlaps itself in
+one process. Across processes, a PostgreSQL advisory lock keeps a job
+running on one worker at a time. The unique (job, scheduled_for) key of
+`job_runs` keeps a slot from running twice after the lock is released.
+Missed slots are not caught up.
+"""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.models.job_run import JobRun
+
+logger = logging.getLogger(__name__)
+
+WORKER = f"{socket.gethostname()}:{os.getpid()}"
+# First key of the two-int advisory lock, so job locks don't collide with other users of advisory locks
+LOCK_NAMESPACE = zlib.crc32(b"iot-scheduler") & 0x7FFFFFFF
+INTERVAL_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+CRON_FIELDS = (("minute", 0, 59), ("hour", 0, 23), ("day of month", 1, 31), ("month", 1, 12), ("day of week", 0, 7))
+
+
+def _parse_cron_field(expr: str, name: str, low: int, high: int) -> frozenset[int]:
+    values = set()
+    for part in expr.split(","):
+        base, _, step = part.partition("/")
+        if base == "*":
+            start, end = low, high
+        elif "-" in base:
+            start, end = (int(v) for v in base.split("-", 1))
+        else:
+            start = int(base)
+            end = high if step else start
+        step = int(step) if step else 1
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid {name} field '{expr}'")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronSchedule:
+    """Standard 5-field cron expression evaluated in UTC"""
+
+    def __init__(self, spec: str):
+        parts = spec.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression '{spec}' must have 5 fields")
+        self.spec = spec
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_cron_field(expr, *f) for expr, f in zip(parts, CRON_FIELDS)
+        )
+        self.weekdays = frozenset(d % 7 for d in weekdays)
+        # As in cron, a restricted day of month and day of week match if either does
+        self._any_day, self._any_weekday = parts[2] == "*", parts[4] == "*"
+
+    def _day_matches(self, t: datetime) -> bool:
+        dom = t.day in self.days
+        dow = (t.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, after: datetime) -> datetime:
+        t = after.astimezone(timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = t + timedelta(days=366 * 5)
+        while t < limit:
+            if t.month not in self.months:
+                t = (t.replace(day=1) + timedelta(days=32)).replace(day=1, hour=0, minute=0)
+            elif not self._day_matches(t):
+                t = (t + timedelta(days=1)).replace(hour=0, minute=0)
+            elif t.hour not in self.hours:
+                t = (t + timedelta(hours=1)).replace(minute=0)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                return t
+        raise ValueError(f"Cron expression '{self.spec}' never matches")
+
+    def __str__(self):
+        return self.spec
+
+
+class IntervalSchedule:
+    """Every `seconds` seconds, on multiples of `seconds` since the epoch"""
+
+    def __init__(self, seconds: float, spec: str):
+        self.seconds = seconds
+        self.spec = spec
+
+    def next_after(self, after: datetime) -> datetime:
+        slot = (int(after.timestamp() // self.seconds) + 1) * self.seconds
+        return datetime.fromtimestamp(slot, timezone.utc)
+
+    def __str__(self):
+        return self.spec
+
+
+def parse_schedule(spec: str | None) -> CronSchedule | IntervalSchedule | None:
+    """``every <n><s|m|h|d>`` or a cron expression; empty means manual runs only"""
+    spec = (spec or "").strip()
+    if not spec:
+        return None
+    if spec.startswith("every "):
+        amount = spec[6:].strip()
+        unit = INTERVAL_UNITS.get(amount[-1:])
+        if unit is None or not amount[:-1].isdigit() or int(amount[:-1]) == 0:
+            raise ValueError(f"Invalid interval '{spec}'; expected e.g. 'every 10m'")
+        return IntervalSchedule(int(amount[:-1]) * unit, spec)
+    return CronSchedule(spec)
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable
+    schedule: CronSchedule | IntervalSchedule | None
+    description: str = ""
+    next_run: datetime | None = None
+    running: bool = False
+    # Runs in this process
+    metrics: dict = field(default_factory=lambda: {
+        "runs": 0, "failures": 0, "skipped": 0, "last_duration_ms": None, "max_duration_ms": None,
+        "total_duration_ms": 0.0,
+    })
+
+
+class Scheduler:
+    """Runs registered jobs on their schedules from a background thread"""
+
+    def __init__(self, db_engine, session_factory, max_concurrent: int):
+        self._engine = db_engine
+        self._session_factory = session_factory
+        self._max_concurrent = max_concurrent
+        self._jobs: dict[str, Job] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def jobs(self) -> list[Job]:
+        return list(self._jobs.values())
+
+    def get(self, name: str) -> Job | None:
+        return self._jobs.get(name)
+
+    def register(self, name: str, func: Callable, schedule: str | None, description: str = ""):
+        """Add (or replace) a job; raises ValueError for a malformed schedule"""
+        job = Job(name, func, parse_schedule(schedule), description)
+        if job.schedule is not None:
+            job.next_run = job.schedule.next_after(datetime.now(timezone.utc))
+        self._jobs[name] = job
+
+    def run_now(self, name: str) -> bool:
+        """Queue a job outside its schedule; False if it is already running here"""
+        job = self._jobs[name]
+        return self._submit(job, datetime.now(timezone.utc))
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_concurrent, thread_name_prefix="scheduled-job")
+        self._thread = threading.Thread(target=self._run, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        """Stop scheduling; running jobs finish unless `wait` is False"""
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._thread.join(5)
+        self._thread = None
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            now = datetime.now(timezone.utc)
+            for job in self.jobs:
+                if job.next_run is not None and job.next_run <= now:
+                    slot, job.next_run = job.next_run, job.schedule.next_after(now)
+                    self._submit(job, slot)
+            self._stopping.wait(1.0)
+
+    def _submit(self, job: Job, slot: datetime) -> bool:
+        with self._lock:
+            if job.running or self._executor is None:
+                job.metrics["skipped"] += 1
+                return False
+            job.running = True
+        self._executor.submit(self._execute, job, slot)
+        return True
+
+    def _execute(self, job: Job, slot: datetime):
+        try:
+            with self._cluster_lock(job.name) as acquired:
+                if not acquired:
+                    job.metrics["skipped"] += 1
+                    logger.info("Job %s is running on another worker; skipped", job.name)
+                    return
+                self._run_job(job, slot)
+        except Exception:
+            logger.exception("Job %s could not be started", job.name)
+        finally:
+            job.running = False
+
+    @contextmanager
+    def _cluster_lock(self, name: str):
+        """Session-level advisory lock held for the whole run (PostgreSQL only)"""
+        if self._engine.dialect.name != "postgresql":
+            yield True
+            return
+        key = zlib.crc32(name.encode()) & 0x7FFFFFFF
+        with self._engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:ns, :key)"),
+                                    {"ns": LOCK_NAMESPACE, "key": key}).scalar()
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    conn.execute(text("SELECT pg_advisory_unlock(:ns, :key)"), {"ns": LOCK_NAMESPACE, "key": key})
+
+    def _run_job(self, job: Job, slot: datetime):
+        db = self._session_factory()
+        try:
+            run = JobRun(job=job.name, scheduled_for=slot, started_at=datetime.now(timezone.utc),
+                         status="running", worker=WORKER)
+            db.add(run)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                job.metrics["skipped"] += 1
+                logger.info("Job %s already ran for %s; skipped", job.name, slot.isoformat())
+                return
+
+            started = time.perf_counter()
+            job_db = self._session_factory()
+            try:
+                result = job.func(job_db)
+                run.status = "ok"
+                run.detail = json.dumps(result, default=str) if result else None
+            except Exception as exc:
+                job_db.rollback()
+                run.status = "failed"
+                run.detail = f"{type(exc).__name__}: {exc}"
+                job.metrics["failures"] += 1
+                logger.exception("Job %s failed", job.name)
+            finally:
+                job_db.close()
+
+            duration = (time.perf_counter() - started) * 1000
+            run.finished_at = datetime.now(timezone.utc)
+            run.duration_ms = duration
+            db.commit()
+
+            metrics = job.metrics
+            metrics["runs"] += 1
+            metrics["last_duration_ms"] = duration
+            metrics["max_duration_ms"] = max(metrics["max_duration_ms"] or 0.0, duration)
+            metrics["total_duration_ms"] += duration
+        finally:
+            db.close()
+
+
+scheduler = Scheduler(engine, SessionLocal, max_concurrent=settings.SCHEDULER_MAX_CONCURRENT)
@@ -0,0 +1,108 @@
+import hashlib
+import hmac
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlalchemy import select, func, bindparam
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.sensor import Sensor
+from app.models.series import Series
+from app.utils.security import verify_api_key
+
+_SENSOR_INFO = select(
+    Sensor.id, Sensor.series_id, Sensor.api_key_hash, Sensor.is_active,
+    Series.min_value, Series.max_value,
+    func.coalesce(Sensor.rate_limit, Series.rate_limit)
+).join(Series, Series.id == Sensor.series_id).where(Sensor.id == bindparam("sensor_id"))
+
+
+@dataclass(frozen=True)
+class SensorInfo:
+    """Snapshot of everything the ingest path needs to accept a reading"""
+    id: int
+    series_id: int
+    api_key_hash: str
+    is_active: bool
+    min_value: float
+    max_value: float
+    rate_limit: float | None = None
+
+
+class SensorCache:
+    """TTL cache of sensor credentials and series ranges keyed by sensor id.
+
+    Unknown sensor ids are cached too, so a misconfigured sender cannot turn
+    every packet into a database lookup. A keyed BLAKE2b digest of the last
+    key that verified for a sensor is remembered (never the key itself), so
+    repeat requests skip the HMAC and the settings lookup behind it.
+    """
+
+    def __init__(self, session_factory, ttl: float):
+        self._session_factory = session_factory
+        self._ttl = ttl
+        self._entries: dict[int, tuple[float, SensorInfo | None]] = {}
+        self._verified: dict[int, tuple[bytes, str]] = {}
+        # Per-process key, so the cached digests are useless outside this process
+        self._digest_key = os.urandom(32)
+        self._lock = threading.Lock()
+
+    def lookup(self, sensor_id: int) -> tuple[bool, SensorInfo | None]:
+        """Return (hit, info) without touching the database"""
+        entry = self._entries.get(sensor_id)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        return True, entry[1]
+
+    def get(self, sensor_id: int) -> SensorInfo | None:
+        hit, info = self.lookup(sensor_id)
+        if hit:
+            return info
+
+        info = self._load(sensor_id)
+        with self._lock:
+            self._entries[sensor_id] = (time.monotonic() + self._ttl, info)
+        return info
+
+    def verify_key(self, info: SensorInfo, api_key: str) -> bool:
+        """Constant-time check of a presented key against the sensor's hash"""
+        digest = hashlib.blake2b(api_key.encode(), digest_size=32, key=self._digest_key).digest()
+        cached = self._verified.get(info.id)
+        if cached is not None and cached[1] == info.api_key_hash:
+            return hmac.compare_digest(cached[0], digest)
+        if not verify_api_key(api_key, info.api_key_hash):
+            return False
+        self._verified[info.id] = (digest, info.api_key_hash)
+        return True
+
+    def invalidate(self, sensor_id: int | None = None):
+        with self._lock:
+            if sensor_id is None:
+                self._entries.clear()
+                self._verified.clear()
+            else:
+                self._entries.pop(sensor_id, None)
+                self._verified.pop(sensor_id, None)
+
+    def invalidate_series(self, series_id: int):
+        with self._lock:
+            stale = [sid for sid, (_, info) in self._entries.items() if info and info.series_id == series_id]
+            for sid in stale:
+                del self._entries[sid]
+
+    def _load(self, sensor_id: int) -> SensorInfo | None:
+        db = self._session_factory()
+        try:
+            row = db.execute(_SENSOR_INFO, {"sensor_id": sensor_id}).first()
+        finally:
+            db.close()
+
+        if row is None:
+            return None
+        return SensorInfo(*row)
+
+
+sensor_cache = SensorCache(SessionLocal, settings.SENSOR_CACHE_TTL)
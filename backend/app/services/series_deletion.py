@@ -0,0 +1,121 @@
+"""Chunked background deletion of large series.
+
+Deleting a busy series in one statement holds locks on millions of rows and
+one huge transaction. Instead the series' sensors are disabled, measurements
+and cold chunks are deleted `chunk_size` rows per transaction, and the series
+row itself goes last, letting the database cascade the (now small) rest.
+Archived Parquet files are removed once the series row is gone.
+
+Progress lives in the memory of the process that started the job, so with
+several workers only that one can report it.
+"""
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import select, delete, update, func
+
+from app.config import settings
+from app.models.measurement import Measurement
+from app.models.measurement_archive import MeasurementArchive
+from app.models.measurement_chunk import MeasurementChunk
+from app.models.sensor import Sensor
+from app.models.series import Series
+from app.services import archive
+from app.services.alerts import alert_engine
+from app.services.recent_buffer import recent_buffer
+from app.services.sharding import shards
+from app.utils.sql import delete_in_chunks
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeletionProgress:
+    series_id: int
+    status: str
+    # Unknown until the background job has counted the hot rows
+    total_measurements: int | None = None
+    deleted_measurements: int = 0
+    deleted_chunks: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    error: str | None = None
+
+
+class SeriesDeletionManager:
+    """Runs one deletion thread per series and keeps their progress in memory"""
+
+    def __init__(self, series_session, chunk_size: int):
+        # Opens a session reaching the series' readings, given its id
+        self._series_session = series_session
+        self.chunk_size = chunk_size
+        self._jobs: dict[int, DeletionProgress] = {}
+        self._lock = threading.Lock()
+
+    def get(self, series_id: int) -> DeletionProgress | None:
+        return self._jobs.get(series_id)
+
+    def is_large(self, db, series_id: int) -> bool:
+        """True if the series holds more than one chunk of hot rows (bounded index scan)"""
+        probe = select(Measurement.id).where(Measurement.series_id == series_id).offset(self.chunk_size).limit(1)
+        return db.execute(probe).first() is not None
+
+    def start(self, series_id: int) -> DeletionProgress:
+        with self._lock:
+            job = self._jobs.get(series_id)
+            if job is not None and job.status == "running":
+                return job
+            job = DeletionProgress(series_id=series_id, status="running", started_at=datetime.now(timezone.utc))
+            self._jobs[series_id] = job
+
+        db = self._series_session(series_id)
+        try:
+            # Stop new readings before the request returns (a few rows, by index)
+            db.execute(update(Sensor).where(Sensor.series_id == series_id).values(is_active=False))
+            db.commit()
+        finally:
+            db.close()
+
+        threading.Thread(target=self._run, args=(job,), name=f"delete-series-{series_id}", daemon=True).start()
+        return job
+
+    def _run(self, job: DeletionProgress):
+        db = self._series_session(job.series_id)
+        try:
+            job.total_measurements = db.execute(
+                select(func.count()).select_from(Measurement).where(Measurement.series_id == job.series_id)
+            ).scalar()
+            db.rollback()
+
+            def advance(deleted: int):
+                job.deleted_measurements += deleted
+
+            delete_in_chunks(db, Measurement, Measurement.series_id == job.series_id,
+                             chunk_size=self.chunk_size, on_chunk=advance)
+            # Chunks hold thousands of rows each, so delete far fewer per transaction
+            job.deleted_chunks = delete_in_chunks(db, MeasurementChunk, MeasurementChunk.series_id == job.series_id,
+                                                  chunk_size=max(1, self.chunk_size // 100))
+            # Archive records on a shard are not cascaded by the series row
+            db.execute(delete(MeasurementArchive).where(MeasurementArchive.series_id == job.series_id))
+            db.execute(delete(Series).where(Series.id == job.series_id))
+            db.commit()
+            shards.forget(job.series_id)
+            recent_buffer.invalidate(job.series_id)
+            archive.remove_series_files(job.series_id)
+            alert_engine.refresh()
+            job.status = "done"
+        except Exception as exc:
+            db.rollback()
+            job.status = "failed"
+            job.error = str(exc)
+            logger.exception("Deleting series %s failed", job.series_id)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            db.close()
+
+
+series_deletions = SeriesDeletionManager(
+    lambda series_id: shards.session(shards.shard_of(series_id)), settings.SERIES_DELETE_CHUNK_SIZE
+)
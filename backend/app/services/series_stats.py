@@ -0,0 +1,198 @@
+"""Incrementally maintained per-series summary (count, extents, last value).
+
+Every insert path folds its new rows into `series_stats` with one upsert per
+series inside the writer's own transaction, so for series on the primary the
+summary commits or rolls back together with the readings. A sharded series'
+readings commit on the shard first and its summary on the primary right
+after; if that second commit fails the summary misses them, which the
+`rebuild_sharded_stats` job repairs (see `rebuild_all(sharded_only=True)`).
+Deletes and edits decrement the count, but
+min/max and first/last cannot shrink incrementally: when a removed row may
+have been an extreme the row is flagged `stale` until `rebuild` recomputes it
+from every tier.
+
+The upsert locks the series' summary row until the writer commits, so
+concurrent writers to one series queue behind each other; a sensor
+submission holds it for its single reading. The batch writer and imports
+fold a whole batch into one upsert per series and hold it far less often.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import select, update, case, or_, and_, func
+from sqlalchemy.orm import Session
+
+from app.models.measurement import Measurement
+from app.models.series import Series
+from app.models.series_stats import SeriesStats
+from app.services.chunk_codec import from_us, to_us
+from app.services.sharding import shards
+from app.services.timeseries import iter_column_blocks
+from app.utils.sql import dialect_insert, per_dialect, precompiled
+
+
+# Ids below the newest that a rebuild re-reads under the summary lock instead of scanning
+REBUILD_ID_MARGIN = 10_000
+
+
+@dataclass
+class StatsDelta:
+    count: int = 0
+    first_timestamp: datetime | None = None
+    last_timestamp: datetime | None = None
+    min_value: float | None = None
+    max_value: float | None = None
+    last_value: float | None = None
+
+    def add(self, value: float, timestamp: datetime):
+        self.count += 1
+        if self.first_timestamp is None or timestamp < self.first_timestamp:
+            self.first_timestamp = timestamp
+        if self.last_timestamp is None or timestamp >= self.last_timestamp:
+            self.last_timestamp = timestamp
+            self.last_value = value
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if self.max_value is None or value > self.max_value:
+            self.max_value = value
+
+
+def collect(rows: Iterable[tuple]) -> dict[int, StatsDelta]:
+    """Group (series_id, value, timestamp) rows into one delta per series"""
+    deltas: dict[int, StatsDelta] = {}
+    for series_id, value, timestamp in rows:
+        delta = deltas.get(series_id)
+        if delta is None:
+            delta = deltas[series_id] = StatsDelta()
+        delta.add(value, timestamp)
+    return deltas
+
+
+def _widen(column, new, smaller: bool):
+    current = getattr(SeriesStats, column)
+    better = new < current if smaller else new >= current
+    return case((and_(new.isnot(None), or_(current.is_(None), better)), new), else_=current)
+
+
+@per_dialect
+def _upsert(bind):
+    stmt = dialect_insert(bind, SeriesStats)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["series_id"],
+        set_={
+            "count": SeriesStats.count + excluded["count"],
+            "first_timestamp": _widen("first_timestamp", excluded.first_timestamp, smaller=True),
+            "last_timestamp": _widen("last_timestamp", excluded.last_timestamp, smaller=False),
+            "last_value": case(
+                (and_(excluded.last_timestamp.isnot(None),
+                      or_(SeriesStats.last_timestamp.is_(None), excluded.last_timestamp >= SeriesStats.last_timestamp)),
+                 excluded.last_value),
+                else_=SeriesStats.last_value,
+            ),
+            "min_value": _widen("min_value", excluded.min_value, smaller=True),
+            "max_value": _widen("max_value", excluded.max_value, smaller=False),
+            # ON CONFLICT DO UPDATE skips the column's onupdate default
+            "updated_at": func.now(),
+        },
+    )
+    return precompiled(bind, stmt, ["series_id", "stale", *StatsDelta.__dataclass_fields__])
+
+
+def apply(db: Session, deltas: dict[int, StatsDelta]):
+    """Fold inserted rows into the summary; the caller commits"""
+    if not deltas:
+        return
+    stmt = _upsert(db.get_bind())
+    for series_id, delta in sorted(deltas.items()):
+        db.execute(stmt, {"series_id": series_id, "stale": False, **vars(delta)})
+
+
+def note_removed(db: Session, series_id: int, count: int, low: float | None, high: float | None,
+                 start: datetime | None, end: datetime | None):
+    """Account for `count` rows leaving a series, with values in [low, high] and timestamps in
+    [start, end]; flags the summary stale if that range reaches one of its extremes"""
+    touches_extreme = or_(
+        SeriesStats.min_value >= low if low is not None else False,
+        SeriesStats.max_value <= high if high is not None else False,
+        SeriesStats.first_timestamp >= start if start is not None else False,
+        SeriesStats.last_timestamp <= end if end is not None else False,
+    )
+    db.execute(
+        update(SeriesStats).where(SeriesStats.series_id == series_id).values(
+            count=SeriesStats.count - count,
+            # Unknown extremes (NULL comparisons) count as touched
+            stale=or_(SeriesStats.stale, func.coalesce(touches_extreme, True)),
+        )
+    )
+
+
+def rebuild(db: Session, series_id: int) -> SeriesStats:
+    """Recompute one series' summary from hot rows, cold chunks and archives, and commit.
+
+    The scan takes no lock: it covers hot rows up to REBUILD_ID_MARGIN ids
+    below the highest id at its start, and only then is the summary row
+    locked, briefly, to add the rows numbered above that and store the
+    result. Writers block for that step only; the margin catches readings
+    still being committed under an older id when the scan starts. The stale
+    flag is cleared before the scan (it reads false while the scan runs), so
+    an edit that flags it meanwhile leaves it set, and if the summary's
+    running count then disagrees with the recount (a delete during the scan,
+    a reading it missed, or a count that was already off) the result is
+    flagged stale for the next rebuild.
+    """
+    apply(db, {series_id: StatsDelta()})
+    db.execute(update(SeriesStats).where(SeriesStats.series_id == series_id).values(stale=False))
+    scanned_id = (db.scalar(select(func.max(Measurement.id))) or 0) - REBUILD_ID_MARGIN
+    db.commit()
+
+    delta = StatsDelta()
+    last_us = first_us = None
+    for timestamps, values in iter_column_blocks(db, series_id, None, None, max_id=scanned_id):
+        if not len(values):
+            continue
+        delta.count += len(values)
+        delta.min_value = min(float(values.min()), delta.min_value if delta.min_value is not None else np.inf)
+        delta.max_value = max(float(values.max()), delta.max_value if delta.max_value is not None else -np.inf)
+        newest = int(np.argmax(timestamps))
+        if last_us is None or timestamps[newest] >= last_us:
+            last_us, delta.last_value = int(timestamps[newest]), float(values[newest])
+        oldest = int(timestamps.min())
+        first_us = oldest if first_us is None else min(first_us, oldest)
+
+    delta.first_timestamp = from_us(first_us) if first_us is not None else None
+    delta.last_timestamp = from_us(last_us) if last_us is not None else None
+    db.rollback()
+
+    # Lock the summary, then fold in what arrived during the scan
+    apply(db, {series_id: StatsDelta()})
+    stale, running = db.execute(
+        select(SeriesStats.stale, SeriesStats.count).where(SeriesStats.series_id == series_id)
+    ).one()
+    arrived = db.execute(select(Measurement.value, Measurement.timestamp).where(
+        Measurement.series_id == series_id, Measurement.id > scanned_id
+    )).all()
+    for value, timestamp in arrived:
+        delta.add(value, from_us(to_us(timestamp)))
+    stale = stale or running != delta.count
+    db.execute(
+        update(SeriesStats).where(SeriesStats.series_id == series_id).values(stale=stale, **vars(delta))
+    )
+    db.commit()
+    return db.get(SeriesStats, series_id, populate_existing=True)
+
+
+def rebuild_all(db: Session, stale_only: bool = False, sharded_only: bool = False) -> list[int]:
+    """Rebuild every series (or only stale ones, or only those on a shard); returns the rebuilt ids"""
+    if stale_only:
+        ids = [sid for (sid,) in db.query(SeriesStats.series_id).filter(SeriesStats.stale.is_(True)).all()]
+    elif sharded_only:
+        ids = [sid for (sid,) in db.query(Series.id).filter(Series.shard > 0).order_by(Series.id).all()]
+    else:
+        ids = [sid for (sid,) in db.query(Series.id).order_by(Series.id).all()]
+    for series_id in ids:
+        with shards.series_session(series_id, db) as series_db:
+            rebuild(series_db, series_id)
+    return ids
@@ -0,0 +1,262 @@
+"""Placement of series on measurement databases (shards).
+
+Shard 0 is the primary; SHARD_DATABASE_URLS adds shards 1..N. A series'
+readings, cold chunks and archive records live on one shard, recorded in
+its `series.shard` column; users, series, sensors, summaries and alerts
+stay on the primary. Every shard uses the primary's dialect.
+
+A shard session binds the measurement tables to the shard and everything
+else to the primary, so the services run unchanged on it. Its commit is
+one commit per database, the shard's first, not an atomic one: a failure
+between them keeps the readings without their primary-side effects, such as
+the series summary (rebuilt by the `rebuild_sharded_stats` job). Each shard
+numbers readings from `shard << ID_SHIFT`, so a measurement id alone names
+its shard.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from fastapi import Request
+from sqlalchemy import MetaData, create_engine, func, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.config import settings
+from app.database import SessionLocal, engine, engine_options, get_read_db
+from app.models.measurement import Measurement
+from app.models.measurement_archive import MeasurementArchive
+from app.models.measurement_chunk import MeasurementChunk
+from app.models.series import Series
+
+SHARDED_MODELS = (Measurement, MeasurementChunk, MeasurementArchive)
+# Shard k numbers measurements from k << ID_SHIFT (about 10^12 ids per shard)
+ID_SHIFT = 40
+
+
+def shard_tables() -> list:
+    """The sharded tables without their foreign keys, whose targets live on the primary"""
+    metadata = MetaData()
+    tables = []
+    for model in SHARDED_MODELS:
+        table = model.__table__.to_metadata(metadata)
+        for constraint in list(table.foreign_key_constraints):
+            table.constraints.discard(constraint)
+        tables.append(table)
+    # SQLite only keeps a raised id floor (sqlite_sequence) for AUTOINCREMENT tables
+    tables[0].dialect_kwargs["sqlite_autoincrement"] = True
+    return tables
+
+
+class ShardSet:
+    """Engines of the primary and the measurement shards, and the series placement map"""
+
+    def __init__(self, primary, primary_sessions, urls: list[str], workers: int):
+        self.engines = [primary] + [create_engine(url, pool_pre_ping=True, **engine_options(url)) for url in urls]
+        for shard_engine in self.engines[1:]:
+            if shard_engine.dialect.name != primary.dialect.name:
+                raise ValueError(f"Shard {shard_engine.url!r} must use the primary's dialect ({primary.dialect.name})")
+        self._sessions = [primary_sessions] + [
+            sessionmaker(autocommit=False, autoflush=False, bind=primary,
+                         binds={model: shard_engine for model in SHARDED_MODELS})
+            for shard_engine in self.engines[1:]
+        ]
+        self._workers = workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._placement: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.engines)
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.engines) > 1
+
+    def session(self, shard: int) -> Session:
+        return self._sessions[shard]()
+
+    def shard_of(self, series_id: int) -> int:
+        """Shard of a series; unknown series map to the primary"""
+        shard = self._placement.get(series_id)
+        if shard is None:
+            if not self.enabled:
+                return 0
+            db = SessionLocal()
+            try:
+                shard = db.query(Series.shard).filter(Series.id == series_id).scalar()
+            finally:
+                db.close()
+            if shard is None:
+                return 0
+            if shard >= len(self.engines):
+                raise LookupError(f"Series {series_id} is placed on shard {shard}, which is not configured")
+            with self._lock:
+                self._placement[series_id] = shard
+        return shard
+
+    def forget(self, series_id: int):
+        with self._lock:
+            self._placement.pop(series_id, None)
+
+    def shard_of_measurement(self, measurement_id: int) -> int:
+        shard = measurement_id >> ID_SHIFT
+        return shard if shard < len(self.engines) else 0
+
+    def place(self, db: Session) -> int:
+        """Shard for a new series: the configured shard holding the fewest series"""
+        if not self.enabled:
+            return 0
+        counts = dict(db.query(Series.shard, func.count()).group_by(Series.shard).all())
+        return min(range(1, len(self.engines)), key=lambda shard: (counts.get(shard, 0), shard))
+
+    def group(self, series_ids: list[int] | None) -> dict[int, list[int] | None]:
+        """Series ids by shard; None (every series) asks every shard"""
+        if series_ids is None:
+            return {shard: None for shard in range(len(self.engines))}
+        groups: dict[int, list[int]] = {}
+        for series_id in series_ids:
+            groups.setdefault(self.shard_of(series_id), []).append(series_id)
+        return groups
+
+    @contextmanager
+    def series_session(self, series_id: int, primary_db: Session | None = None) -> Iterator[Session]:
+        """Session for a series' readings; `primary_db` is used as is if they live on the primary"""
+        shard = self.shard_of(series_id)
+        if shard == 0 and primary_db is not None:
+            yield primary_db
+            return
+        db = self.session(shard)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def scatter(self, work: Callable, groups: dict[int, list[int] | None], primary_db: Session | None = None) -> list:
+        """Run `work(db, series_ids)` on each shard of `groups` in parallel; results in shard order.
+
+        Shard 0 runs in the calling thread on `primary_db` when given (e.g. a
+        replica session); the others run on the pool with their own sessions.
+        """
+        def run(shard: int):
+            db = self.session(shard)
+            try:
+                return work(db, groups[shard])
+            finally:
+                db.close()
+
+        order = sorted(groups)
+        inline = [shard for shard in order if shard == 0 and primary_db is not None]
+        pooled = [shard for shard in order if shard not in inline]
+        if len(pooled) == 1 and not inline:
+            return [run(pooled[0])]
+        futures = {shard: self._pool().submit(run, shard) for shard in pooled}
+        results = {shard: work(primary_db, groups[shard]) for shard in inline}
+        results.update({shard: future.result() for shard, future in futures.items()})
+        return [results[shard] for shard in order]
+
+    def fan_out(self, work: Callable, series_ids: list[int],
+                primary_sessions: Callable[[], Session] | None = None, width: int | None = None) -> list:
+        """Run `work(db, series_id)` for each series in parallel, each in its own session; results in input order.
+
+        At most SHARD_QUERY_WORKERS series are queried at once across all
+        callers, and at most `width` of this call's. Series on the primary use
+        sessions from `primary_sessions` when given (e.g. replicas).
+        """
+        slots = threading.BoundedSemaphore(width or self._workers)
+
+        def run(series_id: int):
+            try:
+                shard = self.shard_of(series_id)
+                db = primary_sessions() if shard == 0 and primary_sessions is not None else self.session(shard)
+                try:
+                    return work(db, series_id)
+                finally:
+                    db.close()
+            finally:
+                slots.release()
+
+        futures = []
+        for series_id in series_ids:
+            slots.acquire()
+            futures.append(self._pool().submit(run, series_id))
+        return [future.result() for future in futures]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="shard-query")
+            return self._executor
+
+    def init_shard(self, shard: int):
+        """Create the sharded tables on a shard and raise its id floor to `shard << ID_SHIFT`"""
+        floor = shard << ID_SHIFT
+        with self.engines[shard].begin() as conn:
+            for table in shard_tables():
+                conn.execute(CreateTable(table, if_not_exists=True))
+                for index in table.indexes:
+                    conn.execute(CreateIndex(index, if_not_exists=True))
+            if conn.dialect.name == "sqlite":
+                current = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'measurements'")).scalar()
+                if current is None:
+                    conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('measurements', :seq)"),
+                                 {"seq": floor - 1})
+                elif current < floor - 1:
+                    conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'measurements'"),
+                                 {"seq": floor - 1})
+            else:
+                current = conn.execute(text("SELECT coalesce(max(id), 0) FROM measurements")).scalar()
+                conn.execute(text(f"ALTER TABLE measurements ALTER COLUMN id RESTART WITH {max(floor, current + 1)}"))
+
+
+shards = ShardSet(
+    engine,
+    SessionLocal,
+    [url.strip() for url in settings.SHARD_DATABASE_URLS.split(",") if url.strip()],
+    settings.SHARD_QUERY_WORKERS,
+)
+
+
+def get_series_read_db(series_id: int, request: Request):
+    """Read session for the series in the path: its shard, or get_read_db on the primary"""
+    shard = shards.shard_of(series_id)
+    if shard == 0:
+        yield from get_read_db(request)
+        return
+    db = shards.session(shard)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_series_db(series_id: int):
+    """Session for the series named by the `series_id` path or query parameter"""
+    db = shards.session(shards.shard_of(series_id))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_measurement_db(measurement_id: int):
+    """Session for the shard that numbered the measurement in the path"""
+    db = shards.session(shards.shard_of_measurement(measurement_id))
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def get_measurement_read_db(measurement_id: int, request: Request):
+    """Read session for the measurement in the path: its shard, or get_read_db on the primary"""
+    shard = shards.shard_of_measurement(measurement_id)
+    if shard == 0:
+        yield from get_read_db(request)
+        return
+    db = shards.session(shard)
+    try:
+        yield db
+    finally:
+        db.close()
@@ -0,0 +1,108 @@
+"""Bounded-memory descriptive statistics over streamed value blocks.
+
+Moments use Chan's parallel update, so blocks can be folded in any order.
+Percentiles are exact, interpolated between neighbouring readings like
+PostgreSQL's percentile_cont, as long as at most EXACT_LIMIT readings are
+scanned. Beyond that the values are dropped and percentiles come from a
+fine-grained histogram over the series range (FINE_BINS buckets), which
+keeps memory constant. That estimate spreads the readings of a bucket
+evenly across it, so it lies in the bucket of the reading at the requested
+rank: within one bucket width, (max_value - min_value) / FINE_BINS, of that
+reading, but percentile_cont may differ by that plus the gap to the next
+reading, which is only small when the readings are dense.
+"""
+import math
+
+import numpy as np
+
+FINE_BINS = 4096
+# Readings kept for exact percentiles (8 bytes each)
+EXACT_LIMIT = 200_000
+
+
+class StreamingStats:
+    def __init__(self, low: float, high: float, bins: int):
+        self.low = low
+        self.high = high
+        self.bins = bins
+        # Fine histogram is an exact multiple of the output histogram
+        self._factor = max(1, math.ceil(FINE_BINS / bins))
+        self._fine = np.zeros(bins * self._factor, dtype=np.int64)
+        self._width = (high - low) / len(self._fine)
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.underflow = 0
+        self.overflow = 0
+        self._values: list[np.ndarray] | None = []
+        self._sorted: np.ndarray | None = None
+
+    def update(self, values: np.ndarray):
+        n = len(values)
+        if n == 0:
+            return
+
+        block_mean = float(values.mean())
+        block_m2 = float(((values - block_mean) ** 2).sum())
+        total = self.count + n
+        delta = block_mean - self.mean
+        self.mean += delta * n / total
+        self._m2 += block_m2 + delta * delta * self.count * n / total
+        self.count = total
+        if self._values is not None:
+            if total <= EXACT_LIMIT:
+                self._values.append(np.array(values, dtype=np.float64))
+            else:
+                self._values = None
+            self._sorted = None
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+        below = values < self.low
+        above = values > self.high
+        self.underflow += int(below.sum())
+        self.overflow += int(above.sum())
+        idx = ((values - self.low) / self._width).astype(np.int64)
+        np.clip(idx, 0, len(self._fine) - 1, out=idx)
+        self._fine += np.bincount(idx[~(below | above)], minlength=len(self._fine))
+
+    @property
+    def stddev(self) -> float | None:
+        if self.count < 2:
+            return None
+        return math.sqrt(self._m2 / (self.count - 1))
+
+    def percentile(self, p: float) -> float | None:
+        if self.count == 0:
+            return None
+        if p <= 0:
+            return self.min
+        if p >= 100:
+            return self.max
+        if self._values is not None:
+            if self._sorted is None:
+                self._sorted = np.sort(np.concatenate(self._values))
+            return float(np.percentile(self._sorted, p))
+
+        # Out-of-range readings sit below/above every bucket
+        rank = p / 100 * self.count - self.underflow
+        if rank <= 0:
+            return self.min
+        cumulative = np.cumsum(self._fine)
+        if rank > cumulative[-1]:
+            return self.max
+        i = int(np.searchsorted(cumulative, rank))
+        before = cumulative[i - 1] if i else 0
+        fraction = (rank - before) / self._fine[i]
+        value = self.low + (i + fraction) * self._width
+        return min(max(value, self.min), self.max)
+
+    def histogram(self) -> list[dict]:
+        counts = self._fine.reshape(self.bins, self._factor).sum(axis=1)
+        step = (self.high - self.low) / self.bins
+        return [
+            {"start": self.low + i * step, "end": self.low + (i + 1) * step, "count": int(c)}
+            for i, c in enumerate(counts)
+        ]
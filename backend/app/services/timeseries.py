@@ -0,0 +1,164 @@
+"""Read path spanning hot rows, cold chunks and archived Parquet months.
+
+Callers get rows in (timestamp, id) order, or column arrays for
+aggregations, regardless of which tier holds them, so endpoints never
+need to know whether data has been compacted or archived.
+"""
+import heapq
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Iterator
+
+import numpy as np
+from sqlalchemy import select, lambda_stmt
+from sqlalchemy.orm import Session
+
+from app.models.measurement import Measurement
+from app.services import archive, cold_storage
+from app.services.chunk_codec import ColumnBlock, to_us, from_us, NULL_SENSOR
+
+
+@dataclass(slots=True)
+class MeasurementRow:
+    id: int
+    series_id: int
+    sensor_id: int | None
+    value: float
+    timestamp: datetime
+    created_at: datetime
+
+
+def _sort_key(row) -> tuple[int, int]:
+    return to_us(row.timestamp), row.id
+
+
+def block_rows(series_id: int, block: ColumnBlock) -> Iterator[MeasurementRow]:
+    for mid, ts, value, sid, created in zip(
+        block.ids.tolist(), block.timestamps.tolist(), block.values.tolist(),
+        block.sensor_ids.tolist(), block.created_at.tolist()
+    ):
+        yield MeasurementRow(
+            id=mid,
+            series_id=series_id,
+            sensor_id=None if sid == NULL_SENSOR else sid,
+            value=value,
+            timestamp=from_us(ts),
+            created_at=from_us(created),
+        )
+
+
+def _cold_rows(db: Session, series_id: int, start, end, sensor_id, archived=()) -> Iterator[MeasurementRow]:
+    for block in cold_storage.iter_chunk_blocks(db, series_id, start, end, sensor_id):
+        if archived:
+            block = archive.mask_archived(block, archived)
+        yield from block_rows(series_id, block)
+
+
+def _archive_rows(series_id: int, partitions, start, end, sensor_id) -> Iterator[MeasurementRow]:
+    for part in partitions:
+        yield from block_rows(series_id, archive.read_partition(part, start, end, sensor_id))
+
+
+def iter_measurements(
+    db: Session,
+    series_ids: list[int] | None,
+    start: datetime | None,
+    end: datetime | None,
+    limit: int | None = None,
+    sensor_id: int | None = None,
+) -> Iterator:
+    """Measurements from both tiers merged in (timestamp, id) order"""
+    # Lambda statements are cached by code location, so repeated reads skip building the query
+    stmt = lambda_stmt(lambda: select(Measurement))
+    if series_ids is not None and len(series_ids) == 1:
+        # Equality keeps a single-series read on the (series_id, timestamp) index in time order
+        series_id = series_ids[0]
+        stmt += lambda s: s.where(Measurement.series_id == series_id)
+    elif series_ids is not None:
+        stmt += lambda s: s.where(Measurement.series_id.in_(series_ids))
+    if sensor_id is not None:
+        stmt += lambda s: s.where(Measurement.sensor_id == sensor_id)
+    if start:
+        stmt += lambda s: s.where(Measurement.timestamp >= start)
+    if end:
+        stmt += lambda s: s.where(Measurement.timestamp <= end)
+    partitions = archive.partitions_for(db, series_ids, start, end)
+    if partitions:
+        hidden = archive.exclusion(partitions)
+        stmt += lambda s: s.where(*hidden)
+    stmt += lambda s: s.order_by(Measurement.timestamp.asc(), Measurement.id.asc())
+    if limit is not None:
+        stmt += lambda s: s.limit(limit)
+    hot = db.scalars(stmt).all()
+
+    cold_ids = cold_storage.series_with_chunks(db, series_ids, start, end)
+    if not cold_ids and not partitions:
+        return iter(hot)
+
+    archived = archive.by_series(partitions)
+    streams = [hot] + [_cold_rows(db, sid, start, end, sensor_id, archived.get(sid, ())) for sid in cold_ids]
+    streams += [_archive_rows(sid, parts, start, end, sensor_id) for sid, parts in archived.items()]
+    return merge_streams(streams, limit)
+
+
+def merge_streams(streams: list, limit: int | None = None) -> Iterator:
+    """Merge measurement streams that are each in (timestamp, id) order"""
+    merged = heapq.merge(*streams, key=_sort_key)
+    return islice(merged, limit) if limit is not None else merged
+
+
+def iter_column_blocks(
+    db: Session,
+    series_id: int,
+    start: datetime | None,
+    end: datetime | None,
+    with_timestamps: bool = True,
+    block_size: int = 50_000,
+    max_id: int | None = None,
+) -> Iterator[tuple[np.ndarray | None, np.ndarray]]:
+    """(timestamps_us, values) arrays for one series, streamed block by block.
+
+    Blocks come from archived months and cold chunks first and then from
+    hot rows fetched through a server-side cursor, so memory is bounded by
+    `block_size` (or one archived month) rather than by the range. Blocks
+    are not globally time-ordered. `max_id` leaves out hot rows numbered
+    above it.
+    """
+    partitions = archive.partitions_for(db, [series_id], start, end)
+    for part in partitions:
+        block = archive.read_partition(part, start, end)
+        if len(block):
+            yield (block.timestamps if with_timestamps else None), block.values
+
+    for block in cold_storage.iter_chunk_blocks(db, series_id, start, end):
+        if partitions:
+            block = archive.mask_archived(block, partitions)
+        if len(block):
+            yield (block.timestamps if with_timestamps else None), block.values
+
+    columns = [Measurement.timestamp, Measurement.value] if with_timestamps else [Measurement.value]
+    stmt = select(*columns).where(Measurement.series_id == series_id, *archive.exclusion(partitions))
+    if start:
+        stmt = stmt.where(Measurement.timestamp >= start)
+    if end:
+        stmt = stmt.where(Measurement.timestamp <= end)
+    if max_id is not None:
+        stmt = stmt.where(Measurement.id <= max_id)
+    result = db.execute(stmt.execution_options(yield_per=block_size))
+    for partition in result.partitions():
+        if with_timestamps:
+            timestamps, values = zip(*partition)
+            yield (np.fromiter((to_us(t) for t in timestamps), dtype=np.int64, count=len(timestamps)),
+                   np.array(values, dtype=np.float64))
+        else:
+            yield None, np.array([v for (v,) in partition], dtype=np.float64)
+
+
+def find_cold_measurement(db: Session, measurement_id: int) -> MeasurementRow | None:
+    found = cold_storage.find_chunk(db, measurement_id)
+    if found is None:
+        archived = archive.find_measurement(db, measurement_id)
+        return next(block_rows(*archived)) if archived is not None else None
+    chunk, block, index = found
+    return next(block_rows(chunk.series_id, block.mask(slice(index, index + 1))))
@@ -0,0 +1,118 @@
+"""Append-only capture of accepted sensor readings for later replay.
+
+With CAPTURE_PATH set, every reading that passes authentication, range and
+rate checks (over HTTP or the line protocol) is appended to the file as a
+fixed-size little-endian record, after an 8-byte magic header:
+
+    arrival_us int64 | sensor_id int32 | series_id int32 | value float64 |
+    timestamp_us int64 | transport uint8
+
+Arrival times are wall-clock microseconds, so captures appended across
+restarts stay in order. Writes are buffered and flushed about once a second;
+a crash loses at most that much, and readers skip a truncated last record.
+API keys are never written; the replayer is given them separately.
+"""
+import logging
+import os
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator
+
+from app.services.chunk_codec import to_us
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"IOTCAP1\n"
+RECORD = struct.Struct("<qiidqB")
+TRANSPORTS = ("http", "line")
+FLUSH_SECONDS = 1.0
+
+
+@dataclass(slots=True)
+class CapturedReading:
+    arrival_us: int
+    sensor_id: int
+    series_id: int
+    value: float
+    timestamp_us: int
+    transport: str
+
+
+class CaptureFormatError(ValueError):
+    """The file is not a traffic capture"""
+
+
+class TrafficRecorder:
+    """Appends accepted readings to a capture file; a no-op until started"""
+
+    def __init__(self):
+        self.path: str | None = None
+        self.recorded = 0
+        self._file = None
+        self._last_flush = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self._file is not None
+
+    def start(self, path: str):
+        with self._lock:
+            if self._file is not None:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            f = open(path, "ab", buffering=64 * 1024)
+            if f.tell() == 0:
+                f.write(MAGIC)
+            else:
+                with open(path, "rb") as existing:
+                    if existing.read(len(MAGIC)) != MAGIC:
+                        f.close()
+                        raise CaptureFormatError(f"{path} exists and is not a traffic capture")
+            self._file, self.path = f, path
+            self._last_flush = time.monotonic()
+        logger.info("Capturing ingest traffic to %s", path)
+
+    def stop(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def record(self, sensor_id: int, series_id: int, value: float, timestamp: datetime, transport: str):
+        if self._file is None:
+            return
+        record = RECORD.pack(time.time_ns() // 1000, sensor_id, series_id, value, to_us(timestamp),
+                             TRANSPORTS.index(transport))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(record)
+            self.recorded += 1
+            now = time.monotonic()
+            if now - self._last_flush >= FLUSH_SECONDS:
+                self._file.flush()
+                self._last_flush = now
+
+    def snapshot(self) -> dict:
+        return {"active": self.active, "path": self.path, "recorded": self.recorded}
+
+
+def read_capture(path: str) -> Iterator[CapturedReading]:
+    """Records of a capture file in file (arrival) order"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise CaptureFormatError(f"{path} is not a traffic capture")
+        while True:
+            data = f.read(RECORD.size * 4096)
+            usable = len(data) - len(data) % RECORD.size
+            for arrival, sensor, series, value, ts, transport in RECORD.iter_unpack(data[:usable]):
+                yield CapturedReading(arrival, sensor, series, value, ts, TRANSPORTS[transport])
+            if len(data) < RECORD.size * 4096:
+                return
+
+
+traffic_recorder = TrafficRecorder()
@@ -0,0 +1,141 @@
+"""Reporting gaps and daily uptime of a series or one of its sensors.
+
+A gap is a stretch longer than the threshold with no readings, including
+the stretches before the first and after the last reading of the range.
+Each storage tier finds its own gaps without materialising its readings:
+hot rows with a LAG() window query that returns only the rows following a
+gap, cold chunks and archived months by diffing their timestamp blocks one
+at a time. A stretch is a gap overall only if it lies in a gap of every
+tier, so the result is the intersection of the tiers' gap lists.
+"""
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable
+
+import numpy as np
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.measurement import Measurement
+from app.services import archive, cold_storage
+from app.services.chunk_codec import to_us
+from app.utils.sql import seconds_between
+
+DAY_US = 86400 * 1_000_000
+
+# (start_us, end_us) of a stretch without readings
+Gap = tuple[int, int]
+
+
+@dataclass
+class UptimeReport:
+    start_us: int
+    end_us: int
+    gaps: list[Gap]
+    # (day_start_us, seconds of the day inside the range in microseconds, downtime in microseconds)
+    days: list[tuple[int, int, int]]
+
+    @property
+    def downtime_us(self) -> int:
+        return sum(end - start for start, end in self.gaps)
+
+
+def _hot_gaps(db: Session, series_id: int, sensor_id: int | None, start: datetime, end: datetime,
+              threshold_seconds: float) -> list[Gap]:
+    criteria = [Measurement.series_id == series_id, Measurement.timestamp >= start, Measurement.timestamp <= end]
+    if sensor_id is not None:
+        criteria.append(Measurement.sensor_id == sensor_id)
+    ordered = select(
+        Measurement.timestamp.label("ts"),
+        func.lag(Measurement.timestamp, type_=Measurement.timestamp.type).over(order_by=Measurement.timestamp).label("prev"),
+    ).where(*criteria).subquery()
+    # Only the first row and rows following a gap leave the database
+    stmt = select(ordered.c.prev, ordered.c.ts).where(or_(
+        ordered.c.prev.is_(None),
+        seconds_between(db.get_bind(), ordered.c.ts, ordered.c.prev) > threshold_seconds,
+    )).order_by(ordered.c.ts)
+
+    start_us, end_us, threshold_us = to_us(start), to_us(end), threshold_seconds * 1_000_000
+    gaps = []
+    for prev, ts in db.execute(stmt):
+        low = to_us(prev) if prev is not None else start_us
+        if to_us(ts) - low > threshold_us:
+            gaps.append((low, to_us(ts)))
+    last = db.query(func.max(Measurement.timestamp)).filter(*criteria).scalar()
+    low = to_us(last) if last is not None else start_us
+    if end_us - low > threshold_us:
+        gaps.append((low, end_us))
+    return gaps
+
+
+def _block_gaps(blocks: Iterable[np.ndarray], start_us: int, end_us: int, threshold_us: float) -> list[Gap]:
+    """Gaps in a stream of sorted, non-overlapping timestamp blocks"""
+    gaps = []
+    previous = start_us
+    for timestamps in blocks:
+        if not len(timestamps):
+            continue
+        points = np.concatenate(([previous], timestamps))
+        after = np.flatnonzero(np.diff(points) > threshold_us)
+        gaps.extend(zip(points[after].tolist(), points[after + 1].tolist()))
+        previous = max(previous, int(points[-1]))
+    if end_us - previous > threshold_us:
+        gaps.append((previous, end_us))
+    return gaps
+
+
+def _intersect(a: list[Gap], b: list[Gap]) -> list[Gap]:
+    out = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        low, high = max(a[i][0], b[j][0]), min(a[i][1], b[j][1])
+        if low < high:
+            out.append((low, high))
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return out
+
+
+def _daily(gaps: list[Gap], start_us: int, end_us: int) -> list[tuple[int, int, int]]:
+    days = []
+    day = start_us - start_us % DAY_US
+    first = 0
+    while day < end_us:
+        low, high = max(day, start_us), min(day + DAY_US, end_us)
+        while first < len(gaps) and gaps[first][1] <= low:
+            first += 1
+        down = 0
+        k = first
+        while k < len(gaps) and gaps[k][0] < high:
+            down += min(gaps[k][1], high) - max(gaps[k][0], low)
+            k += 1
+        days.append((day, high - low, down))
+        day += DAY_US
+    return days
+
+
+def uptime_report(db: Session, series_id: int, sensor_id: int | None, start: datetime, end: datetime,
+                  threshold_seconds: float) -> UptimeReport:
+    """Gaps longer than `threshold_seconds` in [start, end] (end capped at now) and UTC daily uptime.
+
+    `start` and `end` must be timezone-aware.
+    """
+    end = min(end, datetime.now(timezone.utc))
+    start_us, end_us = to_us(start), to_us(end)
+    threshold_us = threshold_seconds * 1_000_000
+    if end_us <= start_us:
+        return UptimeReport(start_us, max(start_us, end_us), [], [])
+
+    gaps = _hot_gaps(db, series_id, sensor_id, start, end, threshold_seconds)
+    if gaps and cold_storage.series_with_chunks(db, [series_id], start, end):
+        blocks = (block.timestamps for block in cold_storage.iter_chunk_blocks(db, series_id, start, end, sensor_id))
+        gaps = _intersect(gaps, _block_gaps(blocks, start_us, end_us, threshold_us))
+    partitions = archive.partitions_for(db, [series_id], start, end) if gaps else []
+    if partitions:
+        blocks = (archive.read_partition(part, start, end, sensor_id).timestamps for part in partitions)
+        gaps = _intersect(gaps, _block_gaps(blocks, start_us, end_us, threshold_us))
+
+    gaps = [(low, high) for low, high in gaps if high - low > threshold_us]
+    return UptimeReport(start_us, end_us, gaps, _daily(gaps, start_us, end_us))
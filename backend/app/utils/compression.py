@@ -0,0 +1,190 @@
+"""Negotiated response compression (zstd, brotli, gzip).
+
+Pure ASGI middleware: the first body chunk decides whether the response is
+compressed at all, so small or already-encoded responses pass through
+untouched, and streaming responses are compressed chunk by chunk.
+"""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional codec
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional codec
+    zstandard = None
+
+# Content types that are already compressed or not worth compressing
+SKIP_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip",
+                      "application/octet-stream", "text/event-stream")
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=min(level, 11))
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def flush(self) -> bytes:
+        return self._obj.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+def available_encodings() -> dict:
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = _ZstdCompressor
+    if brotli is not None:
+        encodings["br"] = _BrotliCompressor
+    encodings["gzip"] = _GzipCompressor
+    return encodings
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    compressor = available_encodings()[encoding](level)
+    return compressor.compress(data) + compressor.flush()
+
+
+def negotiate(accept_encoding: str, preferred: list[str]) -> str | None:
+    """Pick the first server-preferred encoding the client accepts with q > 0"""
+    accepted = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+
+    for encoding in preferred:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, level: int = 5, encodings: list[str] | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+        supported = available_encodings()
+        self._compressors = supported
+        self.preferred = [e for e in (encodings or list(supported)) if e in supported]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = negotiate(accept, self.preferred) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+def _with_vary(headers: list) -> list:
+    vary = [v.decode("latin-1") for k, v in headers if k.lower() == b"vary"]
+    values = [part.strip() for v in vary for part in v.split(",") if part.strip()]
+    if "accept-encoding" not in (v.lower() for v in values):
+        values.append("Accept-Encoding")
+    return [(k, v) for k, v in headers if k.lower() != b"vary"] + [(b"vary", ", ".join(values).encode("latin-1"))]
+
+
+class _CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self._middleware = middleware
+        self._encoding = encoding
+        self._send = send
+        self._start = None
+        self._compressor = None
+        self._passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self._start = message
+            return
+        if message["type"] != "http.response.body":
+            await self._send(message)
+            return
+
+        if self._start is not None:
+            await self._first_body(message)
+        elif self._passthrough:
+            await self._send(message)
+        else:
+            body = self._compressor.compress(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if not more_body:
+                body += self._compressor.flush()
+            if body or not more_body:
+                await self._send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+    async def _first_body(self, message):
+        start, self._start = self._start, None
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        headers = [(k, v) for k, v in start["headers"]]
+        names = {k.lower(): v for k, v in headers}
+        content_type = names.get(b"content-type", b"").decode("latin-1")
+
+        skip = (
+            b"content-encoding" in names
+            or content_type.startswith(SKIP_CONTENT_TYPES)
+            or (not more_body and len(body) < self._middleware.minimum_size)
+        )
+        if skip:
+            self._passthrough = True
+            if b"content-encoding" not in names:
+                headers = _with_vary(headers)
+            await self._send({**start, "headers": headers})
+            await self._send(message)
+            return
+
+        self._compressor = self._middleware._compressors[self._encoding](self._middleware.level)
+        compressed = self._compressor.compress(body)
+        if not more_body:
+            compressed += self._compressor.flush()
+
+        headers = _with_vary([(k, v) for k, v in headers if k.lower() != b"content-length"])
+        headers.append((b"content-encoding", self._encoding.encode()))
+        if not more_body:
+            headers.append((b"content-length", str(len(compressed)).encode()))
+        await self._send({**start, "headers": headers})
+        await self._send({"type": "http.response.body", "body": compressed, "more_body": more_body})
@@ -0,0 +1,164 @@
+"""Admission control: per-key token buckets and a global in-flight limit.
+
+Token buckets refill at `rate` tokens per second up to `rate * burst_seconds`
+(at least one token), so a sensor that buffered readings while offline can
+flush them in one go but cannot sustain more than its rate. The concurrency
+middleware sheds requests with 503 once more are in flight than the database
+pool can serve, instead of letting them queue on pool checkout.
+"""
+import asyncio
+import math
+import threading
+import time
+
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+from app.utils.security import decode_access_token
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by sensor id or client, with an optional per-key rate"""
+
+    def __init__(self, rate: float, burst_seconds: float, max_keys: int = 100_000):
+        self.rate = rate
+        self.burst_seconds = burst_seconds
+        self.max_keys = max_keys
+        self.allowed = 0
+        self.limited = 0
+        # key -> (tokens, last refill, time the bucket is full again)
+        self._buckets: dict = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, rate: float | None = None, cost: float = 1.0) -> float:
+        """Take `cost` tokens; returns 0 if allowed, else seconds until it would be"""
+        rate = self.rate if rate is None else rate
+        if rate <= 0:
+            return 0.0
+        burst = max(1.0, rate * self.burst_seconds)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._buckets.get(key)
+            tokens = burst if entry is None else min(burst, entry[0] + (now - entry[1]) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            if len(self._buckets) > self.max_keys:
+                self._sweep(now)
+
+            if allowed:
+                self.allowed += 1
+                return 0.0
+            self.limited += 1
+            return (cost - tokens) / rate
+
+    def _sweep(self, now: float):
+        # Full buckets carry no state, so forgetting them is free
+        idle = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in idle:
+            del self._buckets[key]
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+    def snapshot(self) -> dict:
+        return {"allowed": self.allowed, "limited": self.limited, "tracked_keys": len(self._buckets)}
+
+
+def too_many_requests(retry_after: float, detail: str = "Rate limit exceeded") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+    )
+
+
+def client_address(request: Request) -> str:
+    """Address of the client, read from X-Forwarded-For behind TRUSTED_PROXY_HOPS proxies.
+
+    Each trusted proxy appends the address it received the request from, so
+    the entry that many places from the end is the one the outermost proxy
+    saw; anything before it is client-supplied and ignored.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",") if entry.strip()]
+        if forwarded:
+            return forwarded[max(0, len(forwarded) - hops)]
+    return request.client.host if request.client else "unknown"
+
+
+def client_key(request: Request) -> str:
+    """The signed-in user for a valid bearer token, otherwise the client address.
+
+    Reads need no token, so an unverified one cannot name a bucket: a client
+    sending a fresh random token per request would never be limited.
+    """
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        payload = decode_access_token(authorization[7:].strip())
+        if payload is not None and payload.get("sub"):
+            return "user:" + str(payload["sub"])
+    return "ip:" + client_address(request)
+
+
+sensor_limiter = TokenBucketLimiter(settings.SENSOR_RATE_LIMIT, settings.RATE_LIMIT_BURST_SECONDS)
+read_limiter = TokenBucketLimiter(settings.READ_RATE_LIMIT, settings.RATE_LIMIT_BURST_SECONDS)
+
+
+async def limit_reads(request: Request):
+    """Dependency for public read endpoints, limited per client"""
+    retry_after = read_limiter.acquire(client_key(request))
+    if retry_after:
+        raise too_many_requests(retry_after)
+
+
+class ConcurrencyLimitMiddleware:
+    """Caps in-flight requests under `prefix`; waits up to `queue_timeout` for a slot, then 503"""
+
+    def __init__(self, app, max_concurrent: int, queue_timeout: float = 0.5, prefix: str = "/api/"):
+        self.app = app
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.prefix = prefix
+        self.in_flight = 0
+        self.shed = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            await self._reject(send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    async def _reject(self, send):
+        body = b'{"detail":"Server busy, retry shortly"}'
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", b"1"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
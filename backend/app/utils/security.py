@@ -1,3 +1,5 @@
+import hashlib
+import hmac
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -6,6 +8,9 @@ from app.config import settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# Leading characters of a sensor API key stored in clear for lookup and display
+API_KEY_PREFIX_LENGTH = 12
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -32,3 +37,17 @@ def decode_access_token(token: str):
         return payload
     except JWTError:
         return None
+
+
+def api_key_prefix(api_key: str) -> str:
+    return api_key[:API_KEY_PREFIX_LENGTH]
+
+
+def hash_api_key(api_key: str) -> str:
+    """Keyed HMAC-SHA256 of a sensor API key (hex); API keys are random, so no slow hash is needed"""
+    secret = (settings.API_KEY_SECRET or settings.SECRET_KEY).encode()
+    return hmac.new(secret, api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_api_key(api_key: str, api_key_hash: str) -> bool:
+    return hmac.compare_digest(hash_api_key(api_key), api_key_hash)
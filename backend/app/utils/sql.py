@@ -0,0 +1,65 @@
+import functools
+
+from sqlalchemy import select, delete, func, text, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def dialect_insert(bind, model):
+    """INSERT construct with ON CONFLICT support for the bind's dialect"""
+    if bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def per_dialect(build):
+    """Build a statement once per dialect and reuse it.
+
+    `build(bind)` runs on first use for each dialect. Executing the same
+    construct again skips rebuilding it and recomputing its cache key, so
+    SQLAlchemy goes straight to its compiled-statement cache.
+    """
+    built = {}
+
+    @functools.wraps(build)
+    def statement(bind):
+        stmt = built.get(bind.dialect.name)
+        if stmt is None:
+            stmt = built[bind.dialect.name] = build(bind)
+        return stmt
+    return statement
+
+
+def precompiled(bind, stmt, keys: list[str]):
+    """Cacheable text() rendering of `stmt` for the bind's dialect, taking `keys` as parameters.
+
+    Dialect-specific INSERT .. ON CONFLICT constructs have no cache key, so
+    SQLAlchemy compiles them again on every execution. The text form keeps
+    the bind types and any RETURNING columns and is compiled only once.
+    Single-row executions only: text() cannot batch RETURNING rows.
+    """
+    compiled = stmt.compile(dialect=type(bind.dialect)(paramstyle="named"), column_keys=keys)
+    clause = text(str(compiled)).bindparams(*(bindparam(name, type_=b.type) for name, b in compiled.binds.items()))
+    if compiled.effective_returning:
+        clause = clause.columns(*compiled.effective_returning)
+    return clause
+
+
+def seconds_between(bind, later, earlier):
+    """SQL expression for the seconds from `earlier` to `later` (timestamp columns)"""
+    if bind.dialect.name == "sqlite":
+        return (func.julianday(later) - func.julianday(earlier)) * 86400.0
+    return func.extract("epoch", later - earlier)
+
+
+def delete_in_chunks(db, model, *criteria, chunk_size: int, on_chunk=None) -> int:
+    """Delete matching rows `chunk_size` ids per transaction; returns the total"""
+    total = 0
+    while True:
+        ids = select(model.id).where(*criteria).limit(chunk_size)
+        deleted = db.execute(delete(model).where(model.id.in_(ids))).rowcount
+        db.commit()
+        total += deleted
+        if on_chunk is not None:
+            on_chunk(deleted)
+        if deleted < chunk_size:
+            return total
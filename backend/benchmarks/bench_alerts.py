@@ -0,0 +1,53 @@
+"""Per-reading cost of alert rule evaluation on the ingest path.
+
+Feeds readings through the alert engine with no rules on the series, one
+rule of each kind, and every kind at once (the window average holding
+--window-readings readings), and reports microseconds per reading. No
+database is needed; events are left pending.
+
+    python benchmarks/bench_alerts.py [--repeat 200000]
+"""
+import sys
+import os
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.services.alerts import AlertEngine, RuleSpec, KINDS
+
+
+def us_per_reading(specs: list[RuleSpec], repeat: int, window_readings: int) -> float:
+    engine = AlertEngine(session_factory=None, check_interval=1, refresh_interval=30, max_pending=repeat * 2)
+    engine.load(specs)
+    start_ts = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    # Readings alternate around the thresholds, so rules keep changing state
+    readings = [(20 + (i % 7), start_ts + timedelta(seconds=i)) for i in range(repeat)]
+    for value, ts in readings[:window_readings]:
+        engine.observe(1, 1, value, ts)
+    started = time.perf_counter()
+    for value, ts in readings[window_readings:]:
+        engine.observe(1, 1, value, ts)
+    return (time.perf_counter() - started) / (repeat - window_readings) * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200000)
+    parser.add_argument("--window-readings", type=int, default=3600, help="Readings inside an averaging window")
+    args = parser.parse_args()
+
+    def spec(rule_id: int, kind: str) -> RuleSpec:
+        return RuleSpec(rule_id, 1, kind, 23.0, float(args.window_readings))
+
+    cases = [("no rules", [])]
+    cases += [(kind, [spec(1, kind)]) for kind in KINDS]
+    cases.append(("all kinds", [spec(i, kind) for i, kind in enumerate(KINDS)]))
+    print(f"{'rules on series':<20}{'us/reading':>12}{'readings/s':>14}")
+    for name, specs in cases:
+        us = us_per_reading(specs, args.repeat, args.window_readings)
+        print(f"{name:<20}{us:>12.2f}{1_000_000 / us:>14,.0f}")
@@ -0,0 +1,55 @@
+"""Per-request cost of sensor API key verification.
+
+Compares the old plaintext equality check, the keyed HMAC-SHA256 used for
+stored key hashes, the sensor cache's remembered-key path, and bcrypt (as
+used for user passwords) for contrast. No database is needed.
+
+    python benchmarks/bench_api_key_verification.py [--repeat 100000]
+"""
+import sys
+import os
+import argparse
+import secrets
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.services.sensor_cache import SensorCache, SensorInfo
+from app.utils.security import hash_api_key, verify_api_key, get_password_hash, verify_password
+
+
+def us_per_call(fn, repeat: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=100000)
+    args = parser.parse_args()
+
+    api_key = f"sensor_{secrets.token_urlsafe(32)}"
+    wrong_key = f"sensor_{secrets.token_urlsafe(32)}"
+    key_hash = hash_api_key(api_key)
+    info = SensorInfo(id=1, series_id=1, api_key_hash=key_hash, is_active=True, min_value=0.0, max_value=1.0)
+    cache = SensorCache(session_factory=None, ttl=60)
+    bcrypt_hash = get_password_hash(api_key)
+
+    cases = [
+        ("plaintext ==", lambda: api_key == api_key[:], args.repeat),
+        ("hmac-sha256 (valid)", lambda: verify_api_key(api_key, key_hash), args.repeat),
+        ("hmac-sha256 (invalid)", lambda: verify_api_key(wrong_key, key_hash), args.repeat),
+        ("cached key (valid)", lambda: cache.verify_key(info, api_key), args.repeat),
+        ("cached key (invalid)", lambda: cache.verify_key(info, wrong_key), args.repeat),
+        ("bcrypt", lambda: verify_password(api_key, bcrypt_hash), 20),
+    ]
+    print(f"{'check':<26}{'us/call':>12}{'calls/s':>14}")
+    for name, fn, repeat in cases:
+        us = us_per_call(fn, repeat)
+        print(f"{name:<26}{us:>12.2f}{1_000_000 / us:>14,.0f}")
@@ -0,0 +1,214 @@
+"""Endpoint latency and SQL statement counts through the real app, with regression checks.
+
+Runs `app.main:app` in-process with TestClient against a throwaway database
+(a SQLite file by default, or any URL given with --database-url, whose
+tables are dropped and recreated). The database is seeded at each size in
+--sizes, then every case is timed for --requests requests, recording the
+latency distribution and the number of SQL statements per request.
+
+    python benchmarks/bench_endpoints.py --sizes 1000 100000 --save-baseline baseline.json
+    python benchmarks/bench_endpoints.py --sizes 1000 100000 --baseline baseline.json --tolerance 0.25
+
+With --baseline the run exits non-zero when a case's median latency grows
+by more than the tolerance or it issues more statements than recorded.
+"""
+import sys
+import os
+import argparse
+import json
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SENSOR_KEY = "sensor_benchmark_key"
+ADMIN_PASSWORD = "benchmark"
+
+
+def configure(database_url: str):
+    # Settings are read at import time, so the environment must be set first
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ["SENSOR_RATE_LIMIT"] = "0"
+    os.environ["READ_RATE_LIMIT"] = "0"
+    os.environ["READ_DATABASE_URLS"] = ""
+
+
+class StatementCounter:
+    def __init__(self, engine):
+        from sqlalchemy import event
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+
+def seed(size: int, start: datetime):
+    from sqlalchemy import insert
+    from app.database import Base, SessionLocal, engine
+    from app.models import Measurement, Sensor, Series, User
+    from app.services.sensor_cache import sensor_cache
+    from app.utils.security import get_password_hash, api_key_prefix, hash_api_key
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    sensor_cache.invalidate()
+
+    db = SessionLocal()
+    try:
+        db.add(User(email="bench@example.com", username="bench", is_admin=True,
+                    password_hash=get_password_hash(ADMIN_PASSWORD)))
+        for name in ("Temperature", "Humidity"):
+            db.add(Series(name=name, unit="x", min_value=0, max_value=100, color="#336699"))
+        db.flush()
+        db.add(Sensor(name="bench", series_id=1, api_key_prefix=api_key_prefix(SENSOR_KEY),
+                      api_key_hash=hash_api_key(SENSOR_KEY)))
+        db.commit()
+
+        batch = []
+        for i in range(size):
+            batch.append({"series_id": 1 + i % 2, "sensor_id": None, "value": 20 + (i % 50) / 10,
+                          "timestamp": start + timedelta(seconds=10 * i)})
+            if len(batch) == 50000:
+                db.execute(insert(Measurement), batch)
+                batch = []
+        if batch:
+            db.execute(insert(Measurement), batch)
+        db.commit()
+    finally:
+        db.close()
+
+
+def make_cases(client, size: int, start: datetime) -> dict:
+    token = client.post("/api/auth/login", data={"username": "bench", "password": ADMIN_PASSWORD}).json()["access_token"]
+    admin = {"Authorization": f"Bearer {token}"}
+    window_start = start + timedelta(seconds=10 * size // 2)
+    window_end = window_start + timedelta(hours=1)
+    counter = iter(range(10**9))
+
+    def future_ts() -> str:
+        return (start + timedelta(days=3650, seconds=next(counter))).isoformat()
+
+    return {
+        "login": lambda: client.post("/api/auth/login", data={"username": "bench", "password": ADMIN_PASSWORD}),
+        "list_series": lambda: client.get("/api/series"),
+        "get_measurements": lambda: client.get("/api/measurements?series_ids=1&limit=1000"),
+        "get_measurements_window": lambda: client.get(
+            "/api/measurements", params={"series_ids": "1,2", "start_date": window_start.isoformat(),
+                                         "end_date": window_end.isoformat()}),
+        "submit_sensor_data": lambda: client.post(
+            "/api/sensors/1/measurements", headers={"X-API-Key": SENSOR_KEY},
+            json={"series_id": 1, "value": 21.5, "timestamp": future_ts()}),
+        "create_measurement": lambda: client.post(
+            "/api/measurements", headers=admin,
+            json={"series_id": 2, "value": 55.0, "timestamp": future_ts()}),
+    }
+
+
+def run_case(fn, counter: StatementCounter, requests: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        fn()
+    latencies, statements = [], []
+    for _ in range(requests):
+        counter.count = 0
+        started = time.perf_counter()
+        response = fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+        statements.append(counter.count)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text}")
+
+    quantiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "max_ms": max(latencies),
+        "statements": statistics.median(statements),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    failures = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if result["p50_ms"] > base["p50_ms"] * (1 + tolerance):
+            failures.append(f"{key}: p50 {result['p50_ms']:.2f} ms vs baseline {base['p50_ms']:.2f} ms")
+        if result["statements"] > base["statements"]:
+            failures.append(f"{key}: {result['statements']:g} statements vs baseline {base['statements']:g}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", help="Database to use (its tables are dropped!); default: temporary SQLite file")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000], help="Seeded measurement counts")
+    parser.add_argument("--requests", type=int, default=200, help="Timed requests per case")
+    parser.add_argument("--login-requests", type=int, default=10, help="Timed requests for login (bcrypt is slow)")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="+", help="Run only these cases")
+    parser.add_argument("--baseline", help="Fail if results regress against this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative p50 growth")
+    parser.add_argument("--save-baseline", help="Write results as a new JSON baseline")
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        args.database_url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    configure(args.database_url)
+
+    from fastapi.testclient import TestClient
+    from app.database import engine
+    from app.main import app
+
+    counter = StatementCounter(engine)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    results = {}
+    print(f"Database: {engine.url.render_as_string(hide_password=True)}")
+    for size in args.sizes:
+        print(f"\n=== {size} measurements ===")
+        seed(size, start)
+        with TestClient(app) as client:
+            cases = make_cases(client, size, start)
+            print(f"{'case':<26}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}{'stmts':>8}")
+            for name, fn in cases.items():
+                if args.only and name not in args.only:
+                    continue
+                requests = args.login_requests if name == "login" else args.requests
+                result = run_case(fn, counter, requests, 1 if name == "login" else args.warmup)
+                results[f"{name}@{size}"] = result
+                print(f"{name:<26}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                      f"{result['max_ms']:>10.2f}{result['statements']:>8g}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.save_baseline}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.tolerance)
+        if failures:
+            print(f"\nRegressions (tolerance {args.tolerance:.0%}):")
+            for failure in failures:
+                print(f"  ✗ {failure}")
+            status = 1
+        else:
+            print(f"\n✓ No regressions against {args.baseline}")
+
+    if tmpdir is not None:
+        engine.dispose()
+        tmpdir.cleanup()
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
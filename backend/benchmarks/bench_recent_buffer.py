@@ -0,0 +1,117 @@
+"""Last-hour reads served from the recent buffer versus the database, and the ingest cost of filling it.
+
+Seeds --series series with one reading every --interval seconds over the
+last hour into a SQLite file, then times reading the last --minutes minutes
+of --read-series series through the database read path (iter_measurements,
+fresh session per read, as a request does) and from the recent buffer,
+both ending in measurement rows. Also reports the per-reading cost of
+RecentBuffer.record on the ingest path. The database numbers are a lower
+bound for PostgreSQL, which adds a network round trip per query.
+
+    python benchmarks/bench_recent_buffer.py [--series 20] [--interval 1] [--repeat 200]
+"""
+import sys
+import os
+import argparse
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models import Measurement, Series
+from app.services.recent_buffer import RecentBuffer
+from app.services.timeseries import MeasurementRow, iter_measurements
+from app.utils.sql import dialect_insert
+
+
+def setup(path: str, series: int, interval: float, now: datetime):
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autoflush=False, bind=engine)
+    db = factory()
+    for series_id in range(1, series + 1):
+        db.add(Series(id=series_id, name=f"bench {series_id}", unit="C", color="#000000",
+                      min_value=-100, max_value=100))
+    db.flush()
+    count = int(3600 / interval)
+    for series_id in range(1, series + 1):
+        db.execute(dialect_insert(engine, Measurement), [
+            {"series_id": series_id, "sensor_id": None, "value": i % 50,
+             "timestamp": now - timedelta(seconds=3600 - i * interval)}
+            for i in range(count)
+        ])
+    db.commit()
+    db.close()
+    return factory
+
+
+def timed(call, repeat: int) -> float:
+    """Milliseconds per call"""
+    call()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        call()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--series", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=1, help="Seconds between readings of a series")
+    parser.add_argument("--read-series", type=int, default=4, help="Series per read")
+    parser.add_argument("--minutes", type=float, default=60, help="Length of the read range")
+    parser.add_argument("--limit", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    now = datetime.now(timezone.utc)
+    with tempfile.TemporaryDirectory() as tmp:
+        factory = setup(os.path.join(tmp, "bench.db"), args.series, args.interval, now)
+        # The window covers the seeded hour plus the run time
+        buffer = RecentBuffer(lambda series_id: factory(), 3600 + 600, 50_000_000)
+        started = time.perf_counter()
+        for series_id in range(1, args.series + 1):
+            buffer._load(series_id)
+        warm_ms = (time.perf_counter() - started) * 1000
+
+        series_ids = list(range(1, args.read_series + 1))
+        start = now - timedelta(minutes=args.minutes)
+
+        def from_database():
+            db = factory()
+            try:
+                return list(iter_measurements(db, series_ids, start, None, args.limit))
+            finally:
+                db.close()
+
+        def from_buffer():
+            return buffer.read(series_ids, start, None, args.limit)
+
+        assert [row.id for row in from_database()] == [row.id for row in from_buffer()]
+        rows = len(from_buffer())
+        warmed = buffer.snapshot()
+        database_ms = timed(from_database, args.repeat)
+        buffer_ms = timed(from_buffer, args.repeat)
+
+        readings = [MeasurementRow(id=10**9 + i, series_id=1 + i % args.series, sensor_id=None, value=1.0,
+                                   timestamp=now + timedelta(milliseconds=i), created_at=now)
+                    for i in range(100_000)]
+        started = time.perf_counter()
+        for i in range(0, len(readings), 100):
+            buffer.record(readings[i:i + 100])
+        record_us = (time.perf_counter() - started) / len(readings) * 1_000_000
+
+        print(f"warm-up: {args.series} series, {warmed['readings']:,} readings in {warm_ms:.0f} ms, "
+              f"{warmed['bytes'] / 1e6:.1f} MB allocated")
+        print(f"read of {args.read_series} series, last {args.minutes:g} min ({rows:,} rows):")
+        print(f"  {'database':<10}{database_ms:>9.2f} ms")
+        print(f"  {'buffer':<10}{buffer_ms:>9.2f} ms  ({database_ms / buffer_ms:.1f}x)")
+        print(f"ingest: {record_us:.2f} us per recorded reading (batches of 100)")
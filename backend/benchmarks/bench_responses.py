@@ -0,0 +1,95 @@
+"""CPU cost and bytes on the wire for typical chart payloads.
+
+Compares the serialisation paths for a `GET /api/measurements` response
+(stdlib json as used by JSONResponse, orjson as used by ORJSONResponse,
+and pydantic-core `dump_json`) and then each compression codec/level on
+the resulting JSON. No database is needed.
+
+    python benchmarks/bench_responses.py [--rows 1000 10000] [--repeat 20]
+"""
+import sys
+import os
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from pydantic import TypeAdapter
+
+from app.schemas.measurement import MeasurementResponse
+from app.services.timeseries import MeasurementRow
+from app.utils.compression import available_encodings, compress
+
+LEVELS = {"gzip": (1, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 6, 12)}
+
+
+def make_rows(n: int) -> list[MeasurementRow]:
+    start = datetime.now(timezone.utc) - timedelta(seconds=10 * n)
+    value = 21.0
+    rows = []
+    for i in range(n):
+        value = max(0.0, min(50.0, value + random.uniform(-0.3, 0.3)))
+        ts = start + timedelta(seconds=10 * i, microseconds=random.randint(0, 999999))
+        rows.append(MeasurementRow(i + 1, 1 + i % 2, 1 + i % 2, round(value, 2), ts, ts))
+    return rows
+
+
+def cpu_ms(fn, repeat: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat * 1000
+
+
+def bench_serialisation(rows, repeat: int) -> bytes:
+    adapter = TypeAdapter(List[MeasurementResponse])
+
+    def stdlib_json():
+        # JSONResponse path: validate, serialise to dicts, json.dumps
+        models = adapter.validate_python(rows, from_attributes=True)
+        return json.dumps(adapter.dump_python(models, mode="json"), ensure_ascii=False,
+                          separators=(",", ":")).encode()
+
+    def fastapi_orjson():
+        # Default response class path: validate, serialise to dicts, orjson
+        models = adapter.validate_python(rows, from_attributes=True)
+        return orjson.dumps(adapter.dump_python(models, mode="json"))
+
+    def dump_json():
+        # get_measurements: validate and serialise to bytes in pydantic-core
+        return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+    print(f"{'serialiser':<28}{'cpu ms/req':>12}{'bytes':>12}")
+    for name, fn in (("stdlib json", stdlib_json), ("orjson", fastapi_orjson), ("pydantic dump_json", dump_json)):
+        print(f"{name:<28}{cpu_ms(fn, repeat):>12.2f}{len(fn()):>12}")
+    return dump_json()
+
+
+def bench_compression(payload: bytes, repeat: int):
+    print(f"\n{'encoding':<14}{'level':>6}{'cpu ms/req':>12}{'bytes':>12}{'ratio':>8}")
+    print(f"{'identity':<14}{'-':>6}{0.0:>12.2f}{len(payload):>12}{1.0:>8.1f}")
+    for encoding in available_encodings():
+        for level in LEVELS[encoding]:
+            size = len(compress(payload, encoding, level))
+            ms = cpu_ms(lambda: compress(payload, encoding, level), repeat)
+            print(f"{encoding:<14}{level:>6}{ms:>12.2f}{size:>12}{len(payload) / size:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(42)
+    for n in args.rows:
+        print(f"\n=== {n} measurements ===")
+        payload = bench_serialisation(make_rows(n), args.repeat)
+        bench_compression(payload, args.repeat)
@@ -0,0 +1,190 @@
+"""Bytes per row, insert throughput and index size of measurement row layouts.
+
+Builds each layout in a scratch schema of a PostgreSQL database: the legacy
+one (int id with a duplicate id index, padded column order, created_at) and
+the compact one from migration b7e4a9c2d5f1, with and without created_at.
+For each layout it:
+
+1. times batched multi-row INSERTs into the indexed table, as the ingest
+   writer issues them;
+2. bulk-loads the table to --rows rows and vacuums it;
+3. reports the average tuple size, heap bytes per row and each index's size.
+
+    python benchmarks/bench_row_layout.py --database-url postgresql://... --rows 5000000
+
+Nothing outside the scratch schema is touched, and it is dropped at the end.
+"""
+import sys
+import os
+import argparse
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench_row_layout"
+SERIES = 100
+SENSORS = 1000
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+LAYOUTS = {
+    "legacy": {
+        "columns": "id serial PRIMARY KEY, series_id integer NOT NULL, sensor_id integer, "
+                   "value double precision NOT NULL, timestamp timestamptz NOT NULL, "
+                   "created_at timestamptz NOT NULL DEFAULT now()",
+        "indexes": ["CREATE INDEX {n}_id ON {t} (id)"],
+    },
+    "compact": {
+        "columns": "id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, timestamp timestamptz NOT NULL, "
+                   "value double precision NOT NULL, created_at timestamptz NOT NULL DEFAULT now(), "
+                   "series_id integer NOT NULL, sensor_id integer",
+        "indexes": [],
+    },
+    "compact_no_created_at": {
+        "columns": "id bigint GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY, timestamp timestamptz NOT NULL, "
+                   "value double precision NOT NULL, series_id integer NOT NULL, sensor_id integer",
+        "indexes": [],
+    },
+}
+# Indexes every layout carries (see models/measurement.py)
+COMMON_INDEXES = [
+    "ALTER TABLE {t} ADD CONSTRAINT {n}_sensor_ts UNIQUE (sensor_id, timestamp)",
+    "CREATE INDEX {n}_series_ts ON {t} (series_id, timestamp)",
+    "CREATE INDEX {n}_ts ON {t} (timestamp)",
+]
+
+
+def reading(i: int) -> tuple:
+    """Deterministic reading i: 100 series, 1000 sensors, every fifth reading without a sensor"""
+    sensor = None if i % 5 == 0 else 1 + i % SENSORS
+    return 1 + i % SERIES, sensor, 20 + (i % 1000) / 100, START + timedelta(seconds=i)
+
+
+def create_layout(conn, name: str):
+    table = f"{SCHEMA}.{name}"
+    spec = LAYOUTS[name]
+    conn.execute(text(f"CREATE TABLE {table} ({spec['columns']})"))
+    for ddl in COMMON_INDEXES + spec["indexes"]:
+        conn.execute(text(ddl.format(t=table, n=name)))
+
+
+def time_batched_inserts(engine, name: str, rows: int, batch_size: int) -> float:
+    """Rows per second for multi-row INSERTs of `batch_size` rows, one commit per batch"""
+    from psycopg2.extras import execute_values
+
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        started = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            batch = [reading(i) for i in range(offset, min(rows, offset + batch_size))]
+            execute_values(
+                cursor,
+                f"INSERT INTO {SCHEMA}.{name} (series_id, sensor_id, value, timestamp) VALUES %s "
+                "ON CONFLICT (sensor_id, timestamp) DO NOTHING",
+                batch,
+                page_size=batch_size,
+            )
+            raw.commit()
+        return rows / (time.perf_counter() - started)
+    finally:
+        raw.close()
+
+
+def bulk_load(conn, name: str, start: int, rows: int):
+    if rows <= start:
+        return
+    conn.execute(text(f"""
+        INSERT INTO {SCHEMA}.{name} (series_id, sensor_id, value, timestamp)
+        SELECT 1 + i % {SERIES},
+               CASE WHEN i % 5 = 0 THEN NULL ELSE 1 + i % {SENSORS} END,
+               20 + (i % 1000) / 100.0,
+               timestamptz '{START.isoformat()}' + i * interval '1 second'
+        FROM generate_series(:start, :stop - 1) AS i
+    """), {"start": start, "stop": rows})
+
+
+def measure(conn, name: str) -> dict:
+    table = f"{SCHEMA}.{name}"
+    rows = conn.execute(text(f"SELECT count(*) FROM {table}")).scalar()
+    tuple_bytes = conn.execute(text(f"SELECT avg(pg_column_size(t.*)) FROM {table} t")).scalar()
+    heap = conn.execute(text("SELECT pg_relation_size(CAST(:t AS regclass))"), {"t": table}).scalar()
+    indexes = dict(conn.execute(text("""
+        SELECT c.relname, pg_relation_size(i.indexrelid)
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = CAST(:t AS regclass) ORDER BY c.relname
+    """), {"t": table}).all())
+    return {
+        "rows": rows,
+        "tuple_bytes": float(tuple_bytes),
+        "heap_bytes_per_row": heap / rows,
+        "heap_mb": heap / 2**20,
+        "index_mb": {k: v / 2**20 for k, v in indexes.items()},
+        "total_index_mb": sum(indexes.values()) / 2**20,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default=os.environ.get("DATABASE_URL"), help="PostgreSQL database")
+    parser.add_argument("--rows", type=int, default=5_000_000, help="Rows per layout for size measurements")
+    parser.add_argument("--insert-rows", type=int, default=200_000, help="Rows inserted in batches for throughput")
+    parser.add_argument("--batch-size", type=int, default=500, help="Rows per INSERT (INGEST_BATCH_SIZE)")
+    parser.add_argument("--layouts", nargs="+", choices=list(LAYOUTS), default=list(LAYOUTS))
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith("postgresql"):
+        parser.error("a PostgreSQL --database-url (or DATABASE_URL) is required")
+    engine = create_engine(args.database_url)
+    results = {}
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+            conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+        for name in args.layouts:
+            print(f"{name}: inserting {args.insert_rows} rows in batches of {args.batch_size}...")
+            with engine.begin() as conn:
+                create_layout(conn, name)
+            rate = time_batched_inserts(engine, name, args.insert_rows, args.batch_size)
+            print(f"{name}: bulk loading to {args.rows} rows...")
+            with engine.begin() as conn:
+                bulk_load(conn, name, args.insert_rows, args.rows)
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.{name}"))
+                results[name] = {"insert_rows_per_s": rate, **measure(conn, name)}
+    finally:
+        with engine.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+    print(f"\n{'layout':<24}{'tuple B':>9}{'heap B/row':>12}{'heap MB':>10}{'index MB':>10}{'insert rows/s':>15}")
+    for name, r in results.items():
+        print(f"{name:<24}{r['tuple_bytes']:>9.1f}{r['heap_bytes_per_row']:>12.1f}{r['heap_mb']:>10.1f}"
+              f"{r['total_index_mb']:>10.1f}{r['insert_rows_per_s']:>15.0f}")
+    for name, r in results.items():
+        print(f"\n{name} indexes:")
+        for index, size in r["index_mb"].items():
+            print(f"  {index:<40}{size:>10.1f} MB")
+
+    if "legacy" in results:
+        base = results["legacy"]
+        for name, r in results.items():
+            if name != "legacy":
+                saved = 1 - (r["heap_mb"] + r["total_index_mb"]) / (base["heap_mb"] + base["total_index_mb"])
+                print(f"\n✓ {name}: {saved:.1%} less disk than legacy, "
+                      f"{r['insert_rows_per_s'] / base['insert_rows_per_s']:.2f}x insert throughput")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"\nResults written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Per-request CPU spent building and compiling SQL on the hot paths, before and after statement caching.
+
+Each hot path runs twice against an in-memory SQLite database: once with
+the statement built per call as the code used to (ORM Query / fresh
+insert constructs) and once through the current cached statements. Every
+call uses a fresh session, as a request does. The report shows
+microseconds per call in total and the part spent in SQLAlchemy's compile
+step (cache key generation, compiled-cache lookup and, on a miss,
+compilation), measured by timing ClauseElement._compile_w_cache. Run
+single-threaded, wall time is CPU time; the database does no I/O.
+
+    python benchmarks/bench_statement_cache.py [--repeat 3000]
+"""
+import sys
+import os
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, func, case, or_, and_
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.sql.elements import ClauseElement
+
+from app.database import Base
+from app.models import Measurement, Sensor, Series, SeriesStats
+from app.routers import sensors as sensors_router
+from app.services import cold_storage, series_stats, timeseries
+from app.services.ingest_writer import _insert_batch
+from app.services.sensor_cache import _SENSOR_INFO
+from app.utils.sql import dialect_insert
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+compile_seconds = 0.0
+_compile_w_cache = ClauseElement._compile_w_cache
+
+
+def _timed_compile(self, *args, **kwargs):
+    global compile_seconds
+    started = time.perf_counter()
+    try:
+        return _compile_w_cache(self, *args, **kwargs)
+    finally:
+        compile_seconds += time.perf_counter() - started
+
+
+ClauseElement._compile_w_cache = _timed_compile
+
+
+# The statements as the hot paths built them before caching
+
+def old_insert_reading(db, reading):
+    stmt = dialect_insert(db.get_bind(), Measurement).values(**reading).on_conflict_do_nothing(
+        index_elements=["sensor_id", "timestamp"]
+    ).returning(Measurement)
+    return db.scalars(stmt).first()
+
+
+def old_existing_reading(db, reading):
+    return db.query(Measurement).filter(
+        Measurement.sensor_id == reading["sensor_id"],
+        Measurement.timestamp == reading["timestamp"]
+    ).first()
+
+
+def old_stats_apply(db, deltas):
+    stmt = dialect_insert(db.get_bind(), SeriesStats)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["series_id"],
+        set_={
+            "count": SeriesStats.count + excluded["count"],
+            "first_timestamp": series_stats._widen("first_timestamp", excluded.first_timestamp, smaller=True),
+            "last_timestamp": series_stats._widen("last_timestamp", excluded.last_timestamp, smaller=False),
+            "last_value": case(
+                (and_(excluded.last_timestamp.isnot(None),
+                      or_(SeriesStats.last_timestamp.is_(None), excluded.last_timestamp >= SeriesStats.last_timestamp)),
+                 excluded.last_value),
+                else_=SeriesStats.last_value,
+            ),
+            "min_value": series_stats._widen("min_value", excluded.min_value, smaller=True),
+            "max_value": series_stats._widen("max_value", excluded.max_value, smaller=False),
+        },
+    )
+    for series_id, delta in sorted(deltas.items()):
+        db.execute(stmt, {"series_id": series_id, "stale": False, **vars(delta)})
+
+
+def old_insert_batch(db, rows):
+    stmt = dialect_insert(db.get_bind(), Measurement).on_conflict_do_nothing(
+        index_elements=["sensor_id", "timestamp"]
+    ).returning(Measurement.series_id, Measurement.value, Measurement.timestamp)
+    return db.execute(stmt, rows).all()
+
+
+def old_sensor_info(db, sensor_id):
+    return db.query(
+        Sensor.id, Sensor.series_id, Sensor.api_key_hash, Sensor.is_active,
+        Series.min_value, Series.max_value,
+        func.coalesce(Sensor.rate_limit, Series.rate_limit)
+    ).join(Series, Series.id == Sensor.series_id).filter(Sensor.id == sensor_id).first()
+
+
+def old_read_range(db, series_ids, start, end, limit):
+    query = db.query(Measurement)
+    if series_ids is not None:
+        query = query.filter(Measurement.series_id.in_(series_ids))
+    if start:
+        query = query.filter(Measurement.timestamp >= start)
+    if end:
+        query = query.filter(Measurement.timestamp <= end)
+    query = query.order_by(Measurement.timestamp.asc(), Measurement.id.asc()).limit(limit)
+    hot = query.all()
+    # The old chunk lookup
+    chunks = db.query(cold_storage.MeasurementChunk.series_id).distinct().filter(
+        cold_storage.MeasurementChunk.series_id.in_(series_ids),
+        cold_storage.MeasurementChunk.end_ts >= start,
+        cold_storage.MeasurementChunk.start_ts <= end,
+    ).all()
+    return hot, chunks
+
+
+def old_get_series(db, series_id):
+    return db.query(Series).filter(Series.id == series_id).first()
+
+
+def setup(rows: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autoflush=False, bind=engine)
+    db = factory()
+    db.add(Series(id=1, name="bench", unit="C", color="#000000", min_value=-100, max_value=100))
+    db.add(Sensor(id=1, name="bench", series_id=1, api_key_prefix="x", api_key_hash="x"))
+    db.flush()
+    db.execute(dialect_insert(engine, Measurement), [
+        {"series_id": 1, "sensor_id": 1, "value": i % 50, "timestamp": START + timedelta(seconds=i)}
+        for i in range(rows)
+    ])
+    db.commit()
+    db.close()
+    return engine, factory
+
+
+def measure(factory, call, repeat: int) -> tuple[float, float]:
+    """(total, compile) microseconds per call"""
+    global compile_seconds
+    for i in range(20):
+        db = factory()
+        call(db, -i - 1)
+        db.rollback()
+        db.close()
+    compile_seconds = 0.0
+    started = time.perf_counter()
+    for i in range(repeat):
+        db = factory()
+        call(db, i)
+        db.rollback()
+        db.close()
+    total = time.perf_counter() - started
+    return total / repeat * 1_000_000, compile_seconds / repeat * 1_000_000
+
+
+def cases(engine, rows: int):
+    bind = engine
+
+    def reading(i):
+        return {"series_id": 1, "sensor_id": 1, "value": 1.0, "timestamp": START + timedelta(seconds=rows + 10 + i)}
+
+    def batch(i):
+        base = rows + 1_000_000 + i * 100
+        return [{"series_id": 1, "sensor_id": 1, "value": 1.0, "timestamp": START + timedelta(seconds=base + k)}
+                for k in range(50)]
+
+    def deltas(i):
+        return series_stats.collect([(1, float(i % 50), START + timedelta(seconds=i))])
+
+    existing = {"sensor_id": 1, "timestamp": START + timedelta(seconds=rows // 2)}
+    window = (START + timedelta(seconds=rows // 4), START + timedelta(seconds=rows // 2))
+
+    return [
+        ("sensor submit: insert", lambda db, i: old_insert_reading(db, reading(i)),
+         lambda db, i: db.scalars(sensors_router._insert_reading(bind), reading(i)).first()),
+        ("sensor submit: duplicate", lambda db, i: old_existing_reading(db, existing),
+         lambda db, i: db.scalars(sensors_router._EXISTING_READING, existing).first()),
+        ("series stats upsert", lambda db, i: old_stats_apply(db, deltas(i)),
+         lambda db, i: series_stats.apply(db, deltas(i))),
+        ("batch insert (50 rows)", lambda db, i: old_insert_batch(db, batch(i)),
+         lambda db, i: db.execute(_insert_batch(bind), batch(i)).all()),
+        ("sensor cache load", lambda db, i: old_sensor_info(db, 1),
+         lambda db, i: db.execute(_SENSOR_INFO, {"sensor_id": 1}).first()),
+        ("range read (100 rows)", lambda db, i: old_read_range(db, [1], *window, 100),
+         lambda db, i: (list(timeseries.iter_measurements(db, [1], *window, limit=100)),
+                        cold_storage.series_with_chunks(db, [1], *window))),
+        ("series by id", lambda db, i: old_get_series(db, 1), lambda db, i: db.get(Series, 1)),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3000)
+    parser.add_argument("--rows", type=int, default=20000, help="Measurements in the database")
+    args = parser.parse_args()
+
+    engine, factory = setup(args.rows)
+    print(f"{'hot path':<28}{'before us':>11}{'compile':>9}{'after us':>10}{'compile':>9}{'saved':>8}")
+    for name, before, after in cases(engine, args.rows):
+        total_before, compile_before = measure(factory, before, args.repeat)
+        total_after, compile_after = measure(factory, after, args.repeat)
+        saved = 1 - total_after / total_before
+        print(f"{name:<28}{total_before:>11.1f}{compile_before:>9.1f}{total_after:>10.1f}{compile_after:>9.1f}"
+              f"{saved:>8.0%}")
+    print(f"compiled statements cached: {len(engine._compiled_cache)}")
@@ -11,7 +11,8 @@ from app.models.user import User
 from app.models.series import Series
 from app.models.sensor import Sensor
 from app.models.measurement import Measurement
-from app.utils.security import get_password_hash
+from app.services.series_stats import rebuild_all
+from app.utils.security import get_password_hash, api_key_prefix, hash_api_key
 
 
 def add_test_data():
@@ -87,19 +88,22 @@ def add_test_data():
         sensor1 = Sensor(
             name="Living Room Temp Sensor v1",
             series_id=series_objects[0].id,
-            api_key="sensor_test_key_001",
+            api_key_prefix=api_key_prefix("sensor_test_key_001"),
+            api_key_hash=hash_api_key("sensor_test_key_001"),
             is_active=True
         )
         sensor2 = Sensor(
             name="Kitchen Energy Meter",
             series_id=series_objects[1].id,
-            api_key="sensor_test_key_002",
+            api_key_prefix=api_key_prefix("sensor_test_key_002"),
+            api_key_hash=hash_api_key("sensor_test_key_002"),
             is_active=True
         )
         sensor3 = Sensor(
             name="Bedroom Humidity Sensor (disabled)",
             series_id=series_objects[2].id,
-            api_key="sensor_test_key_003",
+            api_key_prefix=api_key_prefix("sensor_test_key_003"),
+            api_key_hash=hash_api_key("sensor_test_key_003"),
             is_active=False
         )
         db.add_all([sensor1, sensor2, sensor3])
@@ -159,6 +163,9 @@ def add_test_data():
         db.commit()
         print(f"✓ Created {measurement_count} measurements")
 
+        rebuild_all(db)
+        print(f"✓ Built series summaries")
+
         print("\n" + "="*50)
         print("Test data added successfully!")
         print("="*50)
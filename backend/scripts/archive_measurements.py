@@ -0,0 +1,58 @@
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.series import Series
+from app.services import archive
+from app.services.sharding import shards
+
+
+def archive_measurements(series_id=None, older_than_days=None, prune=None):
+    if not archive.enabled():
+        print("Error: ARCHIVE_DIR is not set")
+        sys.exit(1)
+    older_than_days = older_than_days if older_than_days is not None else settings.ARCHIVE_AFTER_DAYS
+    prune = settings.ARCHIVE_PRUNE if prune is None else prune
+    before = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+
+    db = SessionLocal()
+    try:
+        if series_id is not None:
+            series_ids = [series_id]
+        else:
+            series_ids = [sid for (sid,) in db.query(Series.id).order_by(Series.id).all()]
+
+        print(f"Archiving whole months before {archive.month_start(before):%Y-%m} to {settings.ARCHIVE_DIR}...")
+        total_rows = total_bytes = 0
+        for sid in series_ids:
+            with shards.series_session(sid, db) as series_db:
+                result = archive.archive_series(series_db, sid, before, prune)
+            if result["partitions"] or result["pruned"]:
+                print(f"✓ Series {sid}: {result['rows']} rows in {result['partitions']} month(s), "
+                      f"{result['bytes']} bytes, {result['pruned']} month(s) pruned")
+            total_rows += result["rows"]
+            total_bytes += result["bytes"]
+
+        print(f"\nWrote {total_rows} rows into {total_bytes} bytes of Parquet")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export closed months of measurements to Parquet files")
+    parser.add_argument("--series-id", type=int, help="Only archive this series")
+    parser.add_argument("--older-than-days", type=int, help="Age threshold (default: ARCHIVE_AFTER_DAYS)")
+    parser.add_argument("--prune", action=argparse.BooleanOptionalAction, default=None,
+                        help="Delete archived rows from the database (default: ARCHIVE_PRUNE)")
+    args = parser.parse_args()
+    archive_measurements(args.series_id, args.older_than_days, args.prune)
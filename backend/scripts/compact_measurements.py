@@ -0,0 +1,55 @@
+import sys
+import os
+import argparse
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.series import Series
+from app.services.cold_storage import compact_series
+from app.services.sharding import shards
+
+
+def compact_measurements(series_id=None, older_than_days=None, chunk_hours=None):
+    older_than_days = older_than_days if older_than_days is not None else settings.COLD_STORAGE_AFTER_DAYS
+    chunk_hours = chunk_hours or settings.COLD_CHUNK_HOURS
+    before = datetime.now(timezone.utc) - timedelta(days=older_than_days)
+    span = timedelta(hours=chunk_hours)
+
+    db = SessionLocal()
+    try:
+        if series_id is not None:
+            series_ids = [series_id]
+        else:
+            series_ids = [sid for (sid,) in db.query(Series.id).order_by(Series.id).all()]
+
+        print(f"Packing readings older than {before.isoformat()} into {chunk_hours}h chunks...")
+        total_rows = total_bytes = 0
+        for sid in series_ids:
+            with shards.series_session(sid, db) as series_db:
+                result = compact_series(series_db, sid, before, span)
+            if result["rows"]:
+                print(f"✓ Series {sid}: {result['rows']} rows -> {result['chunks']} chunks "
+                      f"({result['bytes'] / result['rows']:.2f} bytes/row)")
+            total_rows += result["rows"]
+            total_bytes += result["bytes"]
+
+        print(f"\nPacked {total_rows} rows into {total_bytes} bytes")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move old measurements into compressed cold-storage chunks")
+    parser.add_argument("--series-id", type=int, help="Only compact this series")
+    parser.add_argument("--older-than-days", type=int, help="Age threshold (default: COLD_STORAGE_AFTER_DAYS)")
+    parser.add_argument("--chunk-hours", type=int, help="Chunk window size (default: COLD_CHUNK_HOURS)")
+    args = parser.parse_args()
+    compact_measurements(args.series_id, args.older_than_days, args.chunk_hours)
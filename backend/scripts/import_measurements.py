@@ -0,0 +1,54 @@
+import sys
+import os
+import argparse
+import csv
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.services.bulk_import import ImportReport, import_file
+
+
+def import_measurements(paths, fmt=None, series_id=None, chunk_rows=None, rejects_path=None):
+    chunk_rows = chunk_rows or settings.IMPORT_CHUNK_ROWS
+    rejects_file = open(rejects_path, "w", newline="") if rejects_path else None
+    db = SessionLocal()
+    try:
+        for path in paths:
+            report = ImportReport()
+            if rejects_file is not None:
+                writer = csv.writer(rejects_file)
+                report.sink = lambda line, reason, path=path: writer.writerow([path, line, reason])
+
+            print(f"Importing {path}...")
+            with open(path, "rb") as stream:
+                import_file(db, stream, os.path.basename(path), fmt, series_id, chunk_rows, report)
+
+            rate = report.rows / report.seconds if report.seconds else 0
+            print(f"✓ {report.rows} rows in {report.seconds:.1f}s ({rate:,.0f} rows/s): "
+                  f"{report.inserted} inserted, {report.duplicates} duplicates, {report.rejected} rejected")
+            for rejected in report.rejected_rows[:10]:
+                print(f"  line {rejected.line}: {rejected.reason}")
+            if report.rejected > 10 and rejects_file is None:
+                print(f"  ... use --rejects FILE to list all {report.rejected}")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+        if rejects_file is not None:
+            rejects_file.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load historical measurements from CSV or Parquet files")
+    parser.add_argument("paths", nargs="+", help="Files to import (.csv, .csv.gz, .parquet)")
+    parser.add_argument("--format", choices=["csv", "parquet"], help="Override format detection")
+    parser.add_argument("--series-id", type=int, help="Series for files without a series_id column")
+    parser.add_argument("--chunk-rows", type=int, help="Rows per transaction (default: IMPORT_CHUNK_ROWS)")
+    parser.add_argument("--rejects", help="Write every rejected row (file, line, reason) to this CSV")
+    args = parser.parse_args()
+    import_measurements(args.paths, args.format, args.series_id, args.chunk_rows, args.rejects)
@@ -0,0 +1,46 @@
+import sys
+import os
+import argparse
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import func
+
+from app.database import SessionLocal
+from app.models.series import Series
+from app.services.sharding import ID_SHIFT, shards
+
+
+def init_shards(only=None):
+    if not shards.enabled:
+        print("Error: SHARD_DATABASE_URLS is not set")
+        sys.exit(1)
+
+    for shard in range(1, len(shards)):
+        if only is not None and shard != only:
+            continue
+        try:
+            shards.init_shard(shard)
+        except Exception as e:
+            print(f"✗ Shard {shard} ({shards.engines[shard].url!r}): {e}")
+            raise
+        print(f"✓ Shard {shard} ({shards.engines[shard].url!r}): tables ready, ids from {shard << ID_SHIFT}")
+
+    db = SessionLocal()
+    try:
+        placed = dict(db.query(Series.shard, func.count()).group_by(Series.shard).all())
+    finally:
+        db.close()
+    print("\nSeries per shard: " + ", ".join(f"{shard}: {placed.get(shard, 0)}" for shard in range(len(shards))))
+    unknown = sorted(shard for shard in placed if shard >= len(shards))
+    if unknown:
+        print(f"✗ Series are placed on unconfigured shard(s) {unknown}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create the measurement tables on the shards in SHARD_DATABASE_URLS")
+    parser.add_argument("--shard", type=int, help="Only initialise this shard (1..N)")
+    args = parser.parse_args()
+    init_shards(args.shard)
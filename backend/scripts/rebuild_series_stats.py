@@ -0,0 +1,42 @@
+import sys
+import os
+import argparse
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.services.series_stats import rebuild, rebuild_all
+from app.services.sharding import shards
+
+
+def rebuild_series_stats(series_id=None, stale_only=False, sharded_only=False):
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        if series_id is not None:
+            with shards.series_session(series_id, db) as series_db:
+                stats = rebuild(series_db, series_id)
+            print(f"✓ Series {series_id}: {stats.count} readings, "
+                  f"{stats.first_timestamp} .. {stats.last_timestamp}, values [{stats.min_value}, {stats.max_value}]")
+        else:
+            rebuilt = rebuild_all(db, stale_only=stale_only, sharded_only=sharded_only)
+            kind = "stale " if stale_only else "sharded " if sharded_only else ""
+            print(f"✓ Rebuilt {len(rebuilt)} {kind}series summaries")
+        print(f"Done in {time.perf_counter() - started:.1f}s")
+    except Exception as e:
+        print(f"Error: {e}")
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild series_stats from all stored readings")
+    parser.add_argument("--series-id", type=int, help="Only rebuild this series")
+    parser.add_argument("--stale-only", action="store_true", help="Only rebuild summaries flagged stale")
+    parser.add_argument("--sharded-only", action="store_true", help="Only rebuild series placed on a shard")
+    args = parser.parse_args()
+    rebuild_series_stats(args.series_id, args.stale_only, args.sharded_only)
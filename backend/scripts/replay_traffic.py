@@ -0,0 +1,221 @@
+"""Replay a traffic capture (CAPTURE_PATH) against a running backend.
+
+Readings are re-sent over the transport they arrived on (HTTP or UDP line
+protocol) with their captured relative timing, scaled by --speed (2 = twice
+as fast, 0 = as fast as possible). Each sensor is pinned to one worker, so a
+sensor's readings go out in capture order. Captures hold no API keys; pass
+them with --key ID=KEY or a --keys CSV file of sensor_id,api_key rows.
+
+    python scripts/replay_traffic.py capture.bin --keys keys.csv --speed 10 --retime
+
+The report shows how far sends fell behind schedule (lag), response
+latency percentiles and response statuses; the exit status is 1 if any
+request failed.
+"""
+import sys
+import os
+import argparse
+import csv
+import http.client
+import json
+import queue
+import socket
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.traffic_capture import read_capture
+
+LANE_QUEUE_SIZE = 10000
+STATUS_LABELS = {200: "duplicate", 201: "created", 429: "rate_limited", 503: "shed"}
+
+
+class Lane(threading.Thread):
+    """Sends the readings of the sensors pinned to it, in order and on schedule"""
+
+    def __init__(self, args, keys: dict[int, str], schedule):
+        super().__init__(daemon=True)
+        self.args = args
+        self.keys = keys
+        self.schedule = schedule
+        self.queue: queue.Queue = queue.Queue(maxsize=LANE_QUEUE_SIZE)
+        self.lags: list[float] = []
+        self.latencies: list[float] = []
+        self.outcomes: Counter = Counter()
+        self.missing_keys: set[int] = set()
+        url = urlsplit(args.base_url)
+        self._http_target = (url.hostname, url.port or (443 if url.scheme == "https" else 80), url.scheme == "https")
+        self._conn = None
+        self._udp = None
+
+    def run(self):
+        while True:
+            reading = self.queue.get()
+            if reading is None:
+                return
+            key = self.keys.get(reading.sensor_id)
+            if key is None:
+                self.missing_keys.add(reading.sensor_id)
+                self.outcomes["no_key"] += 1
+                continue
+
+            due = self.schedule(reading.arrival_us)
+            delay = due - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self.lags.append(max(0.0, time.monotonic() - due) * 1000)
+
+            timestamp_us = reading.timestamp_us
+            if self.args.retime:
+                # Keep the reading's original offset from its arrival, relative to now
+                timestamp_us += time.time_ns() // 1000 - reading.arrival_us
+            transport = self.args.transport if self.args.transport != "auto" else reading.transport
+            if transport == "line":
+                self._send_line(reading, key, timestamp_us)
+            else:
+                self._send_http(reading, key, timestamp_us)
+
+    def _send_http(self, reading, key: str, timestamp_us: int):
+        body = json.dumps({
+            "series_id": reading.series_id,
+            "value": reading.value,
+            "timestamp": datetime.fromtimestamp(timestamp_us / 1_000_000, timezone.utc).isoformat(),
+        })
+        started = time.perf_counter()
+        try:
+            if self._conn is None:
+                host, port, tls = self._http_target
+                cls = http.client.HTTPSConnection if tls else http.client.HTTPConnection
+                self._conn = cls(host, port, timeout=self.args.timeout)
+            self._conn.request("POST", f"/api/sensors/{reading.sensor_id}/measurements", body,
+                               {"Content-Type": "application/json", "X-API-Key": key})
+            response = self._conn.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            self._conn = None
+            self.outcomes["connection_error"] += 1
+            return
+        self.latencies.append((time.perf_counter() - started) * 1000)
+        self.outcomes[STATUS_LABELS.get(response.status, f"http_{response.status}")] += 1
+
+    def _send_line(self, reading, key: str, timestamp_us: int):
+        if self._udp is None:
+            self._udp = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        line = f"{reading.sensor_id},{key},{reading.value!r},{timestamp_us / 1_000_000:.6f}\n"
+        try:
+            self._udp.sendto(line.encode(), (self.args.line_host, self.args.line_port))
+            self.outcomes["sent_udp"] += 1
+        except OSError:
+            self.outcomes["connection_error"] += 1
+
+
+def load_keys(args) -> dict[int, str]:
+    keys = {}
+    if args.keys:
+        with open(args.keys, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 2 and row[0].strip().isdigit():
+                    keys[int(row[0])] = row[1].strip()
+    for item in args.key or []:
+        sensor_id, _, key = item.partition("=")
+        keys[int(sensor_id)] = key
+    return keys
+
+
+def percentiles(samples: list[float]) -> str:
+    if not samples:
+        return "n/a"
+    q = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return f"p50 {statistics.median(samples):.1f}  p95 {q[94]:.1f}  p99 {q[98]:.1f}  max {max(samples):.1f} ms"
+
+
+def replay(args) -> int:
+    keys = load_keys(args)
+    sensors = set(args.sensor) if args.sensor else None
+    first_arrival = started = None
+
+    def schedule(arrival_us: int) -> float:
+        if args.speed <= 0:
+            return started
+        return started + (arrival_us - first_arrival) / 1_000_000 / args.speed
+
+    print(f"Replaying {args.capture} at {'max' if args.speed <= 0 else f'{args.speed:g}x'} speed "
+          f"against {args.base_url}...")
+    lanes = [Lane(args, keys, schedule) for _ in range(args.concurrency)]
+    for lane in lanes:
+        lane.start()
+
+    sent = 0
+    last_arrival = None
+    for reading in read_capture(args.capture):
+        if sensors is not None and reading.sensor_id not in sensors:
+            continue
+        if first_arrival is None:
+            first_arrival, started = reading.arrival_us, time.monotonic()
+        last_arrival = reading.arrival_us
+        # A full lane blocks the reader, which then shows up as lag on the other lanes
+        lanes[reading.sensor_id % len(lanes)].queue.put(reading)
+        sent += 1
+        if args.limit and sent >= args.limit:
+            break
+    for lane in lanes:
+        lane.queue.put(None)
+    for lane in lanes:
+        lane.join()
+
+    if not sent:
+        print("Nothing to replay")
+        return 0
+
+    elapsed = time.monotonic() - started
+    captured = (last_arrival - first_arrival) / 1_000_000
+    outcomes = sum((lane.outcomes for lane in lanes), Counter())
+    lags = [lag for lane in lanes for lag in lane.lags]
+    latencies = [lat for lane in lanes for lat in lane.latencies]
+    missing = sorted(set().union(*(lane.missing_keys for lane in lanes)))
+
+    print(f"\n{sent} readings captured over {captured:.1f}s, replayed in {elapsed:.1f}s "
+          f"({sent / elapsed if elapsed else float('inf'):.0f}/s)")
+    print(f"Lag:     {percentiles(lags)}")
+    print(f"Latency: {percentiles(latencies)}")
+    print("Outcomes: " + ", ".join(f"{name} {count}" for name, count in sorted(outcomes.items())))
+    if missing:
+        print(f"✗ No API key for sensor(s) {', '.join(map(str, missing))}; their readings were skipped")
+
+    failures = sum(count for name, count in outcomes.items()
+                   if name not in ("created", "duplicate", "sent_udp", "no_key"))
+    max_lag = max(lags) if lags else 0.0
+    if failures:
+        print(f"✗ {failures} request(s) failed")
+    if args.speed > 0 and max_lag > args.max_lag_ms:
+        print(f"✗ Fell behind schedule (max lag {max_lag:.0f} ms > {args.max_lag_ms:.0f} ms)")
+    elif not failures:
+        print("✓ Backend kept up")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay captured sensor traffic against a backend")
+    parser.add_argument("capture", help="Capture file written with CAPTURE_PATH")
+    parser.add_argument("--base-url", default="http://localhost:8000", help="Backend for HTTP readings")
+    parser.add_argument("--line-host", default="localhost", help="Line-protocol listener for UDP readings")
+    parser.add_argument("--line-port", type=int, default=8089)
+    parser.add_argument("--transport", choices=("auto", "http", "line"), default="auto",
+                        help="Send everything over one transport instead of the captured one")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time scale (1 = real time, 0 = max speed)")
+    parser.add_argument("--keys", help="CSV file of sensor_id,api_key rows")
+    parser.add_argument("--key", action="append", metavar="ID=KEY", help="API key for one sensor (repeatable)")
+    parser.add_argument("--sensor", type=int, action="append", help="Only replay these sensors (repeatable)")
+    parser.add_argument("--retime", action="store_true",
+                        help="Shift reading timestamps to the replay time (avoids duplicates on a seeded database)")
+    parser.add_argument("--limit", type=int, help="Stop after this many readings")
+    parser.add_argument("--concurrency", type=int, default=32, help="Worker lanes (sensors are pinned to one)")
+    parser.add_argument("--timeout", type=float, default=10.0, help="HTTP timeout in seconds")
+    parser.add_argument("--max-lag-ms", type=float, default=1000.0, help="Lag above which the run fell behind")
+    sys.exit(replay(parser.parse_args()))
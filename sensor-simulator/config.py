@@ -1,5 +1,11 @@
 API_BASE_URL = "http://localhost:8000"
 
+# "http" posts to the REST API, "udp" sends line protocol to the backend's
+# ingest listener (enabled with INGEST_UDP_PORT on the backend)
+TRANSPORT = "http"
+LINE_PROTOCOL_HOST = "localhost"
+LINE_PROTOCOL_PORT = 8089
+
 SENSORS = [
     {
         "id": 1,
@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 import requests
+import socket
 import time
 import random
 from datetime import datetime
-from config import API_BASE_URL, SENSORS
+from config import API_BASE_URL, SENSORS, TRANSPORT, LINE_PROTOCOL_HOST, LINE_PROTOCOL_PORT
 
 
 class SensorSimulator:
@@ -45,6 +46,26 @@ class SensorSimulator:
             return round(random.uniform(self.min_value, self.max_value), 2)
 
     def send_measurement(self):
+        """Send measurement using the configured transport"""
+        if TRANSPORT == "udp":
+            return self.send_line()
+        return self.send_http()
+
+    def send_line(self):
+        """Send measurement as a fire-and-forget UDP line-protocol datagram"""
+        value = self.generate_value()
+        line = f"{self.sensor_id},{self.api_key},{value},{time.time():.3f}\n"
+
+        try:
+            with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+                sock.sendto(line.encode(), (LINE_PROTOCOL_HOST, LINE_PROTOCOL_PORT))
+            print(f"✓ [{self.name}] Sent: {value} (UDP)")
+            return True
+        except OSError as e:
+            print(f"✗ [{self.name}] Socket error: {e}")
+            return False
+
+    def send_http(self):
         """Send measurement to API"""
         value = self.generate_value()
         timestamp = datetime.now().astimezone().isoformat()
@@ -66,6 +87,9 @@ class SensorSimulator:
             if response.status_code == 201:
                 print(f"✓ [{self.name}] Sent: {value} (Status: {response.status_code})")
                 return True
+            elif response.status_code == 200:
+                print(f"✓ [{self.name}] Already stored: {value} (duplicate)")
+                return True
             else:
                 print(f"✗ [{self.name}] Error: {response.status_code} - {response.text}")
                 return False